@@ -1,22 +1,84 @@
 import os
+import threading
 import pygame
 
 
 ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets')
 
+RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+SUITS = ['spades', 'hearts', 'diamonds', 'clubs']
+SOUND_NAMES = ('deal', 'flip', 'win', 'lose', 'draw')
+
 _img_cache = {}
 _snd_cache = {}
+_index = None
+_reported = False
+
+
+def _scan(sub):
+    """Lower-cased file name -> path for one asset subdirectory (a single directory listing)."""
+    d = os.path.join(ASSET_DIR, sub)
+    try:
+        with os.scandir(d) as it:
+            return {e.name.lower(): e.path for e in it if e.is_file()}
+    except OSError:
+        return {}
+
+
+def _first(files, names):
+    for n in names:
+        p = files.get(n.lower())
+        if p:
+            return p
+    return None
 
 
-def _try_load(path, convert=True):
-    if not os.path.isfile(path):
+def build_index():
+    """
+    Scan assets/ once and resolve every sprite/sound to a file (or None).
+
+    Card faces accept the Kenney (cardSpadesA.png), rank_of_suit.png and short
+    (AS.png) naming patterns, case-insensitively.
+    """
+    global _index
+    cards, table, chips, sounds = _scan('cards'), _scan('table'), _scan('chips'), _scan('sounds')
+    faces = {}
+    for suit in SUITS:
+        for rank in RANKS:
+            faces[(rank, suit)] = _first(cards, [f"card{suit.capitalize()}{rank}.png", f"{rank}_of_{suit}.png",
+                                                 f"{rank}{suit[0].upper()}.png"])
+    _index = {
+        'dir': ASSET_DIR,
+        'card': faces,
+        'card_back': _first(cards, ['cardBack_blue2.png', 'cardBack_red2.png', 'back.png', 'back_blue.png']),
+        'table': _first(table, ['table.png', 'felt.png', 'green_felt.png']),
+        'chips': [chips[n] for n in sorted(chips) if n.endswith('.png')],
+        'sound': {n: _first(sounds, [f"{n}.wav", f"{n}.ogg", f"{n}.mp3"]) for n in SOUND_NAMES},
+    }
+    return _index
+
+
+def index():
+    if _index is None or _index['dir'] != ASSET_DIR:
+        _img_cache.clear()
+        _snd_cache.clear()
+        build_index()
+    return _index
+
+
+def _load(path):
+    # Raw decoded surface; SpriteAtlas scales and display-converts it once
+    if path is None:
+        return None
+    try:
+        return pygame.image.load(path)
+    except Exception as e:
+        print(f"[assets] cannot load {path}: {e}")
         return None
-    img = pygame.image.load(path)
-    return img.convert_alpha() if convert else img
 
 
-def _try_sound(path):
-    if not os.path.isfile(path):
+def _load_sound(path):
+    if path is None or not pygame.mixer.get_init():
         return None
     try:
         return pygame.mixer.Sound(path)
@@ -26,112 +88,109 @@ def _try_sound(path):
 
 def card_image(rank: str, suit: str):
     """
-    Try to resolve a card sprite for rank in {A,2..10,J,Q,K} and suit in {spades,hearts,diamonds,clubs}.
-    Searches common naming patterns (Kenney, generic) under assets/cards/.
-    Returns a pygame.Surface or None.
+    Card sprite for rank in {A,2..10,J,Q,K} and suit in {spades,hearts,diamonds,clubs}.
+    Returns a pygame.Surface or None (lookups go through the index, never the filesystem).
     """
     key = ('card', rank, suit)
-    if key in _img_cache:
-        return _img_cache[key]
-
-    candidates = []
-    base = os.path.join(ASSET_DIR, 'cards')
-    suit_cap = suit.capitalize()
-    suit_title = suit.capitalize()
-    # Kenney: cardSpadesA.png, cardHearts10.png, etc.
-    candidates.append(os.path.join(base, f"card{suit_title}{rank}.png"))
-    # Alternative: rank_of_suit.png
-    candidates.append(os.path.join(base, f"{rank}_of_{suit}.png"))
-    # Short: AH.png, 10S.png
-    suit_short = suit[0].upper()
-    candidates.append(os.path.join(base, f"{rank}{suit_short}.png"))
-    # Lowercase variants
-    candidates.append(os.path.join(base, f"card{suit_title}{rank}.PNG"))
-    candidates.append(os.path.join(base, f"{rank}_of_{suit}.PNG"))
-    candidates.append(os.path.join(base, f"{rank}{suit_short}.PNG"))
-
-    surf = None
-    for p in candidates:
-        surf = _try_load(p)
-        if surf:
-            break
-    _img_cache[key] = surf
-    return surf
+    if key not in _img_cache:
+        _img_cache[key] = _load(index()['card'].get((rank, suit)))
+    return _img_cache[key]
 
 
 def card_back_image():
     key = ('card_back',)
-    if key in _img_cache:
-        return _img_cache[key]
-    base = os.path.join(ASSET_DIR, 'cards')
-    candidates = [
-        os.path.join(base, 'cardBack_blue2.png'),  # Kenney
-        os.path.join(base, 'cardBack_red2.png'),
-        os.path.join(base, 'back.png'),
-        os.path.join(base, 'back_blue.png'),
-    ]
-    surf = None
-    for p in candidates:
-        surf = _try_load(p)
-        if surf:
-            break
-    _img_cache[key] = surf
-    return surf
+    if key not in _img_cache:
+        _img_cache[key] = _load(index()['card_back'])
+    return _img_cache[key]
 
 
 def table_image():
     key = ('table',)
-    if key in _img_cache:
-        return _img_cache[key]
-    base = os.path.join(ASSET_DIR, 'table')
-    candidates = [
-        os.path.join(base, 'table.png'),
-        os.path.join(base, 'felt.png'),
-        os.path.join(base, 'green_felt.png'),
-    ]
-    surf = None
-    for p in candidates:
-        surf = _try_load(p, convert=True)
-        if surf:
-            break
-    _img_cache[key] = surf
-    return surf
+    if key not in _img_cache:
+        _img_cache[key] = _load(index()['table'])
+    return _img_cache[key]
 
 
 def chip_images():
     key = ('chips',)
-    if key in _img_cache:
-        return _img_cache[key]
-    chips_dir = os.path.join(ASSET_DIR, 'chips')
-    if not os.path.isdir(chips_dir):
-        _img_cache[key] = []
-        return []
-    files = [f for f in os.listdir(chips_dir) if f.lower().endswith('.png')]
-    files.sort()
-    surfs = []
-    for f in files:
-        s = _try_load(os.path.join(chips_dir, f))
-        if s:
-            surfs.append(s)
-    _img_cache[key] = surfs
-    return surfs
+    if key not in _img_cache:
+        _img_cache[key] = [s for s in (_load(p) for p in index()['chips']) if s is not None]
+    return _img_cache[key]
 
 
 def sound(name: str):
     key = ('sound', name)
-    if key in _snd_cache:
-        return _snd_cache[key]
-    base = os.path.join(ASSET_DIR, 'sounds')
-    candidates = [
-        os.path.join(base, f"{name}.wav"),
-        os.path.join(base, f"{name}.ogg"),
-        os.path.join(base, f"{name}.mp3"),
-    ]
-    s = None
-    for p in candidates:
-        s = _try_sound(p)
-        if s:
-            break
-    _snd_cache[key] = s
-    return s
-
+    if key not in _snd_cache:
+        _snd_cache[key] = _load_sound(index()['sound'].get(name))
+    return _snd_cache[key]
+
+
+class Preloader:
+    """Decodes every indexed sprite and sound on a background thread; `done`/`total` track progress."""
+
+    def __init__(self):
+        idx = index()
+        self.total = len(idx['card']) + 3 + len(SOUND_NAMES)
+        self.done = 0
+        self._thread = threading.Thread(target=self._run, name='asset-preload', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for rank, suit in index()['card']:
+            card_image(rank, suit)
+            self.done += 1
+        for fn in (card_back_image, table_image, chip_images):
+            fn()
+            self.done += 1
+        for n in SOUND_NAMES:
+            sound(n)
+            self.done += 1
+
+    @property
+    def alive(self):
+        return self._thread.is_alive()
+
+    def join(self):
+        self._thread.join()
+
+
+def preload_with_splash(screen, font, bg=(20, 40, 30)):
+    """Preload all assets while drawing a loading screen; returns once everything is decoded."""
+    loader = Preloader()
+    clock = pygame.time.Clock()
+    while loader.alive:
+        pygame.event.pump()
+        screen.fill(bg)
+        msg = font.render(f"Loading assets... {loader.done}/{loader.total}", True, (230, 230, 230))
+        screen.blit(msg, msg.get_rect(center=screen.get_rect().center))
+        pygame.display.flip()
+        clock.tick(30)
+    loader.join()
+    report_missing()
+
+
+def missing():
+    """Human-readable names of assets that have no file (procedural fallbacks are used)."""
+    idx = index()
+    out = []
+    faces = [k for k, p in idx['card'].items() if p is None]
+    if faces:
+        out.append(f"{len(faces)} card faces" if len(faces) > 3 else ", ".join(r + s[0].upper() for r, s in faces))
+    out += [name for name in ('card_back', 'table') if idx[name] is None]
+    if not idx['chips']:
+        out.append('chips')
+    snds = [n for n, p in idx['sound'].items() if p is None]
+    if snds:
+        out.append(f"sounds ({', '.join(snds)})")
+    return out
+
+
+def report_missing():
+    """Print the missing-asset summary once per process."""
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    miss = missing()
+    if miss:
+        print(f"[assets] not found under {ASSET_DIR} (using fallbacks): {'; '.join(miss)}")
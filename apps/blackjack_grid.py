@@ -0,0 +1,227 @@
+import math
+import numpy as np
+import pygame
+from apps import assets
+from apps.sprites import SpriteAtlas
+from apps.policy_worker import PolicyWorker, post_ready
+
+OUTCOME_COLORS = {'win': (90, 220, 120), 'lose': (230, 80, 80), 'draw': (235, 205, 90)}
+
+
+def hand_total(cards):
+    total = sum(min(v, 10) for v in cards)
+    if 1 in cards and total + 10 <= 21:
+        total += 10
+    return total
+
+
+class _Table:
+    def __init__(self, env, seed):
+        self.env = env
+        self.seed = seed
+        self.obs, _ = env.reset(seed=seed)
+        self.wins = self.losses = self.draws = 0
+        self.outcome = None  # 'win'|'lose'|'draw' while the finished round is on show
+        self.next_round_at = 0
+        self.dirty = True
+
+    def tally(self, info):
+        if info.get('win', 0):
+            self.wins += 1
+            self.outcome = 'win'
+        elif info.get('lose', 0):
+            self.losses += 1
+            self.outcome = 'lose'
+        else:
+            self.draws += int(bool(info.get('draw', 0)))
+            self.outcome = 'draw'
+
+
+class GridViewer:
+    """
+    N Blackjack tables played by one policy, drawn as a grid of scaled-down tiles.
+
+    Every tick the observations of all tables still in play are stacked and sent to
+    the model as one batch (on the PolicyWorker thread) with the tables' stacked
+    action masks, and each table steps with its own (always valid) action. Tiles are drawn from one SpriteAtlas sized to the tile and only
+    tables whose state changed are redrawn and pushed to the display.
+    """
+
+    def __init__(self, envs, model, seeds=None, fps=30, step_ms=150, pause_ms=600,
+                 deterministic=True, size=(1280, 800)):
+        pygame.init()
+        self.W, self.H = size
+        self.screen = pygame.display.set_mode((self.W, self.H), pygame.RESIZABLE)
+        pygame.display.set_caption(f"Blackjack Grid ({len(envs)} tables)")
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+        self.step_ms = step_ms
+        self.pause_ms = pause_ms
+        self.deterministic = deterministic
+        seeds = seeds or list(range(len(envs)))
+        self.tables = [_Table(env, s) for env, s in zip(envs, seeds)]
+        self.header_h = 34
+        self.font = pygame.font.SysFont("arial", 18)
+        self.small = pygame.font.SysFont("arial", 13)
+        self._text_cache = {}
+        assets.preload_with_splash(self.screen, self.font)
+        self.policy = PolicyWorker(model, on_ready=post_ready)
+        self.policy.warmup(np.stack([t.obs for t in self.tables]), action_masks=self._action_masks(self.tables))
+        self.rounds_played = 0
+        self.rounds_to_play = 0
+        self.next_tick_at = 0
+        self.policy_calls = 0
+        self.history = None  # optional HandHistoryWriter
+        self._header = None
+        self._layout()
+
+    def _layout(self):
+        n = len(self.tables)
+        self.cols = max(1, math.ceil(math.sqrt(n * self.W / max(1, self.H - self.header_h))))
+        self.cols = min(self.cols, n)
+        self.rows = math.ceil(n / self.cols)
+        self.tile_w = self.W // self.cols
+        self.tile_h = (self.H - self.header_h) // self.rows
+        self.card_h = max(18, int(self.tile_h * 0.3))
+        self.card_w = self.card_h * 2 // 3
+        # One atlas for every tile; its "table" is the tile background
+        self.atlas = SpriteAtlas((self.card_w, self.card_h), (self.tile_w - 2, self.tile_h - 2), font=self.small)
+        for t in self.tables:
+            t.dirty = True
+        self._header = None
+
+    def on_resize(self, w, h):
+        self.W, self.H = max(320, w), max(240, h)
+        self.screen = pygame.display.set_mode((self.W, self.H), pygame.RESIZABLE)
+        self.screen.fill((15, 15, 15))
+        self._layout()
+        pygame.display.flip()
+
+    def text(self, font, s, color):
+        key = (id(font), s, color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            if len(self._text_cache) > 4096:
+                self._text_cache.clear()
+            surf = font.render(s, True, color)
+            self._text_cache[key] = surf
+        return surf
+
+    def tile_rect(self, i):
+        r, c = divmod(i, self.cols)
+        return pygame.Rect(c * self.tile_w, self.header_h + r * self.tile_h, self.tile_w, self.tile_h)
+
+    def _draw_row(self, cards, x, y, right, hole_hidden=False):
+        if not cards:
+            return
+        step = self.card_w + 3
+        if len(cards) > 1:
+            step = min(step, max(6, (right - x - self.card_w) // (len(cards) - 1)))
+        for j, v in enumerate(cards):
+            self.screen.blit(self.atlas.card(v, face_up=not (hole_hidden and j == 1)), (x + j * step, y))
+
+    def draw_tile(self, i):
+        t = self.tables[i]
+        rect = self.tile_rect(i)
+        self.screen.fill((15, 15, 15), rect)
+        self.screen.blit(self.atlas.table, (rect.x + 1, rect.y + 1))
+        env = t.env
+        pad = 6
+        over = t.outcome is not None
+        label = f"#{i + 1} s{t.seed}"
+        self.screen.blit(self.text(self.small, label, (230, 230, 230)), (rect.x + pad, rect.y + 3))
+        top = rect.y + 20
+        self._draw_row(list(env.dealer), rect.x + pad, top, rect.right - pad, hole_hidden=not over)
+        self._draw_row(list(env.player), rect.x + pad, top + self.card_h + 6, rect.right - pad)
+        d = hand_total(env.dealer) if over else '?'
+        status = f"P {hand_total(env.player)}  D {d}   W {t.wins} L {t.losses} D {t.draws}"
+        self.screen.blit(self.text(self.small, status, (240, 240, 240)), (rect.x + pad, rect.bottom - 18))
+        if over:
+            pygame.draw.rect(self.screen, OUTCOME_COLORS[t.outcome], rect.inflate(-2, -2), 3)
+        t.dirty = False
+        return rect
+
+    def draw_header(self):
+        w = sum(t.wins for t in self.tables)
+        l = sum(t.losses for t in self.tables)
+        d = sum(t.draws for t in self.tables)
+        n = max(1, w + l + d)
+        s = (f"Tables {len(self.tables)} | Rounds {self.rounds_played} | W/L/D {w}/{l}/{d} "
+             f"({100.0 * w / n:.1f}% win) | {self.clock.get_fps():.0f} fps")
+        if s == self._header:
+            return None
+        self._header = s
+        rect = pygame.Rect(0, 0, self.W, self.header_h)
+        self.screen.fill((20, 20, 20), rect)
+        self.screen.blit(self.text(self.font, s, (240, 240, 240)), (10, 7))
+        return rect
+
+    @staticmethod
+    def _action_masks(tables):
+        """(tables, n_actions) valid-action masks, one env.action_masks() row per table."""
+        return np.stack([t.env.action_masks() for t in tables])
+
+    def step_tables(self, now, wait=False):
+        """One policy batch over all tables in play; returns False while the batch is still computing."""
+        for t in self.tables:
+            if t.outcome is not None and now >= t.next_round_at:
+                t.obs, _ = t.env.reset()
+                t.outcome = None
+                t.dirty = True
+        active = [t for t in self.tables if t.outcome is None]
+        if not active:
+            return True
+        actions = self.policy.poll(np.stack([t.obs for t in active]), self.deterministic, wait=wait,
+                                   action_masks=self._action_masks(active))
+        if actions is None:
+            return False
+        self.policy_calls += 1
+        for t, a in zip(active, np.asarray(actions).reshape(-1)):
+            t.obs, _, term, trunc, info = t.env.step(int(a))
+            t.dirty = True
+            if self.history is not None:
+                self.history.observe(t.env, term or trunc)
+            if term or trunc:
+                t.tally(info)
+                t.next_round_at = now + self.pause_ms
+                self.rounds_played += 1
+        return True
+
+    def run(self):
+        running = True
+        self.screen.fill((15, 15, 15))
+        pygame.display.flip()
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    self.on_resize(event.w, event.h)
+            now = pygame.time.get_ticks()
+            if now >= self.next_tick_at and self.step_tables(now, wait=self.step_ms <= 0):
+                self.next_tick_at = now + self.step_ms
+            if self.rounds_to_play > 0 and self.rounds_played >= self.rounds_to_play:
+                running = False
+            # Retained mode: push only the tiles that changed (plus the header when its text changes)
+            rects = [self.draw_tile(i) for i, t in enumerate(self.tables) if t.dirty]
+            header = self.draw_header()
+            if header is not None:
+                rects.append(header)
+            if rects:
+                pygame.display.update(rects)
+            self.clock.tick(self.fps)
+        self.policy.close()
+        if self.history is not None:
+            self.history.close()
+        pygame.quit()
+
+    def summary(self):
+        lines = [f"table {i + 1} (seed {t.seed}): W/L/D {t.wins}/{t.losses}/{t.draws}" for i, t in enumerate(self.tables)]
+        w = sum(t.wins for t in self.tables)
+        l = sum(t.losses for t in self.tables)
+        d = sum(t.draws for t in self.tables)
+        lines.append(f"all {len(self.tables)} tables: rounds {self.rounds_played} | W/L/D {w}/{l}/{d} | "
+                     f"{self.policy_calls} batched policy calls")
+        return "\n".join(lines)
@@ -4,17 +4,32 @@ import time
 import math
 import argparse
 from typing import Optional
+import numpy as np
 import pygame
 from apps import assets
+from apps.sprites import SpriteAtlas
+from apps.policy_worker import PolicyWorker, post_ready
+from apps.blackjack_grid import hand_total
 from src.utils import load_configs
 import traceback, datetime, os
-from src.make_env import make_env
 
 
 def lerp(a, b, t):
     return a + (b - a) * t
 
 
+class ReplayTable:
+    """Stand-in for BlackjackEnv in --replay mode: just the card rows the viewer draws."""
+
+    phase = 'play'
+    bet_bins = 0
+    allow_double = False
+
+    def __init__(self):
+        self.player = []
+        self.dealer = []
+
+
 class BlackjackViewer:
     def __init__(self, env, fps=60):
         self.env = env
@@ -27,18 +42,27 @@ class BlackjackViewer:
             pass
         # Window
         self.W, self.H = 900, 600
-        self.screen = pygame.display.set_mode((self.W, self.H))
+        self.screen = pygame.display.set_mode((self.W, self.H), pygame.RESIZABLE)
         pygame.display.set_caption("Blackjack Viewer")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("arial", 20)
         self.bigfont = pygame.font.SysFont("arial", 28, bold=True)
         # Layout
         self.table_color = (32, 96, 64)
-        self.deck_pos = (self.W - 120, self.H // 2 - 40)
-        self.dealer_y = 120
-        self.player_y = 360
-        self.card_w, self.card_h = 80, 120
         self.spacing = 24
+        self._layout()
+        # Decode every sprite/sound behind a splash screen so nothing loads mid-animation
+        assets.preload_with_splash(self.screen, self.font)
+        # Pre-scaled sprites for the current card/window size (rebuilt on resize)
+        self.atlas = SpriteAtlas((self.card_w, self.card_h), (self.W, self.H), font=self.font,
+                                 table_color=self.table_color)
+        # Retained-mode rendering: rendered strings and the last drawn per-region state
+        self._text_cache = {}
+        self._panel_cache = None
+        self._scene = None
+        self._confetti_live = False
+        self._confetti_done = False
+        self.idle_wait_ms = 500
         # Cosmetics
         self.suits = ['♠', '♥', '♦', '♣']
         # State for animations
@@ -58,6 +82,7 @@ class BlackjackViewer:
         # Autoplay/model
         self.autoplay = False
         self.model = None
+        self.policy = None  # PolicyWorker: inference off the render thread
         self.autoplay_delay_ms = 500
         # Time to wait (ms) before auto-starting a new round after one ends
         # Used when scheduling self.next_round_at
@@ -76,11 +101,55 @@ class BlackjackViewer:
         self._stand_prev_dealer_len = 0
         self._post_reveal_info = None
         # Recording (viewer-captured gameplay)
-        self.recording_enabled = False
-        self.record_frames = []
-        self.record_out = None
-        self.record_max_frames = 3000
+        # Frames go through a bounded queue to an encoder thread (see start_recording)
+        self.recorder = None
+        self.record_scale = 1.0
         self.rounds_to_play = 0
+        self.rounds_played = 0
+        # Soak mode: no animations/sleeps; optionally save every Kth finished round as a PNG
+        self.fast = False
+        self.snapshot_every = 0
+        self.snapshot_dir = None
+        # Hand history output (HandHistoryWriter) and replay-mode HUD overrides
+        self.history = None
+        self.controls_text = None
+        self.outcome_tip = "Press SPACE for new round"
+        self.replay_speed = 1.0
+
+    def text(self, font, s, color):
+        # Rendered text surfaces keyed by (font, string, colour)
+        key = (id(font), s, color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            if len(self._text_cache) > 2048:
+                self._text_cache.clear()
+            surf = font.render(s, True, color)
+            self._text_cache[key] = surf
+        return surf
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (after animations or resizes)."""
+        self._scene = None
+
+    def _layout(self):
+        # Card size and rows scale with window height (80x120 cards at 900x600)
+        self.card_h = max(60, int(self.H * 0.2))
+        self.card_w = self.card_h * 2 // 3
+        self.deck_pos = (self.W - 120, self.H // 2 - 40)
+        self.dealer_y = int(self.H * 0.2)
+        self.player_y = int(self.H * 0.6)
+
+    def on_resize(self, w, h):
+        self.W, self.H = max(480, w), max(360, h)
+        self.screen = pygame.display.set_mode((self.W, self.H), pygame.RESIZABLE)
+        self._layout()
+        self.atlas.resize((self.card_w, self.card_h), (self.W, self.H))
+        self.invalidate()
+        # Move dealt cards to the new rows without touching hole-card state
+        for c in self.dealer_cards_vis:
+            c['y'] = self.dealer_y
+        for c in self.player_cards_vis:
+            c['y'] = self.player_y
 
     def draw_obs_panel(self):
         # Show exactly what the agent observes for Blackjack
@@ -89,7 +158,6 @@ class BlackjackViewer:
         try:
             v = self.obs
             # Flatten if vector inside batch
-            import numpy as np
             v = np.array(v).reshape(-1)
             # Keys per env observation order
             keys = [
@@ -100,81 +168,77 @@ class BlackjackViewer:
             for i, k in enumerate(keys):
                 if i < len(v):
                     lines.append(f"{k}: {float(v[i]):.2f}")
-            # Panel background
-            pad = 8
-            w = 260
-            h = 14 * (len(lines) + 1)
-            panel = pygame.Surface((w, h), pygame.SRCALPHA)
-            panel.fill((20, 20, 20, 160))
-            title = self.font.render('Agent Obs', True, (240, 240, 240))
-            panel.blit(title, (pad, pad))
-            y = pad + 18
-            for t in lines:
-                txt = self.font.render(t, True, (220, 220, 220))
-                panel.blit(txt, (pad, y))
-                y += 16
-            self.screen.blit(panel, (20, 20))
+            # Panel background (composed once per distinct set of values)
+            if self._panel_cache is None or self._panel_cache[0] != lines:
+                pad = 8
+                w = 260
+                h = 14 * (len(lines) + 1)
+                panel = pygame.Surface((w, h), pygame.SRCALPHA)
+                panel.fill((20, 20, 20, 160))
+                title = self.text(self.font, 'Agent Obs', (240, 240, 240))
+                panel.blit(title, (pad, pad))
+                y = pad + 18
+                for t in lines:
+                    txt = self.font.render(t, True, (220, 220, 220))
+                    panel.blit(txt, (pad, y))
+                    y += 16
+                self._panel_cache = (lines, panel)
+            self.screen.blit(self._panel_cache[1], (20, 20))
         except Exception:
             pass
 
     def draw_table(self):
-        table = assets.table_image()
-        if table:
-            # scale to fit while keeping aspect
-            surf = pygame.transform.smoothscale(table, (self.W, self.H))
-            self.screen.blit(surf, (0, 0))
-        else:
-            self.screen.fill(self.table_color)
-            pygame.draw.circle(self.screen, (28, 84, 56), (self.W//2, self.H//2), 230, width=4)
+        # Table (image scaled to the window, or procedural felt) is pre-rendered in the atlas
+        self.screen.blit(self.atlas.table, (0, 0))
         # Status banner overlay
         self._draw_status_banner()
         # Deck area
-        back = assets.card_back_image()
-        if back:
-            b = pygame.transform.smoothscale(back, (self.card_w, self.card_h))
-            self.screen.blit(b, self.deck_pos)
+        if assets.card_back_image() is not None:
+            self.screen.blit(self.atlas.back, self.deck_pos)
         else:
             pygame.draw.rect(self.screen, (60,60,60), (*self.deck_pos, self.card_w, self.card_h), border_radius=6)
-            txt = self.font.render("DECK", True, (210, 210, 210))
+            txt = self.text(self.font, "DECK", (210, 210, 210))
             self.screen.blit(txt, (self.deck_pos[0]+10, self.deck_pos[1]+self.card_h+6))
 
     def draw_hud(self, info):
         # Titles
-        dealer_lbl = self.bigfont.render("Dealer", True, (240, 240, 240))
-        player_lbl = self.bigfont.render("Player", True, (240, 240, 240))
+        dealer_lbl = self.text(self.bigfont, "Dealer", (240, 240, 240))
+        player_lbl = self.text(self.bigfont, "Player", (240, 240, 240))
         self.screen.blit(dealer_lbl, (40, self.dealer_y - 60))
         self.screen.blit(player_lbl, (40, self.player_y - 60))
 
         # Sums
         dsum = info.get('dealer_sum', 0)
         psum = info.get('player_sum', 0)
-        dmsg = self.font.render(f"Sum: {dsum}", True, (220, 220, 240))
-        pmsg = self.font.render(f"Sum: {psum}", True, (220, 220, 240))
+        dmsg = self.text(self.font, f"Sum: {dsum}", (220, 220, 240))
+        pmsg = self.text(self.font, f"Sum: {psum}", (220, 220, 240))
         self.screen.blit(dmsg, (40, self.dealer_y - 30))
         self.screen.blit(pmsg, (40, self.player_y - 30))
 
         # Bankroll/bet if present
         if 'bankroll' in info:
-            bmsg = self.font.render(f"Bankroll: {int(info.get('bankroll', 0))}", True, (250, 230, 90))
+            bmsg = self.text(self.font, f"Bankroll: {int(info.get('bankroll', 0))}", (250, 230, 90))
             self.screen.blit(bmsg, (self.W - 260, 20))
         if 'bet' in info and info.get('bet', 0) > 0:
-            betmsg = self.font.render(f"Bet: {int(info.get('bet', 0))}", True, (250, 230, 90))
+            betmsg = self.text(self.font, f"Bet: {int(info.get('bet', 0))}", (250, 230, 90))
             self.screen.blit(betmsg, (self.W - 260, 50))
 
         # Controls
-        if self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet':
+        if self.controls_text:
+            controls = self.controls_text
+        elif self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet':
             controls = "Choose Bet: Keys 1..{}  |  ESC: Quit".format(max(1, getattr(self.env, 'bet_bins', 1)))
         else:
             controls = "H: Hit  S: Stand  D: Double  SPACE: New Round  ESC: Quit"
         # Hide double suggestion if not allowed
         allow_double = bool(getattr(self.env, 'allow_double', False)) and int(getattr(self.env, 'bet_bins', 0)) > 0
-        if not (self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet'):
+        if not self.controls_text and not (self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet'):
             controls = "H: Hit  S: Stand{}  SPACE: New Round  ESC: Quit".format("  D: Double" if allow_double else "")
-        cmsg = self.font.render(controls, True, (230, 230, 230))
+        cmsg = self.text(self.font, controls, (230, 230, 230))
         self.screen.blit(cmsg, (40, self.H - 40))
         # Scoreboard (session): W-L-D
         score = f"W:{self.session_wins}  L:{self.session_losses}  D:{self.session_draws}"
-        scmsg = self.font.render(score, True, (230, 230, 230))
+        scmsg = self.text(self.font, score, (230, 230, 230))
         self.screen.blit(scmsg, (self.W - scmsg.get_width() - 20, self.H - 40))
         # Agent observation overlay (top-left)
         self.draw_obs_panel()
@@ -189,50 +253,28 @@ class BlackjackViewer:
             msg = f"Agent Decision: {self.last_decision}"
         if not msg:
             return
-        surf = self.bigfont.render(msg, True, (250, 230, 90))
-        pad = 8
-        w = surf.get_width() + pad * 2
-        h = surf.get_height() + pad * 2
-        x = (self.W - w) // 2
+        key = ('banner', msg)
+        panel = self._text_cache.get(key)
+        if panel is None:
+            surf = self.text(self.bigfont, msg, (250, 230, 90))
+            pad = 8
+            w = surf.get_width() + pad * 2
+            h = surf.get_height() + pad * 2
+            panel = pygame.Surface((w, h), pygame.SRCALPHA)
+            panel.fill((0, 0, 0, 140))
+            panel.blit(surf, (pad, pad))
+            self._text_cache[key] = panel
+        x = (self.W - panel.get_width()) // 2
         y = 60
-        panel = pygame.Surface((w, h), pygame.SRCALPHA)
-        panel.fill((0, 0, 0, 140))
-        panel.blit(surf, (pad, pad))
         self.screen.blit(panel, (x, y))
 
     def draw_card(self, x, y, val, face_up=True):
-        rank = 'A' if val == 1 else ('K' if val == 13 else ('Q' if val == 12 else ('J' if val == 11 else str(val))))
-        suit_name = ['spades','hearts','diamonds','clubs'][(val + 1) % 4]
-        if face_up:
-            surf = assets.card_image(rank, suit_name)
-            if surf:
-                card = pygame.transform.smoothscale(surf, (self.card_w, self.card_h))
-                self.screen.blit(card, (x, y))
-                return
-        else:
-            back = assets.card_back_image()
-            if back:
-                card = pygame.transform.smoothscale(back, (self.card_w, self.card_h))
-                self.screen.blit(card, (x, y))
-                return
-        # Fallback procedural
-        color = (245, 245, 245) if face_up else (120, 120, 120)
-        pygame.draw.rect(self.screen, color, (x, y, self.card_w, self.card_h), border_radius=8)
-        pygame.draw.rect(self.screen, (30, 30, 30), (x, y, self.card_w, self.card_h), 2, border_radius=8)
-        if face_up:
-            suit = self.suits[(val + 1) % 4]
-            col = (200, 40, 40) if suit in ('♥', '♦') else (20, 20, 20)
-            idx = (val + 1) % 4
-            suit = {0:'♠',1:'♥',2:'♦',3:'♣'}.get(idx, '?')
-            col = (200, 40, 40) if idx in (1, 2) else (20, 20, 20)
-            rtxt = self.font.render('A' if val == 1 else str(val), True, col)
-            stxt = self.font.render(suit, True, col)
-            self.screen.blit(rtxt, (x + 8, y + 6))
-            self.screen.blit(stxt, (x + self.card_w - 24, y + self.card_h - 26))
+        # Faces/back (asset or procedural fallback) are pre-scaled in the atlas
+        self.screen.blit(self.atlas.card(val, face_up), (x, y))
 
     def animate_deal(self, who='player', val=1, duration=0.25, face_up=True):
-        # Slide a card from deck to the end of target row
-        frames = max(1, int(self.fps * duration))
+        # Slide a card from deck to the end of target row (fast mode just places it)
+        frames = 0 if self.fast else max(1, int(self.fps * duration))
         start = self.deck_pos
         if who == 'player':
             row_y = self.player_y
@@ -255,37 +297,15 @@ class BlackjackViewer:
             self.draw_hud(self.last_info)
             pygame.display.flip()
             self.clock.tick(self.fps)
-            # Auto-start next round when autoplaying
-            if self.autoplay and round_over and not self.pending_reveal and getattr(self, 'next_round_at', 0):
-                now3 = pygame.time.get_ticks()
-                if now3 >= self.next_round_at:
-                    if self.rounds_to_play > 0:
-                        self.rounds_to_play -= 1
-                        if self.rounds_to_play <= 0:
-                            running = False
-                            continue
-                    obs, info = self.env.reset()
-                    self.obs = obs
-                    outcome_msg = None
-                    round_over = False
-                    self.last_info = info
-                    self.sync_from_env()
-                    self.next_round_at = 0
             # Capture frame for recording
-            if getattr(self, 'recording_enabled', False) and len(self.record_frames) < getattr(self, 'record_max_frames', 3000):
-                try:
-                    import numpy as np
-                    arr = pygame.surfarray.array3d(self.screen)
-                    frame = np.transpose(arr, (1, 0, 2))
-                    self.record_frames.append(frame)
-                except Exception:
-                    pass
+            self.record_frame()
+        self.invalidate()
         # commit card to vis list
         if who == 'player':
             self.player_cards_vis.append({'x': target[0], 'y': target[1], 'val': val})
         else:
             self.dealer_cards_vis.append({'x': target[0], 'y': target[1], 'val': val})
-        if self.snd_deal:
+        if self.snd_deal and not self.fast:
             try:
                 self.snd_deal.play()
             except Exception:
@@ -312,17 +332,18 @@ class BlackjackViewer:
             self.player_cards_vis.append({'x': 120 + i * self.spacing, 'y': self.player_y, 'val': int(v)})
         # Reset hole state
         self.hole_revealed = False
+        self._confetti_done = False
 
-    def animate_initial_deal(self):
+    def animate_initial_deal(self, duration=0.25):
         # Sequence: dealer up, player 1, dealer hole (face-down), player 2
         if len(self.env.dealer) >= 1:
-            self.animate_deal('dealer', self.env.dealer[0], face_up=True)
+            self.animate_deal('dealer', self.env.dealer[0], duration, face_up=True)
         if len(self.env.player) >= 1:
-            self.animate_deal('player', self.env.player[0], face_up=True)
+            self.animate_deal('player', self.env.player[0], duration, face_up=True)
         if len(self.env.dealer) >= 2:
-            self.animate_deal('dealer', self.env.dealer[1], face_up=False)
+            self.animate_deal('dealer', self.env.dealer[1], duration, face_up=False)
         if len(self.env.player) >= 2:
-            self.animate_deal('player', self.env.player[1], face_up=True)
+            self.animate_deal('player', self.env.player[1], duration, face_up=True)
         self.hole_revealed = False
 
     def reveal_hole_flip(self, duration=0.25):
@@ -330,7 +351,7 @@ class BlackjackViewer:
         if len(self.dealer_cards_vis) < 2:
             return
         card = self.dealer_cards_vis[1]
-        frames = max(1, int(self.fps * duration))
+        frames = 0 if self.fast else max(1, int(self.fps * duration))
         for i in range(frames):
             t = (i + 1) / frames
             w_scale = max(0.2, abs(math.cos(t * math.pi)))
@@ -341,20 +362,17 @@ class BlackjackViewer:
             # flipping card as a thinner rect
             rect_w = max(4, int(self.card_w * w_scale))
             x = card['x'] + (self.card_w - rect_w)//2
-            back = assets.card_back_image()
-            if back:
-                temp = pygame.transform.smoothscale(back, (rect_w, self.card_h))
-                self.screen.blit(temp, (x, card['y']))
-            else:
-                pygame.draw.rect(self.screen, (120,120,120), (x, card['y'], rect_w, self.card_h), border_radius=8)
+            self.screen.blit(self.atlas.back_width(rect_w), (x, card['y']))
             # player row
             for c in self.player_cards_vis:
                 self.draw_card(c['x'], c['y'], c['val'], True)
             self.draw_hud(self.last_info)
             pygame.display.flip()
+            self.record_frame()
             self.clock.tick(self.fps)
         self.hole_revealed = True
-        if self.snd_flip:
+        self.invalidate()
+        if self.snd_flip and not self.fast:
             try:
                 self.snd_flip.play()
             except Exception:
@@ -374,25 +392,26 @@ class BlackjackViewer:
     def draw_bet_ui(self):
         rects = self._bet_rects()
         bins = max(1, getattr(self.env, 'bet_bins', 1))
-        title = self.bigfont.render("Select Bet", True, (240, 240, 240))
+        title = self.text(self.bigfont, "Select Bet", (240, 240, 240))
         self.screen.blit(title, (self.W//2 - title.get_width()//2, self.H - 160))
-        chips = assets.chip_images()
         for i, r in enumerate(rects):
-            if i < len(chips):
-                chip = pygame.transform.smoothscale(chips[i], (r.w, r.h))
+            chip = self.atlas.chip(i)
+            if chip is not None:
                 self.screen.blit(chip, (r.x, r.y))
             else:
                 pygame.draw.ellipse(self.screen, (230, 200, 80), r)
                 pygame.draw.ellipse(self.screen, (40,40,40), r, 2)
             label = str(min(9, i+1))
-            txt = self.bigfont.render(label, True, (20,20,20))
+            txt = self.text(self.bigfont, label, (20,20,20))
             self.screen.blit(txt, (r.centerx - txt.get_width()//2, r.centery - txt.get_height()//2))
-        hint = self.font.render("Press 1..{} or click a chip".format(bins), True, (240, 240, 240))
+        hint = self.text(self.font, "Press 1..{} or click a chip".format(bins), (240, 240, 240))
         self.screen.blit(hint, (self.W//2 - hint.get_width()//2, self.H - 30))
 
     def spawn_confetti(self, n=80):
         import random
         self.confetti = []
+        # Once per winning round, so the viewer can go idle after it settles
+        self._confetti_done = True
         for _ in range(n):
             x = random.randint(0, self.W)
             y = random.randint(-50, 0)
@@ -424,6 +443,8 @@ class BlackjackViewer:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    self.on_resize(event.w, event.h)
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
@@ -440,13 +461,13 @@ class BlackjackViewer:
                             # bet selection keys 1..bet_bins
                             if pygame.K_1 <= event.key <= pygame.K_9:
                                 choice = event.key - pygame.K_1
-                                obs, r, term, trunc, info = self.env.step(choice)
+                                obs, r, term, trunc, info = self._step(choice)
                                 self.last_info = info
                                 # animate initial deal after choosing bet
                                 self.animate_initial_deal()
                         elif event.key in (pygame.K_h, pygame.K_LEFT):
                             self.last_decision = 'HIT'
-                            obs, r, term, trunc, info = self.env.step(0)
+                            obs, r, term, trunc, info = self._step(0)
                             self.obs = obs
                             # animate last player card if drawn
                             if len(self.env.player) > len(self.player_cards_vis):
@@ -454,16 +475,12 @@ class BlackjackViewer:
                             self.last_info = info
                             if term or trunc:
                                 round_over = True
-                                outcome_msg = self.outcome_text(info)
-                                self._tally_outcome(info)
-                                self._play_outcome_sound(info)
-                                if self.autoplay:
-                                    self.next_round_at = pygame.time.get_ticks() + self.auto_next_ms
+                                outcome_msg = self._finish_round(info)
                         elif event.key in (pygame.K_s, pygame.K_RIGHT):
                             # store prev dealer count to animate new cards and flip
                             self.last_decision = 'STAND'
                             prev_len = len(self.env.dealer)
-                            obs, r, term, trunc, info = self.env.step(1)
+                            obs, r, term, trunc, info = self._step(1)
                             self.obs = obs
                             # Defer reveal and dealer animations for a moment
                             self.pending_reveal = True
@@ -475,7 +492,7 @@ class BlackjackViewer:
                             # double (action=2) if supported
                             try:
                                 self.last_decision = 'DOUBLE'
-                                obs, r, term, trunc, info = self.env.step(2)
+                                obs, r, term, trunc, info = self._step(2)
                                 self.obs = obs
                                 # player took one card
                                 if len(self.env.player) > len(self.player_cards_vis):
@@ -483,10 +500,7 @@ class BlackjackViewer:
                                 self.last_info = info
                                 if term or trunc:
                                     round_over = True
-                                    outcome_msg = self.outcome_text(info)
-                                    self._play_outcome_sound(info)
-                                    if self.autoplay:
-                                        self.next_round_at = pygame.time.get_ticks() + self.auto_next_ms
+                                    outcome_msg = self._finish_round(info)
                             except Exception:
                                 pass
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -494,23 +508,45 @@ class BlackjackViewer:
                         mx, my = event.pos
                         for idx, rect in enumerate(self._bet_rects()):
                             if rect.collidepoint(mx, my):
-                                obs, r, term, trunc, info = self.env.step(idx)
+                                obs, r, term, trunc, info = self._step(idx)
                                 self.obs = obs
                                 self.last_info = info
                                 self.animate_initial_deal()
                                 break
 
+            # Auto-start the next round once the outcome has been shown
+            if self.autoplay and round_over and not self.pending_reveal and self.next_round_at:
+                now = pygame.time.get_ticks()
+                if self.rounds_to_play > 0 and self.rounds_played >= self.rounds_to_play:
+                    running = False
+                    continue
+                if now >= self.next_round_at:
+                    obs, info = self.env.reset()
+                    self.obs = obs
+                    outcome_msg = None
+                    round_over = False
+                    self.last_info = info
+                    self.sync_from_env()
+                    self.next_round_at = 0
+                    self.next_action_at = now + self.autoplay_delay_ms
+
             # Autoplay decisions
-            if self.autoplay and not round_over:
+            if self.autoplay and not round_over and not self.pending_reveal:
+                # Speculatively start inference for the current state while the action delay runs
+                self._prefetch_action()
                 now = pygame.time.get_ticks()
                 if now >= self.next_action_at:
                     a = self._autoplay_action()
                     if a is not None:
                         prev_len = len(self.env.dealer)
-                        obs, r, term, trunc, info = self.env.step(int(a))
+                        was_bet = getattr(self.env, 'phase', 'play') == 'bet'
+                        obs, r, term, trunc, info = self._step(int(a))
                         self.obs = obs
                         # animate according to action and env changes
-                        if getattr(self.env, 'phase', 'play') != 'bet':
+                        if was_bet:
+                            self.last_info = info
+                            self.animate_initial_deal()
+                        else:
                             if a == 0 and len(self.env.player) > len(self.player_cards_vis):
                                 self.last_decision = 'HIT'
                                 self.animate_deal('player', self.env.player[-1])
@@ -522,18 +558,16 @@ class BlackjackViewer:
                                 self._post_reveal_info = (term, trunc, info)
                             if a == 2:
                                 self.last_decision = 'DOUBLE'
+                                if len(self.env.player) > len(self.player_cards_vis):
+                                    self.animate_deal('player', self.env.player[-1])
                         self.last_info = info
-                        if term or trunc and a != 1:
+                        # STAND outcomes are finished after the dealer reveal below
+                        if (term or trunc) and not self.pending_reveal:
                             round_over = True
-                            outcome_msg = self.outcome_text(info)
-                            self._tally_outcome(info)
-                            self._play_outcome_sound(info)
-                            if self.autoplay and self.rounds_to_play > 0:
-                                self.rounds_to_play -= 1
-                                if self.rounds_to_play <= 0:
-                                    running = False
-                            if self.autoplay:
-                                self.next_round_at = pygame.time.get_ticks() + self.auto_next_ms
+                            outcome_msg = self._finish_round(info)
+                        elif not (term or trunc) and not self.pending_reveal and len(self.env.player) < len(self.player_cards_vis):
+                            # Multi-round episode moved on to a fresh hand
+                            self.sync_from_env()
                         self.next_action_at = now + self.autoplay_delay_ms
 
             # Handle deferred reveal after STAND
@@ -548,46 +582,287 @@ class BlackjackViewer:
                     self.sync_from_env()
                     if self._post_reveal_info is not None:
                         term, trunc, info = self._post_reveal_info
+                        self.last_info = info
                         if term or trunc:
                             round_over = True
-                            outcome_msg = self.outcome_text(info)
-                            self._tally_outcome(info)
-                            self._play_outcome_sound(info)
-                            if self.autoplay:
-                                self.next_round_at = pygame.time.get_ticks() + self.auto_next_ms
-                        self.last_info = info
+                            outcome_msg = self._finish_round(info)
                     self.pending_reveal = False
                     self._post_reveal_info = None
 
-            # Draw
-            self.draw_table()
-            self.redraw_cards()
-            self.draw_hud(self.last_info)
-            # Bet UI overlay if needed
-            if self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet':
-                self.draw_bet_ui()
-            if outcome_msg:
-                self.draw_center_text(outcome_msg, (250, 230, 90))
-                tip = self.font.render("Press SPACE for new round", True, (240,240,240))
-                self.screen.blit(tip, (self.W//2 - tip.get_width()//2, self.H//2 + 30))
-                # confetti on win
-                if self.last_info.get('win', 0) and not self.confetti:
-                    self.spawn_confetti()
-            self.update_confetti()
-            pygame.display.flip()
+            if self.fast:
+                continue
+            # Draw only regions whose visible state changed; idle frames are skipped
+            if outcome_msg and self.last_info.get('win', 0) and not self.confetti and not self._confetti_done:
+                self.spawn_confetti()
+            if not self.render_frame(outcome_msg):
+                self._idle_wait(round_over)
+                continue
             self.clock.tick(self.fps)
 
         pygame.quit()
-        # Save recording if enabled
-        if getattr(self, 'recording_enabled', False) and self.record_frames and self.record_out:
-            try:
-                import imageio
-                imageio.mimsave(self.record_out, self.record_frames, fps=min(self.fps, 30))
-            except Exception:
-                pass
+        self.stop_recording()
+        if self.policy is not None:
+            self.policy.close()
+        if self.history is not None:
+            self.history.close()
+
+    def _step(self, action):
+        out = self.env.step(action)
+        if self.history is not None:
+            self.history.observe(self.env, out[2] or out[3])
+        return out
+
+    def _finish_round(self, info):
+        """Book-keeping for a finished round; returns the outcome banner text."""
+        self.last_info = info
+        self._tally_outcome(info)
+        if not self.fast:
+            self._play_outcome_sound(info)
+        self.rounds_played += 1
+        msg = self.outcome_text(info)
+        if self.snapshot_every and self.rounds_played % self.snapshot_every == 0:
+            self.save_snapshot(msg)
+        if self.autoplay:
+            self.next_round_at = pygame.time.get_ticks() + self.auto_next_ms
+            # 0 means "not scheduled"; keep fast-mode rounds scheduled
+            self.next_round_at = max(1, self.next_round_at)
+        return msg
+
+    def save_snapshot(self, outcome_msg=None):
+        os.makedirs(self.snapshot_dir or 'logs', exist_ok=True)
+        self.invalidate()
+        self.draw_scene(outcome_msg)
+        path = os.path.join(self.snapshot_dir or 'logs', f'round_{self.rounds_played:07d}.png')
+        pygame.image.save(self.screen, path)
+        return path
+
+    def enable_fast(self, snapshot_every=0, snapshot_dir=None):
+        """Soak mode: no animations, sounds, delays or per-frame rendering."""
+        self.fast = True
+        self.autoplay_delay_ms = 0
+        self.auto_next_ms = 0
+        self.reveal_delay_ms = 0
+        self.snapshot_every = int(snapshot_every or 0)
+        self.snapshot_dir = snapshot_dir
+
+    def start_recording(self, out_path, fps=30, stride=1, scale=1.0, queue_size=64):
+        """Stream displayed frames to a GIF/MP4 (by extension) on a background encoder thread."""
+        from src.recorder import FrameRecorder
+        base, ext = os.path.splitext(out_path)
+        fmt = ext.lstrip('.').lower() if ext.lower() in ('.gif', '.mp4') else 'gif'
+        os.makedirs(os.path.dirname(base) or '.', exist_ok=True)
+        # Drop frames instead of stalling the UI when the encoder falls behind
+        self.recorder = FrameRecorder(base, fmt, fps=fps, stride=stride, background=True,
+                                      queue_size=queue_size, block=False)
+        self.record_scale = scale
+
+    def _grab_frame(self):
+        surf = self.screen
+        if self.record_scale != 1.0:
+            size = (max(1, int(self.W * self.record_scale)), max(1, int(self.H * self.record_scale)))
+            surf = pygame.transform.smoothscale(surf, size)
+        # array3d copies, so the encoder thread owns the frame
+        return pygame.surfarray.array3d(surf).transpose(1, 0, 2)
+
+    def record_frame(self):
+        if self.recorder is not None:
+            # Downscale/copy only frames the stride keeps
+            self.recorder.capture(self._grab_frame)
+
+    def stop_recording(self):
+        rec, self.recorder = self.recorder, None
+        if rec is None:
+            return None
+        try:
+            path = rec.close()
+        except Exception as e:
+            print('Recording failed:', e)
+            return None
+        if path:
+            print(f'Recorded {rec.kept} frame(s) to {path}' + (f' ({rec.dropped} dropped)' if rec.dropped else ''))
+        return path
+
+    def _replay_hand(self, hand):
+        """Replay one recorded hand; yields after each visible step (the last yield is the outcome text)."""
+        p, d = hand['p'], hand['d']
+        dur = 0.25 / self.replay_speed
+        self.fast = self.replay_speed >= 50
+        self.env.player, self.env.dealer = list(p[:2]), list(d[:2])
+        self.player_cards_vis, self.dealer_cards_vis = [], []
+        self.hole_revealed = False
+        self._confetti_done = False
+        self.confetti = []
+        self.last_decision = None
+        self.last_info = {'player_sum': hand_total(p[:2]), 'dealer_sum': hand_total(d[:1]),
+                          'bet': hand.get('bet', 0), 'bankroll': hand.get('bank', 0)}
+        self.invalidate()
+        self.animate_initial_deal(dur)
+        yield None
+        for act in hand['a']:
+            self.last_decision = {'H': 'HIT', 'S': 'STAND', 'D': 'DOUBLE'}.get(act, act)
+            n = len(self.player_cards_vis)
+            if act in 'HD' and n < len(p):
+                self.env.player = list(p[:n + 1])
+                self.animate_deal('player', p[n], dur)
+                self.last_info = dict(self.last_info, player_sum=hand_total(p[:n + 1]))
+            yield None
+        if hand['ps'] <= 21:
+            self.reveal_hole_flip(dur)
+            for j in range(2, len(d)):
+                self.env.dealer = list(d[:j + 1])
+                self.animate_deal('dealer', d[j], dur, face_up=True)
+        o = hand['o']
+        info = dict(self.last_info, player_sum=hand['ps'], dealer_sum=hand['ds'] if hand['ps'] <= 21 else hand_total(d[:1]),
+                    win=int(o == 'W'), lose=int(o == 'L'), draw=int(o == 'D'))
+        yield self._finish_round(info)
+
+    def run_replay(self, history, order, start=0):
+        """Play back hands `order` (hand numbers) of a HandHistory with pause/seek/speed keys."""
+        self.controls_text = "SPACE: Pause  Left/Right: -/+1  Down/Up: -/+100  Home/End  -/+: Speed  ESC: Quit"
+        self.outcome_tip = ""
+        pos = min(int(start), len(order) - 1)
+        steps, outcome_msg, next_at = None, None, 0
+        paused = finished = False
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    self.on_resize(event.w, event.h)
+                elif event.type == pygame.KEYDOWN:
+                    jump = {pygame.K_RIGHT: 1, pygame.K_LEFT: -1, pygame.K_UP: 100, pygame.K_DOWN: -100,
+                            pygame.K_PAGEUP: 100, pygame.K_PAGEDOWN: -100,
+                            pygame.K_HOME: -len(order), pygame.K_END: len(order)}.get(event.key)
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_SPACE:
+                        paused = not paused
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self.replay_speed = min(256.0, self.replay_speed * 2)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self.replay_speed = max(0.125, self.replay_speed / 2)
+                    elif jump is not None:
+                        pos = max(0, min(len(order) - 1, pos + jump))
+                        steps, outcome_msg, next_at = None, None, 0
+                        finished = False
+                    self._replay_caption(pos, order, paused, finished)
+            if not running:
+                break
+            now = pygame.time.get_ticks()
+            if not paused and not finished and now >= next_at:
+                if steps is None:
+                    steps = self._replay_hand(history[int(order[pos])])
+                    self._replay_caption(pos, order, paused, finished)
+                try:
+                    msg = next(steps)
+                    if msg:
+                        outcome_msg = msg
+                    delay = self.auto_next_ms if msg else self.autoplay_delay_ms
+                    next_at = pygame.time.get_ticks() + int(delay / self.replay_speed)
+                except StopIteration:
+                    if pos + 1 < len(order):
+                        pos += 1
+                        steps, outcome_msg = None, None
+                    else:
+                        finished = True
+                        self._replay_caption(pos, order, paused, finished)
+            if outcome_msg and self.last_info.get('win', 0) and not self.confetti and not self._confetti_done and not self.fast:
+                self.spawn_confetti()
+            if not self.render_frame(outcome_msg):
+                wait = self.idle_wait_ms if paused or finished else max(1, min(self.idle_wait_ms, next_at - now))
+                ev = pygame.event.wait(int(wait))
+                if ev.type != pygame.NOEVENT:
+                    pygame.event.post(ev)
+                continue
+            self.clock.tick(self.fps)
+        pygame.quit()
+        self.stop_recording()
+
+    def _replay_caption(self, pos, order, paused, finished=False):
+        state = " [end]" if finished else (" [paused]" if paused else "")
+        pygame.display.set_caption(f"Replay {pos + 1}/{len(order)} (hand #{int(order[pos])}) x{self.replay_speed:g}{state}")
+
+    def draw_scene(self, outcome_msg=None):
+        self.draw_table()
+        self.redraw_cards()
+        self.draw_hud(self.last_info)
+        # Bet UI overlay if needed
+        if self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet':
+            self.draw_bet_ui()
+        if outcome_msg:
+            self.draw_center_text(outcome_msg, (250, 230, 90))
+            tip = self.text(self.font, self.outcome_tip, (240,240,240))
+            self.screen.blit(tip, (self.W//2 - tip.get_width()//2, self.H//2 + 30))
+
+    def _regions(self, outcome_msg):
+        # (screen rect, state drawn inside it); a region is dirty when its state changes
+        info = self.last_info or {}
+        betting = self.enable_betting and getattr(self.env, 'phase', 'play') == 'bet'
+        obs = None
+        if self.obs is not None:
+            obs = tuple(np.round(np.asarray(self.obs, dtype=float).reshape(-1), 2).tolist())
+        row_h = self.card_h + 70
+        return {
+            'obs': (pygame.Rect(20, 20, 260, 140), obs),
+            'banner': (pygame.Rect(0, 55, self.W, 50), (self.pending_reveal, self.last_decision)),
+            'money': (pygame.Rect(self.W - 260, 20, 260, 60), (info.get('bankroll'), info.get('bet'))),
+            'dealer': (pygame.Rect(0, self.dealer_y - 60, self.W, row_h),
+                       (tuple(c['val'] for c in self.dealer_cards_vis), self.hole_revealed, info.get('dealer_sum'))),
+            'player': (pygame.Rect(0, self.player_y - 60, self.W, row_h),
+                       (tuple(c['val'] for c in self.player_cards_vis), info.get('player_sum'))),
+            'center': (pygame.Rect(0, self.H // 2 - 30, self.W, 90), outcome_msg),
+            'bottom': (pygame.Rect(0, self.H - 170, self.W, 170),
+                       (betting, self.session_wins, self.session_losses, self.session_draws)),
+        }
+
+    def render_frame(self, outcome_msg=None):
+        """Draw the scene once, clipped to the dirty regions, and push only those rects; False when nothing changed."""
+        regions = self._regions(outcome_msg)
+        full = self.screen.get_rect()
+        if self._scene is None:
+            dirty = [full]
+        else:
+            dirty = [r for name, (r, key) in regions.items() if self._scene.get(name) != key]
+        # Confetti animates over the whole table while it lasts, plus one frame to clear it
+        if self.confetti or self._confetti_live:
+            dirty = [full]
+        self._confetti_live = bool(self.confetti)
+        self._scene = {name: key for name, (r, key) in regions.items()}
+        if not dirty:
+            return False
+        self.screen.set_clip(dirty[0].unionall(dirty[1:]))
+        self.draw_scene(outcome_msg)
+        if self.confetti:
+            self.update_confetti()
+        self.screen.set_clip(None)
+        if dirty == [full]:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        self.record_frame()
+        return True
+
+    def _idle_wait(self, round_over):
+        # Sleep in the event queue until input arrives or the next scheduled autoplay/reveal step
+        now = pygame.time.get_ticks()
+        deadlines = []
+        if self.pending_reveal:
+            deadlines.append(self.reveal_at_ms)
+        if self.autoplay:
+            if round_over and self.next_round_at:
+                deadlines.append(self.next_round_at)
+            elif self.policy is None or self.obs is None or self.policy.ready(self.obs, self.autoplay_deterministic,
+                                                                               self.env.action_masks()):
+                deadlines.append(self.next_action_at)
+            # else: POLICY_READY (post_ready) wakes us once the pending prediction lands
+        timeout = min([self.idle_wait_ms] + [max(1, d - now) for d in deadlines])
+        ev = pygame.event.wait(int(timeout))
+        if ev.type != pygame.NOEVENT:
+            pygame.event.post(ev)
 
     def draw_center_text(self, text, color):
-        surf = self.bigfont.render(text, True, color)
+        surf = self.text(self.bigfont, text, color)
         self.screen.blit(surf, (self.W//2 - surf.get_width()//2, self.H//2 - surf.get_height()//2))
 
     @staticmethod
@@ -623,25 +898,30 @@ class BlackjackViewer:
     def enable_autoplay(self, model):
         self.autoplay = True
         self.model = model
-        self.next_action_at = pygame.time.get_ticks() + self.autoplay_delay_ms
         self.autoplay_deterministic = True
+        self.policy = PolicyWorker(model, on_ready=post_ready)
+        # Pay the first-call cost now rather than on the first dealt hand
+        try:
+            self.policy.warmup(self.env.observation_space.sample(), action_masks=self.env.action_masks())
+        except Exception as e:
+            print('Autoplay warm-up failed:', e)
+        self.next_action_at = pygame.time.get_ticks() + self.autoplay_delay_ms
+
+    def _prefetch_action(self):
+        if self.policy is not None and self.obs is not None:
+            self.policy.request(self.obs, self.autoplay_deterministic, self.env.action_masks())
 
     def _autoplay_action(self) -> Optional[int]:
-        if self.model is None or self.obs is None:
+        # Non-blocking: None until the worker has the action (fast mode waits; nothing to draw anyway)
+        if self.policy is None or self.obs is None:
             return None
         try:
-            import numpy as np
-            obs = self.obs
-            det = getattr(self, 'autoplay_deterministic', True)
-            a, _ = self.model.predict(obs, deterministic=det)
-            a = int(a) if not isinstance(a, (list, tuple)) else int(a[0])
-            # Clip bet-bin actions if needed
-            if getattr(self.env, 'phase', 'play') == 'bet':
-                bins = max(1, getattr(self.env, 'bet_bins', 1))
-                a = max(0, min(bins-1, a))
-            else:
-                a = max(0, min(2, a))
-            return a
+            # The env's action mask keeps the prediction to actions valid in this phase
+            a = self.policy.poll(self.obs, self.autoplay_deterministic, wait=self.fast,
+                                 action_masks=self.env.action_masks())
+            if a is None:
+                return None
+            return int(a) if not isinstance(a, (list, tuple)) else int(a[0])
         except Exception:
             return None
 
@@ -654,17 +934,121 @@ def parse_args():
     p.add_argument('--betting', action='store_true', help='Enable betting UI (experimental)')
     p.add_argument('--autoplay', action='store_true', help='Use a trained model to play automatically')
     p.add_argument('--stochastic', action='store_true', help='Sample actions (non-deterministic) in autoplay')
-    p.add_argument('--record', action='store_true', help='Record viewer frames to a GIF')
-    p.add_argument('--record_out', default=None, help='Output GIF path when recording is enabled')
+    p.add_argument('--record', action='store_true', help='Record viewer frames to a GIF/MP4 (streamed on a background thread)')
+    p.add_argument('--record_out', default=None, help='Output .gif/.mp4 path (default logs/viewer-<ts>.gif)')
+    p.add_argument('--record_fps', type=int, default=30, help='Playback fps of the recording')
+    p.add_argument('--record_stride', type=int, default=1, help='Keep every Nth displayed frame')
+    p.add_argument('--record_scale', type=float, default=1.0, help='Downscale factor for recorded frames (e.g. 0.5)')
     p.add_argument('--rounds', type=int, default=0, help='Autoplay this many rounds then exit (0=until quit)')
+    p.add_argument('--tables', type=int, default=1, help='Autoplay N tables at once in a grid (one batched policy call per tick)')
+    p.add_argument('--step_ms', type=int, default=150, help='Grid mode: ms between policy ticks')
+    p.add_argument('--history_out', default=None, help='Write a hand history (.jsonl + .idx) of the session for --replay')
+    p.add_argument('--replay', default=None, help='Replay a hand history instead of playing (no model/torch needed)')
+    p.add_argument('--filter', default=None, help='Replay filter, e.g. "outcome=L,player=12-16" (also dealer=, episode=)')
+    p.add_argument('--start', type=int, default=0, help='Replay: start at hand number N of the file')
+    p.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier (+/- keys change it live)')
+    p.add_argument('--headless', action='store_true', help='Run without a window or audio (SDL dummy drivers)')
+    p.add_argument('--fast', action='store_true', help='Autoplay soak: no animations, delays or per-frame rendering')
+    p.add_argument('--snapshot_every', type=int, default=0, help='With --fast, save every Kth finished round as a PNG (0=off)')
+    p.add_argument('--snapshot_dir', default=None, help='Snapshot directory (default logs/snapshots-<ts>)')
     p.add_argument('--algo', default='ppo', choices=['ppo','a2c'], help='Algo for autoplay model discovery')
     p.add_argument('--runs_dir', default='runs', help='Where trained runs are stored')
     p.add_argument('--model', default=None, help='Path to model.zip to use for autoplay')
+    p.add_argument('--profile', default='off', choices=['off', 'cprofile', 'sample'], help='Profile the whole viewer session')
+    p.add_argument('--profile_out', default=None, help='Profile output dir (default logs/profile-<ts>)')
     return p.parse_args()
 
 
+def load_autoplay_model(args):
+    # Load model (latest matching run if not provided)
+    from stable_baselines3 import PPO, A2C
+    Algo = PPO if args.algo == 'ppo' else A2C
+    model_path = args.model
+    if model_path is None:
+        # auto-discover latest via the run registry
+        from src.registry import find_latest_run
+        run_dir = find_latest_run(args.runs_dir, 'blackjack', args.algo, args.persona, args.seed)
+        if run_dir is None:
+            print('No trained runs found matching', f"blackjack-{args.algo}-{args.persona}-seed{args.seed}")
+            return None
+        model_path = os.path.join(run_dir, 'model.zip')
+    try:
+        from src.masking import maskable_ppo, trained_with_masks
+        if args.algo == 'ppo' and trained_with_masks(os.path.dirname(model_path)):
+            Algo = maskable_ppo()
+        return Algo.load(model_path, device='cpu')
+    except Exception as e:
+        print('Failed to load model for autoplay:', e)
+        return None
+
+
+def run_replay(args):
+    """--replay FILE: hands from a history file, filtered/seeked through its index."""
+    from src.hand_history import HandHistory, parse_filter
+    history = HandHistory(args.replay)
+    order = history.select(**parse_filter(args.filter))
+    print(f"Replay: {len(order)} of {len(history)} hands match")
+    if not len(order):
+        return
+    viewer = BlackjackViewer(ReplayTable(), fps=args.fps)
+    viewer.replay_speed = max(0.125, args.speed)
+    if args.record:
+        out = args.record_out or os.path.join('logs', f'replay-{int(time.time())}.gif')
+        viewer.start_recording(out, fps=args.record_fps, stride=args.record_stride, scale=args.record_scale)
+    try:
+        viewer.run_replay(history, order, start=np.searchsorted(order, args.start))
+    finally:
+        viewer.stop_recording()
+        history.close()
+    print(f"W/L/D: {viewer.session_wins}/{viewer.session_losses}/{viewer.session_draws} over {viewer.rounds_played} replayed hands")
+
+
+def open_history(args):
+    if not args.history_out:
+        return None
+    from src.hand_history import HandHistoryWriter
+    return HandHistoryWriter(args.history_out)
+
+
+def run_grid(args, cfg):
+    """--tables N: N tables with seeds seed..seed+N-1 played by one batched policy."""
+    from apps.blackjack_grid import GridViewer
+    from src.make_env import make_env
+    model = load_autoplay_model(args)
+    if model is None:
+        return
+    seeds = [args.seed + i for i in range(args.tables)]
+    envs = []
+    for s in seeds:
+        app_cfg = dict(cfg['app'], seed=s)
+        # All tables score with the first table's reward kernel
+        envs.append(make_env(app_cfg, cfg['persona'], kernel=envs[0].reward_kernel if envs else None))
+    grid = GridViewer(envs, model, seeds=seeds, fps=0 if args.fast else args.fps, step_ms=0 if args.fast else args.step_ms,
+                      pause_ms=0 if args.fast else 600, deterministic=not args.stochastic)
+    grid.rounds_to_play = int(args.rounds)
+    grid.history = open_history(args)
+    t0 = time.perf_counter()
+    try:
+        grid.run()
+    finally:
+        elapsed = time.perf_counter() - t0
+        print(grid.summary())
+        print(f"{grid.rounds_played / max(elapsed, 1e-9):.1f} rounds/s over {elapsed:.2f}s")
+
+
 def main():
     args = parse_args()
+    if args.fast and not args.autoplay:
+        raise SystemExit('--fast needs --autoplay (there is nobody to press keys)')
+    if args.tables > 1 and not args.autoplay:
+        raise SystemExit('--tables needs --autoplay')
+    if args.headless:
+        # Must be set before pygame.init() in the viewer
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    if args.replay:
+        return run_replay(args)
+    from src.make_env import make_env
     # Load configs and override for interactive play (1 round per episode simplifies outcomes)
     cfg = load_configs(app='blackjack', algo='ppo', persona=args.persona)
     cfg['app']['seed'] = args.seed
@@ -673,37 +1057,36 @@ def main():
         cfg['app']['rounds_per_episode'] = 1
         if not args.betting:
             cfg['app']['bet_bins'] = 0
+    if args.tables > 1:
+        return run_grid(args, cfg)
     # Build env
     env = make_env(cfg['app'], cfg['persona'])
     viewer = BlackjackViewer(env, fps=args.fps)
+    viewer.history = open_history(args)
     if args.autoplay:
-        # Load model (latest matching run if not provided)
-        from stable_baselines3 import PPO, A2C
-        Algo = PPO if args.algo == 'ppo' else A2C
-        model_path = args.model
-        if model_path is None:
-            # auto-discover latest
-            prefix = f"blackjack-{args.algo}-{args.persona}-seed{args.seed}"
-            candidates = [d for d in os.listdir(args.runs_dir) if d.startswith(prefix)]
-            if not candidates:
-                print('No trained runs found matching', prefix)
-                return
-            candidates.sort()
-            run_dir = os.path.join(args.runs_dir, candidates[-1])
-            model_path = os.path.join(run_dir, 'model.zip')
-        try:
-            model = Algo.load(model_path, device='cpu')
+        model = load_autoplay_model(args)
+        if model is not None:
             viewer.enable_autoplay(model)
             # set deterministic vs stochastic
             viewer.autoplay_deterministic = (not args.stochastic)
-        except Exception as e:
-            print('Failed to load model for autoplay:', e)
+        elif args.fast:
+            return
+    if args.fast:
+        viewer.enable_fast(args.snapshot_every,
+                           args.snapshot_dir or os.path.join('logs', f'snapshots-{int(time.time())}'))
+        if args.record:
+            print('[WARN] --record is ignored with --fast (use --snapshot_every for spot checks)')
+            args.record = False
     # Recording config
     if args.record:
-        viewer.recording_enabled = True
-        viewer.record_out = args.record_out
+        out = args.record_out or os.path.join('logs', f'viewer-{int(time.time())}.gif')
+        viewer.start_recording(out, fps=args.record_fps, stride=args.record_stride, scale=args.record_scale)
     if args.autoplay and args.rounds > 0:
         viewer.rounds_to_play = int(args.rounds)
+    from src.profiling import Profiler
+    prof = Profiler(args.profile, args.profile_out or os.path.join('logs', f'profile-{int(time.time())}'))
+    prof.start()
+    t0 = time.perf_counter()
     try:
         viewer.run()
     except Exception as e:
@@ -716,6 +1099,14 @@ def main():
         except Exception:
             pass
         raise
+    finally:
+        # Finalize the recording even if the viewer crashed
+        viewer.stop_recording()
+        prof.stop()
+        elapsed = time.perf_counter() - t0
+        rounds = viewer.rounds_played
+        print(f"Rounds: {rounds} in {elapsed:.2f}s ({rounds / max(elapsed, 1e-9):.1f} rounds/s) | "
+              f"W/L/D: {viewer.session_wins}/{viewer.session_losses}/{viewer.session_draws}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pygame
+from src.masking import masked_predict
+
+# Posted by PolicyWorker(on_ready=post_ready) when a prediction lands (wakes idle waits)
+POLICY_READY = pygame.USEREVENT + 1
+
+
+def post_ready():
+    pygame.event.post(pygame.event.Event(POLICY_READY))
+
+
+class PolicyWorker:
+    """
+    Runs model.predict on one background thread so the render loop never waits on the model.
+
+    request(obs) submits a prediction for an observation; repeated requests for the
+    same observation reuse the pending future, so the viewer can prefetch the
+    current state every frame for free. poll(obs) returns the action once it is
+    ready (None otherwise) and consumes it, so a stochastic policy samples again
+    the next time the same state comes up. Passing action_masks (the env's
+    action_masks(), stacked for a batch) restricts the prediction to valid
+    actions; the mask is part of the request key.
+    """
+
+    def __init__(self, model, on_ready=None):
+        self.model = model
+        self.on_ready = on_ready
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='policy')
+        self._key = None
+        self._future = None
+        self.requests = 0
+        self.misses = 0  # polls that found the action not ready yet
+
+    def _predict(self, obs, deterministic, action_masks=None):
+        if action_masks is not None:
+            a, _ = masked_predict(self.model, obs, action_masks, deterministic=deterministic)
+        else:
+            a, _ = self.model.predict(obs, deterministic=deterministic)
+        return a
+
+    def warmup(self, obs, n=3, action_masks=None):
+        """Run a few synchronous predictions (first torch calls allocate and pick kernels)."""
+        for _ in range(n):
+            self._predict(obs, True, action_masks)
+
+    @staticmethod
+    def _key_of(obs, deterministic, action_masks=None):
+        a = np.asarray(obs)
+        m = None if action_masks is None else np.asarray(action_masks, dtype=bool).tobytes()
+        return deterministic, a.dtype.str, a.shape, a.tobytes(), m
+
+    def request(self, obs, deterministic=True, action_masks=None):
+        key = self._key_of(obs, deterministic, action_masks)
+        if key == self._key:
+            return self._future
+        self._key = key
+        masks = None if action_masks is None else np.array(action_masks, dtype=bool)
+        self._future = self._pool.submit(self._predict, np.array(obs, copy=True), deterministic, masks)
+        if self.on_ready is not None:
+            self._future.add_done_callback(lambda _f: self.on_ready())
+        self.requests += 1
+        return self._future
+
+    def poll(self, obs, deterministic=True, wait=False, action_masks=None):
+        """Action for obs if ready (or wait=True), else None. Re-raises model errors."""
+        fut = self.request(obs, deterministic, action_masks)
+        if not wait and not fut.done():
+            self.misses += 1
+            return None
+        self._key = self._future = None
+        return fut.result()
+
+    def ready(self, obs, deterministic=True, action_masks=None):
+        return self._key == self._key_of(obs, deterministic, action_masks) and self._future.done()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
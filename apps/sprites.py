@@ -0,0 +1,114 @@
+import pygame
+from apps import assets
+from apps.assets import RANKS, SUITS
+
+
+SUIT_GLYPHS = {'spades': '♠', 'hearts': '♥', 'diamonds': '♦', 'clubs': '♣'}
+
+
+def card_rank(val):
+    return 'A' if val == 1 else ('K' if val == 13 else ('Q' if val == 12 else ('J' if val == 11 else str(val))))
+
+
+def card_suit(val):
+    # The env only tracks values; the suit is a stable cosmetic derived from the value
+    return SUITS[(val + 1) % 4]
+
+
+class SpriteAtlas:
+    """
+    Pre-scaled, display-converted sprites for one card size and window size.
+
+    Faces for all 52 cards, the card back, the table background and chips are
+    converted and scaled once in build() from the raw surfaces decoded by
+    apps.assets (procedural fallbacks are rendered once too), so drawing a
+    card or the table is a single blit. Call resize() on window resize; it
+    rebuilds only when the sizes actually change.
+    """
+
+    def __init__(self, card_size, table_size, chip_size=(70, 70), font=None, table_color=(32, 96, 64)):
+        self.card_size = None
+        self.table_size = None
+        self.chip_size = chip_size
+        self.font = font or pygame.font.SysFont("arial", 20)
+        self.table_color = table_color
+        self.faces = {}
+        self.back = None
+        self.table = None
+        self.chips = []
+        self._back_widths = {}
+        self.resize(card_size, table_size)
+
+    def resize(self, card_size, table_size, chip_size=None):
+        card_size, table_size = tuple(card_size), tuple(table_size)
+        chip_size = tuple(chip_size or self.chip_size)
+        if (card_size, table_size, chip_size) == (self.card_size, self.table_size, self.chip_size):
+            return False
+        self.card_size, self.table_size, self.chip_size = card_size, table_size, chip_size
+        self.build()
+        return True
+
+    def build(self):
+        w, h = self.card_size
+        self.faces = {}
+        for suit in SUITS:
+            for rank in RANKS:
+                src = assets.card_image(rank, suit)
+                if src is not None:
+                    self.faces[(rank, suit)] = pygame.transform.smoothscale(src.convert_alpha(), (w, h)).convert_alpha()
+                else:
+                    self.faces[(rank, suit)] = self._procedural_face(rank, suit)
+        back = assets.card_back_image()
+        if back is not None:
+            self.back = pygame.transform.smoothscale(back.convert_alpha(), (w, h)).convert_alpha()
+        else:
+            self.back = self._procedural_back(w)
+        self._back_widths = {w: self.back}
+        self.table = self._build_table()
+        self.chips = [pygame.transform.smoothscale(c.convert_alpha(), self.chip_size).convert_alpha() for c in assets.chip_images()]
+
+    def _procedural_face(self, rank, suit):
+        w, h = self.card_size
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        pygame.draw.rect(surf, (245, 245, 245), (0, 0, w, h), border_radius=8)
+        pygame.draw.rect(surf, (30, 30, 30), (0, 0, w, h), 2, border_radius=8)
+        col = (200, 40, 40) if suit in ('hearts', 'diamonds') else (20, 20, 20)
+        rtxt = self.font.render('A' if rank == 'A' else str(RANKS.index(rank) + 1), True, col)
+        stxt = self.font.render(SUIT_GLYPHS[suit], True, col)
+        surf.blit(rtxt, (8, 6))
+        surf.blit(stxt, (w - 24, h - 26))
+        return surf.convert_alpha()
+
+    def _procedural_back(self, w):
+        h = self.card_size[1]
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        pygame.draw.rect(surf, (120, 120, 120), (0, 0, w, h), border_radius=8)
+        pygame.draw.rect(surf, (30, 30, 30), (0, 0, w, h), 2, border_radius=8)
+        return surf.convert_alpha()
+
+    def _build_table(self):
+        W, H = self.table_size
+        src = assets.table_image()
+        if src is not None:
+            return pygame.transform.smoothscale(src.convert_alpha(), (W, H)).convert()
+        surf = pygame.Surface((W, H))
+        surf.fill(self.table_color)
+        pygame.draw.circle(surf, (28, 84, 56), (W // 2, H // 2), int(230 * H / 600), width=4)
+        return surf.convert()
+
+    def card(self, val, face_up=True):
+        if not face_up:
+            return self.back
+        return self.faces[(card_rank(val), card_suit(val))]
+
+    def back_width(self, width):
+        """Card back squeezed to `width` (flip animation); cached per width."""
+        width = max(1, int(width))
+        surf = self._back_widths.get(width)
+        if surf is None:
+            surf = pygame.transform.smoothscale(self.back, (width, self.card_size[1]))
+            self._back_widths[width] = surf
+        return surf
+
+    def chip(self, i):
+        return self.chips[i] if i < len(self.chips) else None
@@ -2,6 +2,30 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 import random
+from envs.masks import action_mask
+from envs.reward_kernel import RewardKernel
+from envs.instrumentation import counters_enabled, count_calls, time_calls, wrap_step
+
+# Reward components in vector order with their default weights. Each step records how
+# much of every component it earned (env.reward_components); the shaped reward is its dot
+# product with the compiled persona weights (envs/reward_kernel.py), so returns under
+# other weights can also be recomputed offline (src/relabel.py).
+REWARD_DEFAULTS = {
+    "step_cost": -0.001,
+    "approach_21_bonus": 0.02,
+    "safe_hit_bonus": 0.2,
+    "early_stand_penalty": -0.02,
+    "bust_penalty": -1.0,
+    "win_reward": 1.0,
+    "blackjack_bonus": 0.5,
+    "lose_penalty": -1.0,
+    "draw_bonus": 0.0,
+    "success": 1.0,
+    "speed_bonus": 0.0,
+}
+REWARD_COMPONENTS = tuple(REWARD_DEFAULTS)
+(RC_STEP_COST, RC_APPROACH_21, RC_SAFE_HIT, RC_EARLY_STAND, RC_BUST, RC_WIN, RC_BLACKJACK,
+ RC_LOSE, RC_DRAW, RC_SUCCESS, RC_SPEED) = range(len(REWARD_COMPONENTS))
 
 
 class BlackjackEnv(gym.Env):
@@ -11,6 +35,9 @@ class BlackjackEnv(gym.Env):
     Actions (single Discrete space interpreted by phase):
       - Bet phase (if enabled via bet_bins>0): actions 0..(bet_bins-1) select bet bin
       - Play phase: 0=hit, 1=stand, 2=double (if allowed/first decision)
+      action_masks() (also info["action_mask"]) masks actions that would be
+      no-ops in the current phase, and bet actions past bet_bins (which the
+      env clamps to the top bin); info["invalid_action"] flags a masked action taken.
 
     Observation (vector of 8 floats in [0,1]):
       [player_sum_norm, dealer_upcard_norm, usable_ace,
@@ -20,6 +47,9 @@ class BlackjackEnv(gym.Env):
       step_cost (-0.001), bust_penalty (-1.0), win_reward (1.0), lose_penalty (-1.0),
       draw_bonus (0.0), blackjack_bonus (0.5), success (1.0 on reaching bankroll_target),
       speed_bonus (0.0) scaled by remaining steps on success.
+      The unweighted per-step amounts are kept in `reward_components` (order:
+      REWARD_COMPONENTS) and, with reward_components=True, returned as
+      info["reward_components"] (float32).
 
     Notes:
       - Card values: 2..10 as face value; J/Q/K as 10; Ace as 1 or 11 (usable-ace logic).
@@ -28,12 +58,16 @@ class BlackjackEnv(gym.Env):
     """
 
     metadata = {"render_modes": []}
+    # Reward vector layout, reachable through env.unwrapped (src/trajectories.py, src/relabel.py)
+    REWARD_COMPONENTS = REWARD_COMPONENTS
+    REWARD_DEFAULTS = REWARD_DEFAULTS
 
     def __init__(self,
                  max_steps=100,
                  seed=7,
                  reward_weights=None,
                  reward_scale=1.0,
+                 reward_kernel=None,
                  # Advanced options
                  num_decks=1,
                  penetration=0.75,
@@ -46,9 +80,12 @@ class BlackjackEnv(gym.Env):
                  payout_blackjack=1.5,
                  dealer_hits_soft17=False,
                  allow_double=True,
-                 bet_scaled_reward=False):
+                 bet_scaled_reward=False,
+                 reward_components=False,
+                 instrument_counters=None):
         super().__init__()
-        self.rw = reward_weights or {}
+        # A shared kernel (one persona across many envs) takes precedence over reward_weights
+        self.reward_kernel = reward_kernel or RewardKernel(REWARD_COMPONENTS, REWARD_DEFAULTS, reward_weights)
         self.reward_scale = reward_scale
         self.max_steps = int(max_steps)
         self._rng = random.Random(seed)
@@ -67,11 +104,17 @@ class BlackjackEnv(gym.Env):
         self.dealer_hits_soft17 = bool(dealer_hits_soft17)
         self.allow_double = bool(allow_double)
         self.bet_scaled_reward = bool(bet_scaled_reward)
+        # Outcome components scale with bet / max_bet only in betting mode with bet_scaled_reward
+        self._outcome_bet_scaled = self.bet_scaled_reward and self.bet_bins > 0 and self.max_bet > 0
+        self.emit_reward_components = bool(reward_components)
 
         # Action/Observation spaces
         self.n_actions = max(3, self.bet_bins)  # ensure space covers play phase (hit/stand/double)
         self.action_space = spaces.Discrete(self.n_actions)
         self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(8,), dtype=np.float32)
+        self._mask_bet = action_mask(self.n_actions, range(self.bet_bins))
+        self._mask_play = action_mask(self.n_actions, (0, 1))
+        self._mask_play_double = action_mask(self.n_actions, (0, 1, 2))
 
         # State
         self.player = []
@@ -87,9 +130,41 @@ class BlackjackEnv(gym.Env):
         self.bet = 0.0
         self.first_decision = True
         self.doubled = False
+        # Hand history: actions of the current round and the last resolved hand (see src/hand_history.py)
+        self.round_actions = []
+        self.last_hand = None
+        self.hands_played = 0
+        self.reward_components = [0.0] * len(REWARD_COMPONENTS)
         # Shoe (optional)
         self._shoe = []
         self._shoe_used = 0
+        # Hot-path counters (opt-in; see envs/instrumentation.py)
+        self.counters = {}
+        if counters_enabled(instrument_counters):
+            self._instrument()
+
+    def set_reward_weights(self, weights):
+        """Swap persona weights at runtime (affects every env sharing this env's reward kernel)."""
+        self.reward_kernel.set_weights(weights)
+
+    def _instrument(self):
+        # Swap instrumented methods onto this instance; uninstrumented envs keep the plain methods
+        c = self.counters
+        count_calls(self, "_draw_card", "cards_drawn")
+        count_calls(self, "_build_shoe", "shoe_rebuilds")
+        dealer_play = self._dealer_play
+
+        def counted_dealer_play():
+            n = len(self.dealer)
+            dealer_play()
+            drawn = len(self.dealer) - n
+            c["dealer_draws"] = c.get("dealer_draws", 0) + drawn
+            c["dealer_loop_iters"] = c.get("dealer_loop_iters", 0) + drawn + 1
+        self._dealer_play = counted_dealer_play
+        time_calls(self, "_obs", "obs_sec")
+        time_calls(self, "_info", "info_sec")
+        time_calls(self, "_resolve_outcome", "resolve_outcome_sec")
+        wrap_step(self)
 
     # --- Card mechanics ---
     def _build_shoe(self):
@@ -127,6 +202,14 @@ class BlackjackEnv(gym.Env):
         return s
 
     # --- Env API ---
+    def action_masks(self):
+        """Bool mask over the action space of the actions that do something in the current phase."""
+        if self.phase == "bet" and self.bet_bins > 0:
+            return self._mask_bet
+        if self.allow_double and self.first_decision and self.bet_bins > 0:
+            return self._mask_play_double
+        return self._mask_play
+
     def _obs(self):
         p_sum = self._hand_sum(self.player)
         d_up = self.dealer[0] if self.dealer else 0
@@ -160,7 +243,7 @@ class BlackjackEnv(gym.Env):
         self.bankroll = self.bankroll_start
         self._build_shoe() if (self.num_decks > 1 or self.penetration < 0.999) else None
         self._start_round()
-        return self._obs(), {}
+        return self._obs(), {"action_mask": self.action_masks()}
 
     def _start_round(self):
         # Start a fresh round; in betting mode, delay dealing until after bet is chosen
@@ -172,6 +255,7 @@ class BlackjackEnv(gym.Env):
         self.phase = "play" if self.bet_bins == 0 else "bet"
         self.first_decision = True
         self.doubled = False
+        self.round_actions = []
         self.bet = 0.0 if self.bet_bins == 0 else self._default_bet()
         if self.bet_bins == 0:
             self._deal_initial()
@@ -191,12 +275,17 @@ class BlackjackEnv(gym.Env):
     def step(self, action: int):
         assert self.action_space.contains(action)
         if self.done or self.steps >= self.max_steps:
+            self.reward_components = [0.0] * len(REWARD_COMPONENTS)
             info = self._info(finalize=False)
             return self._obs(), 0.0, True, False, info
 
+        invalid = not self.action_masks()[action]
         self.steps += 1
+        rc = self.reward_components = [0.0] * len(REWARD_COMPONENTS)
+        w = self.reward_kernel.weights
         shaped = 0.0
-        shaped += self.rw.get("step_cost", -0.001)
+        shaped += w[RC_STEP_COST]
+        rc[RC_STEP_COST] += 1.0
 
         terminated = False
         truncated = False
@@ -218,6 +307,7 @@ class BlackjackEnv(gym.Env):
             # Play phase actions: 0=hit, 1=stand, 2=double (if allowed & first decision)
             if action == 0:
                 # hit
+                self.round_actions.append("H")
                 prev_sum = self._hand_sum(self.player)
                 self.player.append(self._draw_card())
                 self.first_decision = False
@@ -228,16 +318,19 @@ class BlackjackEnv(gym.Env):
                     prev_gap = max(0, 21 - prev_sum)
                     new_gap = max(0, 21 - new_sum)
                     improvement = max(0.0, prev_gap - new_gap)
-                    shaped += self.rw.get("approach_21_bonus", 0.02) * (improvement / 10.0)
+                    shaped += w[RC_APPROACH_21] * (improvement / 10.0)
+                    rc[RC_APPROACH_21] += improvement / 10.0
                 # Shaping: safe first hit on low totals (<=11) strongly encouraged
                 if prev_sum <= 11 and self.steps <= 2:  # early in round
-                    shaped += self.rw.get("safe_hit_bonus", 0.2)
+                    shaped += w[RC_SAFE_HIT]
+                    rc[RC_SAFE_HIT] += 1.0
                 if self._hand_sum(self.player) > 21:
                     self.player_bust = 1
                     shaped += self._resolve_outcome()
                     terminated = self._advance_or_end()
             elif action == 2 and self.allow_double and self.first_decision and (self.bet_bins > 0):
                 # double: double bet, take exactly one card, then stand
+                self.round_actions.append("D")
                 add = min(self.bet, self.bankroll - self.bet) if self.bankroll > 0 else self.bet
                 self.bet += max(0.0, add)
                 self.player.append(self._draw_card())
@@ -250,10 +343,12 @@ class BlackjackEnv(gym.Env):
             elif action == 1:
                 # stand -> resolve dealer
                 action_stand = 1
+                self.round_actions.append("S")
                 # Shaping: discourage very early stands (e.g., below 17)
                 p_sum = self._hand_sum(self.player)
                 if p_sum < 17:
-                    shaped += self.rw.get("early_stand_penalty", -0.02) * ((17 - p_sum) / 17.0)
+                    shaped += w[RC_EARLY_STAND] * ((17 - p_sum) / 17.0)
+                    rc[RC_EARLY_STAND] += (17 - p_sum) / 17.0
                 shaped += self._resolve_outcome()
                 terminated = self._advance_or_end()
             else:
@@ -273,7 +368,10 @@ class BlackjackEnv(gym.Env):
             "action_hit": action_hit,
             "action_stand": action_stand,
             "action_double": action_double,
+            "invalid_action": int(invalid),
         })
+        if self.emit_reward_components:
+            info["reward_components"] = np.asarray(rc, dtype=np.float32)
         return obs, reward, terminated, truncated, info
 
     def _dealer_play(self):
@@ -293,6 +391,8 @@ class BlackjackEnv(gym.Env):
     def _resolve_outcome(self):
         # Resolve dealer, compute shaped reward and bankroll change; return shaped reward
         shaped = 0.0
+        rc = self.reward_components
+        w = self.reward_kernel.weights
         if self._hand_sum(self.player) > 21:
             self.player_bust = 1
         else:
@@ -301,10 +401,11 @@ class BlackjackEnv(gym.Env):
         p = self._hand_sum(self.player)
         d = self._hand_sum(self.dealer)
 
-        bet_scale = (self.bet / self.max_bet) if (self.bet_bins > 0 and self.max_bet > 0) else 1.0
+        outcome_scale = self.bet / self.max_bet if self._outcome_bet_scaled else 1.0
 
         if self.player_bust:
-            shaped += self.rw.get("bust_penalty", -1.0) * (bet_scale if self.bet_scaled_reward else 1.0)
+            shaped += w[RC_BUST] * outcome_scale
+            rc[RC_BUST] += outcome_scale
             pnl = -self.bet
         elif self.dealer_bust or p > d:
             # Win
@@ -316,26 +417,38 @@ class BlackjackEnv(gym.Env):
                 pnl = win_amt
             else:
                 pnl = 0.0
-            shaped += self.rw.get("win_reward", 1.0) * (bet_scale if self.bet_scaled_reward else 1.0)
+            shaped += w[RC_WIN] * outcome_scale
+            rc[RC_WIN] += outcome_scale
             if self.natural:
-                shaped += self.rw.get("blackjack_bonus", 0.5) * (bet_scale if self.bet_scaled_reward else 1.0)
+                shaped += w[RC_BLACKJACK] * outcome_scale
+                rc[RC_BLACKJACK] += outcome_scale
         elif p < d:
             pnl = -self.bet if self.bet_bins > 0 else 0.0
-            shaped += self.rw.get("lose_penalty", -1.0) * (bet_scale if self.bet_scaled_reward else 1.0)
+            shaped += w[RC_LOSE] * outcome_scale
+            rc[RC_LOSE] += outcome_scale
         else:
             # draw (push)
             pnl = 0.0
-            shaped += self.rw.get("draw_bonus", 0.0) * (bet_scale if self.bet_scaled_reward else 1.0)
+            shaped += w[RC_DRAW] * outcome_scale
+            rc[RC_DRAW] += outcome_scale
 
         # Bankroll update
         if self.bet_bins > 0:
             self.bankroll += pnl
             # success on target reached
             if self.bankroll_target > 0 and self.bankroll >= self.bankroll_target:
-                shaped += self.rw.get("success", 1.0)
-                shaped += self.rw.get("speed_bonus", 0.0) * (self.max_steps - self.steps) / self.max_steps
+                shaped += w[RC_SUCCESS]
+                shaped += w[RC_SPEED] * (self.max_steps - self.steps) / self.max_steps
+                rc[RC_SUCCESS] += 1.0
+                rc[RC_SPEED] += (self.max_steps - self.steps) / self.max_steps
                 self.done = True
 
+        self.hands_played += 1
+        self.last_hand = {
+            "p": list(self.player), "d": list(self.dealer), "a": "".join(self.round_actions),
+            "o": "L" if self.player_bust else ("W" if self.dealer_bust or p > d else ("L" if p < d else "D")),
+            "ps": p, "ds": d, "bet": float(self.bet), "pnl": float(pnl) + 0.0, "bank": float(self.bankroll),
+        }
         return shaped
 
     def _advance_or_end(self):
@@ -376,6 +489,7 @@ class BlackjackEnv(gym.Env):
             "bet": float(self.bet),
             "round_idx": int(self.round_idx),
             "phase": self.phase,
+            "action_mask": self.action_masks(),
         }
 
     def render(self):
@@ -3,6 +3,27 @@ from gymnasium import spaces
 import numpy as np
 import random
 from collections import defaultdict
+from envs.masks import action_mask
+from envs.reward_kernel import RewardKernel
+from envs.instrumentation import counters_enabled, wrap_step
+
+# Reward components in vector order with their default weights; the shaped reward is the
+# dot product of env.reward_components with the compiled persona weights
+# (envs/reward_kernel.py; offline: src/relabel.py)
+REWARD_DEFAULTS = {
+    "step_cost": -0.001,
+    "latency_penalty": -0.01,
+    "validation_error_bonus": 0.05,
+    "page_progress": 0.01,
+    "dom_coverage_bonus": 0.02,
+    "success": 1.0,
+    "speed_bonus": 0.05,
+    "page_coverage_bonus": 0.03,
+    "softlock_penalty": -0.05,
+}
+REWARD_COMPONENTS = tuple(REWARD_DEFAULTS)
+(RC_STEP_COST, RC_LATENCY, RC_VALIDATION_ERROR, RC_PAGE_PROGRESS, RC_DOM_COVERAGE, RC_SUCCESS,
+ RC_SPEED, RC_PAGE_COVERAGE, RC_SOFTLOCK) = range(len(REWARD_COMPONENTS))
 
 class FormFlowEnv(gym.Env):
     """
@@ -15,12 +36,16 @@ class FormFlowEnv(gym.Env):
     Actions:
       0: next_page, 1: prev_page, 2: type_input, 3: clear_input, 4: toggle_checkbox,
       5: click_random_selector, 6: submit_page
+      action_masks() (also info["action_mask"]) masks the page moves that are
+      no-ops: prev_page on landing, next_page on submit and submit_page on
+      any other page; info["invalid_action"] flags a masked action taken.
     Observation (vector):
       [page_id (onehot 5), field_filled(0/1), field_valid(0/1), checkbox(0/1),
        errors_on_page(0..3), latency_bucket(0..3), steps_left_norm(0..1)]
     Info metrics:
       steps, distinct_pages, distinct_selectors, validation_errors,
-      softlock (flag if looped too long), latency_spike (flag)
+      softlock (flag if looped too long), latency_spike (flag),
+      reward_components (float32, order REWARD_COMPONENTS; with reward_components=True)
     """
     metadata = {"render_modes": []}
 
@@ -28,26 +53,42 @@ class FormFlowEnv(gym.Env):
     PAGE_TO_ID = {p:i for i,p in enumerate(PAGES)}
     NUM_PAGES = len(PAGES)
     ACTIONS = 7
+    # Reward vector layout, reachable through env.unwrapped (src/trajectories.py, src/relabel.py)
+    REWARD_COMPONENTS = REWARD_COMPONENTS
+    REWARD_DEFAULTS = REWARD_DEFAULTS
 
     def __init__(self,
                  max_steps=150,
                  seed=7,
                  reward_weights=None,
                  reward_scale=1.0,
+                 reward_kernel=None,
                  invalid_prob=0.2,
-                 latency_spike_prob=0.05):
+                 latency_spike_prob=0.05,
+                 reward_components=False,
+                 instrument_counters=None):
         super().__init__()
-        self.rw = reward_weights or {}
+        self.reward_kernel = reward_kernel or RewardKernel(REWARD_COMPONENTS, REWARD_DEFAULTS, reward_weights)
         self.reward_scale = reward_scale
         self.max_steps = max_steps
         self._rng = random.Random(seed)
         self.np_rng = np.random.default_rng(seed)
         self.invalid_prob = invalid_prob
         self.latency_spike_prob = latency_spike_prob
+        self.emit_reward_components = bool(reward_components)
+        self.reward_components = [0.0] * len(REWARD_COMPONENTS)
 
         # observation: onehot(5) + 6 scalars = 11
         self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(11,), dtype=np.float32)
         self.action_space = spaces.Discrete(self.ACTIONS)
+        # Valid actions per page: submit only on the last page, which has no next; no prev on landing
+        last = self.NUM_PAGES - 1
+        self._page_masks = []
+        for page in range(self.NUM_PAGES):
+            noop = {0} if page == last else {6}
+            if page == 0:
+                noop.add(1)
+            self._page_masks.append(action_mask(self.ACTIONS, set(range(self.ACTIONS)) - noop))
 
         # State
         self.page = 0               # landing
@@ -67,6 +108,39 @@ class FormFlowEnv(gym.Env):
         self.softlock = 0
         self._loop_detector = defaultdict(int)
 
+        # Hot-path counters (opt-in; see envs/instrumentation.py)
+        self.counters = {}
+        if counters_enabled(instrument_counters):
+            self._instrument()
+
+    def set_reward_weights(self, weights):
+        """Swap persona weights at runtime (affects every env sharing this env's reward kernel)."""
+        self.reward_kernel.set_weights(weights)
+
+    def _instrument(self):
+        # Counters are derived from state around step(), so the plain step body stays untouched
+        c = self.counters
+
+        def pre(action):
+            return (self.done, self.page, self.validation_errors)
+
+        def post(action, state):
+            was_done, page, errors = state
+            if was_done:
+                return
+            if action == 0 and self.page == page and self.PAGES[page] in ("signup", "profile") and self.validation_errors > errors:
+                c["gate_rejections"] = c.get("gate_rejections", 0) + 1
+            sig = (self.page, self.field_filled, self.field_valid, self.checkbox)
+            if self._loop_detector.get(sig, 0) > 20:
+                c["loop_detector_hits"] = c.get("loop_detector_hits", 0) + 1
+            if self.latency_bucket >= 2:
+                c["latency_spikes"] = c.get("latency_spikes", 0) + 1
+        wrap_step(self, pre=pre, post=post)
+
+    def action_masks(self):
+        """Bool mask over the actions that can change the form state on the current page."""
+        return self._page_masks[self.page]
+
     def _obs(self):
         onehot = np.zeros(self.NUM_PAGES, dtype=np.float32)
         onehot[self.page] = 1.0
@@ -99,18 +173,23 @@ class FormFlowEnv(gym.Env):
         self.softlock = 0
         self._loop_detector.clear()
 
-        return self._obs(), {}
+        return self._obs(), {"action_mask": self.action_masks()}
 
     def step(self, action: int):
         assert self.action_space.contains(action)
         if self.done:
-            return self._obs(), 0.0, True, False, {}
+            self.reward_components = [0.0] * len(REWARD_COMPONENTS)
+            return self._obs(), 0.0, True, False, {"action_mask": self.action_masks()}
 
+        invalid = not self._page_masks[self.page][action]
         self.steps += 1
+        rc = self.reward_components = [0.0] * len(REWARD_COMPONENTS)
+        w = self.reward_kernel.weights
         shaped = 0.0
 
         # base step cost to discourage dithering
-        shaped += self.rw.get("step_cost", -0.001)
+        shaped += w[RC_STEP_COST]
+        rc[RC_STEP_COST] += 1.0
 
         # emulate page-specific validation & latency
         self.errors_on_page = 0
@@ -121,7 +200,8 @@ class FormFlowEnv(gym.Env):
             self.latency_bucket = self._rng.choice([1, 2, 3])
             if self.latency_bucket >= 2:
                 self.latency_spike = 1
-                shaped += self.rw.get("latency_penalty", -0.01) * self.latency_bucket
+                shaped += w[RC_LATENCY] * self.latency_bucket
+                rc[RC_LATENCY] += self.latency_bucket
 
         # Actions
         action_type_input = 0
@@ -135,10 +215,12 @@ class FormFlowEnv(gym.Env):
                         can_advance = False
                         self.errors_on_page += 1
                         self.validation_errors += 1
-                        shaped += self.rw.get("validation_error_bonus", 0.05)  # issue detection reward
+                        shaped += w[RC_VALIDATION_ERROR]  # issue detection reward
+                        rc[RC_VALIDATION_ERROR] += 1.0
                 if can_advance:
                     self.page += 1
-                    shaped += self.rw.get("page_progress", 0.01)
+                    shaped += w[RC_PAGE_PROGRESS]
+                    rc[RC_PAGE_PROGRESS] += 1.0
         elif action == 1:  # prev_page
             if self.page > 0:
                 self.page -= 1
@@ -150,7 +232,8 @@ class FormFlowEnv(gym.Env):
                 self.field_valid = 0
                 self.errors_on_page += 1
                 self.validation_errors += 1
-                shaped += self.rw.get("validation_error_bonus", 0.05)
+                shaped += w[RC_VALIDATION_ERROR]
+                rc[RC_VALIDATION_ERROR] += 1.0
             else:
                 self.field_valid = 1
         elif action == 3:  # clear_input
@@ -163,26 +246,31 @@ class FormFlowEnv(gym.Env):
             action_click_selector = 1
             if sel not in self.clicked_selectors:
                 self.clicked_selectors.add(sel)
-                shaped += self.rw.get("dom_coverage_bonus", 0.02)
+                shaped += w[RC_DOM_COVERAGE]
+                rc[RC_DOM_COVERAGE] += 1.0
         elif action == 6:  # submit_page
             # only meaningful on final page
             if self.page == self.PAGE_TO_ID["submit"]:
                 self.done = True
-                shaped += self.rw.get("success", 1.0)
-                shaped += self.rw.get("speed_bonus", 0.05) * (self.max_steps - self.steps) / self.max_steps
+                shaped += w[RC_SUCCESS]
+                shaped += w[RC_SPEED] * (self.max_steps - self.steps) / self.max_steps
+                rc[RC_SUCCESS] += 1.0
+                rc[RC_SPEED] += (self.max_steps - self.steps) / self.max_steps
 
         # coverage reward for first time visiting a page
         prev_len = len(self.visited_pages)
         self.visited_pages.add(self.page)
         if len(self.visited_pages) > prev_len:
-            shaped += self.rw.get("page_coverage_bonus", 0.03)
+            shaped += w[RC_PAGE_COVERAGE]
+            rc[RC_PAGE_COVERAGE] += 1.0
 
         # softlock detection: repeating the same (page, field, check) too long
         sig = (self.page, self.field_filled, self.field_valid, self.checkbox)
         self._loop_detector[sig] += 1
         if self._loop_detector[sig] > 20:
             self.softlock = 1
-            shaped += self.rw.get("softlock_penalty", -0.05)
+            shaped += w[RC_SOFTLOCK]
+            rc[RC_SOFTLOCK] += 1.0
 
         # time limit
         truncated = False
@@ -203,7 +291,11 @@ class FormFlowEnv(gym.Env):
             "page_id": int(self.page),
             "action_type_input": action_type_input,
             "action_click_selector": action_click_selector,
+            "invalid_action": int(invalid),
+            "action_mask": self.action_masks(),
         }
+        if self.emit_reward_components:
+            info["reward_components"] = np.asarray(rc, dtype=np.float32)
         terminated = self.done
         return obs, reward, terminated, truncated, info
 
@@ -0,0 +1,69 @@
+"""
+Opt-in hot-path counters for the environments.
+
+Enabled per env (instrument_counters=True / app config key `instrument_counters`)
+or globally with DRL_ENV_COUNTERS=1; either one turns counters on, so a config
+value of false does not override the env var. When enabled, the env swaps instrumented
+wrappers onto the instance at construction time; when disabled nothing is
+wrapped, so the normal code path pays nothing. Lifetime totals live in
+env.counters; step() adds per-step deltas to info as `ctr_<name>`.
+"""
+
+import os
+import time
+
+ENV_VAR = "DRL_ENV_COUNTERS"
+
+
+def counters_enabled(flag=None):
+    return bool(flag) or os.environ.get(ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def count_calls(env, method, key):
+    orig = getattr(env, method)
+    c = env.counters
+
+    def wrapper(*args, **kwargs):
+        c[key] = c.get(key, 0) + 1
+        return orig(*args, **kwargs)
+    setattr(env, method, wrapper)
+
+
+def time_calls(env, method, key):
+    orig = getattr(env, method)
+    c = env.counters
+    now = time.perf_counter
+
+    def wrapper(*args, **kwargs):
+        t0 = now()
+        try:
+            return orig(*args, **kwargs)
+        finally:
+            c[key] = c.get(key, 0.0) + (now() - t0)
+    setattr(env, method, wrapper)
+
+
+def wrap_step(env, pre=None, post=None):
+    """Wrap env.step to export per-step counter deltas into info (pre/post hooks may bump counters)."""
+    orig = env.step
+    c = env.counters
+
+    def step(action):
+        before = dict(c)
+        state = pre(action) if pre is not None else None
+        out = orig(action)
+        if post is not None:
+            post(action, state)
+        info = out[4]
+        for k, v in c.items():
+            info["ctr_" + k] = v - before.get(k, 0)
+        return out
+    setattr(env, "step", step)
+
+
+def sum_counters(dicts):
+    total = {}
+    for d in dicts:
+        for k, v in (d or {}).items():
+            total[k] = total.get(k, 0) + v
+    return total
@@ -0,0 +1,11 @@
+"""Valid-action masks shared by the envs' action_masks() (see src/masking.py for the policy side)."""
+
+import numpy as np
+
+
+def action_mask(n, valid):
+    """Bool mask of length n with `valid` set; read-only so one array can be reused for every step."""
+    m = np.zeros(n, dtype=bool)
+    m[list(valid)] = True
+    m.flags.writeable = False
+    return m
@@ -0,0 +1,44 @@
+"""
+Persona reward weights compiled into a fixed weight vector.
+
+An env lists its reward terms once (REWARD_COMPONENTS, with default weights in
+REWARD_DEFAULTS) and fills a per-step component vector in that order. A
+RewardKernel resolves a persona weights dict against those names a single time,
+so the step loop reads weights by index (w[RC_WIN]) with no dict lookups or
+defaults. The env adds weight * amount as it sets each component, which is the
+dot product of the weights with the step's component vector restricted to the
+terms that fired (a dense dot over every term costs more per step in CPython
+than the two or three terms a step touches).
+
+Envs built for one persona can share a kernel (make_env(..., kernel=...), the
+viewer's grid). set_weights() swaps the weights in place, so every env holding
+the kernel scores its next step with them without being rebuilt.
+"""
+
+from operator import mul
+import numpy as np
+
+
+class RewardKernel:
+    """Weight vector over `components`; keys missing from a weights dict take `defaults`."""
+
+    def __init__(self, components, defaults, weights=None):
+        self.components = tuple(components)
+        self.defaults = dict(defaults)
+        self.weights = ()
+        self.set_weights(weights)
+
+    def set_weights(self, weights=None):
+        """Recompile from a persona weights dict (keys of other envs are ignored)."""
+        weights = weights or {}
+        self.weights = tuple(float(weights.get(k, self.defaults[k])) for k in self.components)
+
+    def as_dict(self):
+        return dict(zip(self.components, self.weights))
+
+    def as_array(self):
+        return np.array(self.weights, dtype=np.float64)
+
+    def __call__(self, components):
+        """Shaped reward (before reward_scale) of a full component vector."""
+        return sum(map(mul, self.weights, components))
@@ -1,9 +1,16 @@
-import argparse, os, pandas as pd
+import argparse, os, numpy as np, pandas as pd
 import matplotlib.pyplot as plt
+from src.curves import window_bands
 
-def plot_learning(csv_path, out_png):
-    df = pd.read_csv(csv_path)
-    ax = df['return'].plot(title='Episode Returns')
+# Run from the repo root: python -m notebooks.plots --csv runs/<run>/episodes.csv --out curve.png
+
+def plot_learning(csv_path, out_png, windows=1024):
+    y = pd.read_csv(csv_path, usecols=['return'])['return'].to_numpy(dtype=float)
+    x, mean, lo, hi = window_bands(y, windows)
+    fig, ax = plt.subplots()
+    ax.fill_between(x, lo, hi, alpha=0.15, linewidth=0)
+    ax.plot(x, mean, linewidth=1.4)
+    ax.set_title('Episode Returns')
     ax.set_xlabel('Episode')
     ax.set_ylabel('Return')
     plt.tight_layout()
@@ -22,8 +29,9 @@ if __name__=="__main__":
     ap.add_argument("--csv", required=True)
     ap.add_argument("--out", required=True)
     ap.add_argument("--metric", default=None)
+    ap.add_argument("--windows", type=int, default=1024, help="Windows for the return curve's mean/min/max bands")
     args = ap.parse_args()
     if args.metric:
         plot_metric_hist(args.csv, args.metric, args.out)
     else:
-        plot_learning(args.csv, args.out)
+        plot_learning(args.csv, args.out, args.windows)
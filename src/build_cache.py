@@ -0,0 +1,111 @@
+"""
+Per-run content-hash build cache for derived report artifacts.
+
+Each run dir gets a .build_cache.json that records, for every derived
+artifact (plots, HTML cards), the SHA-256 of each input it was built from.
+An artifact is rebuilt only when an input's content hash changes. Input
+hashes are memoized against (size, mtime_ns) so a no-op rebuild only stats
+files and never re-reads them.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+CACHE_FILE = '.build_cache.json'
+
+
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class BuildCache:
+    def __init__(self, run_dir):
+        self.run_dir = Path(run_dir)
+        self.path = self.run_dir / CACHE_FILE
+        self.inputs = {}
+        self.artifacts = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.inputs = data.get('inputs', {})
+            self.artifacts = data.get('artifacts', {})
+        except (OSError, ValueError):
+            pass
+
+    def _rel(self, path):
+        p = Path(path)
+        try:
+            return p.relative_to(self.run_dir).as_posix()
+        except ValueError:
+            return p.as_posix()
+
+    def digest(self, path):
+        """Content hash of an input (None if missing); reuses the stored hash when size/mtime match."""
+        rel = self._rel(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        rec = self.inputs.get(rel)
+        if rec and rec.get('size') == st.st_size and rec.get('mtime_ns') == st.st_mtime_ns:
+            return rec['sha256']
+        sha = file_sha256(path)
+        self.inputs[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha}
+        self.dirty = True
+        return sha
+
+    def _deps(self, inputs, key):
+        deps = {self._rel(p): self.digest(p) for p in inputs if p is not None}
+        if key is not None:
+            deps['__key__'] = str(key)
+        return deps
+
+    def is_fresh(self, artifact, inputs, key=None, output=None):
+        """True if `artifact` was recorded with identical input hashes (and `output`, if given, exists)."""
+        rec = self.artifacts.get(artifact)
+        if rec is None:
+            return False
+        if output is not None and not Path(output).exists():
+            return False
+        return rec.get('deps') == self._deps(inputs, key)
+
+    def record(self, artifact, inputs, key=None, data=None):
+        rec = {'deps': self._deps(inputs, key)}
+        if data is not None:
+            rec['data'] = data
+        self.artifacts[artifact] = rec
+        self.dirty = True
+
+    def data(self, artifact):
+        rec = self.artifacts.get(artifact)
+        return None if rec is None else rec.get('data')
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'inputs': self.inputs, 'artifacts': self.artifacts}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def cached_fragment(run_dir, artifact, inputs, build, key=None):
+    """Return a cached text fragment (e.g. an HTML card) or rebuild it with build() when inputs changed."""
+    cache = BuildCache(run_dir)
+    if cache.is_fresh(artifact, inputs, key=key):
+        text = cache.data(artifact)
+        if text is not None:
+            cache.save()
+            return text
+    text = build()
+    cache.record(artifact, inputs, key=key, data=text)
+    cache.save()
+    return text
@@ -1,8 +1,8 @@
-import os
-import json
 import argparse
-import subprocess
 from pathlib import Path
+from src.plotting import plot_runs
+from src.report_media import media_html, page_path, nav_html
+from src.report_pages import add_report_args, app_of, collect_runs, plot_jobs, write_html
 
 
 APP_PREFIX_METRICS = {
@@ -13,105 +13,45 @@ APP_PREFIX_METRICS = {
 }
 
 
-def safe_run(cmd):
-    try:
-        subprocess.run(cmd, check=True)
-        return True
-    except Exception:
-        return False
-
-
-def generate_plots(run_dir: Path):
-    csv = run_dir / 'episodes.csv'
-    if not csv.exists():
-        return
-    # Return curve
-    out = run_dir / 'return_curve.png'
-    if not out.exists():
-        safe_run(['python', 'notebooks/plots.py', '--csv', str(csv), '--out', str(out)])
-    # Metric hists based on app prefix
-    prefix = run_dir.name.split('-')[0]
-    metrics = APP_PREFIX_METRICS.get(prefix, [])
-    for m in metrics:
-        out_m = run_dir / f'{m}_hist.png'
-        if not out_m.exists():
-            safe_run(['python', 'notebooks/plots.py', '--csv', str(csv), '--out', str(out_m), '--metric', m])
-
-
-def collect_runs(runs_dir: Path):
-    items = []
-    for d in sorted(runs_dir.iterdir()):
-        if not d.is_dir():
-            continue
-        cfg = d / 'config.json'
-        agg = d / 'aggregate.json'
-        if cfg.exists() and agg.exists():
-            try:
-                with open(cfg, 'r', encoding='utf-8') as f:
-                    cfg_obj = json.load(f)
-                with open(agg, 'r', encoding='utf-8') as f:
-                    agg_obj = json.load(f)
-                items.append({'dir': d, 'config': cfg_obj, 'agg': agg_obj})
-            except Exception:
-                pass
-    return items
-
-
-def find_preview(eval_dir: Path):
-    if not eval_dir.exists():
-        return None
-    gifs = sorted(eval_dir.glob('episode_*.gif'))
-    if gifs:
-        return gifs[0]
-    pngs = sorted(eval_dir.glob('episode_*_frame_*.png'))
-    if pngs:
-        return pngs[0]
-    return None
-
-
-def write_html(out_html: Path, runs):
+def render_card(it, plan, out_dir):
+    rd = it['dir']
+    agg = it['agg']
     parts = []
-    parts.append('<!doctype html><meta charset="utf-8"><title>DRL for Automated Testing — Report</title>')
-    parts.append('<style>body{font-family:Segoe UI,Arial,sans-serif;margin:24px;color:#222} h1,h2{margin:0.4em 0} .grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(320px,1fr));gap:16px} .card{border:1px solid #ddd;border-radius:8px;padding:12px} img{max-width:100%;height:auto;border:1px solid #eee;border-radius:6px} code{background:#f5f5f5;padding:2px 4px;border-radius:4px}</style>')
-    parts.append('<h1>DRL for Automated Testing — Results</h1>')
-    parts.append('<p>This report is auto-generated from artifacts under <code>runs/</code>. It includes per-run aggregates, plots, and preview frames/GIFs when available.</p>')
-    # Group by app
-    by_app = {}
-    for item in runs:
-        name = item['dir'].name
-        app = name.split('-')[0]
-        by_app.setdefault(app, []).append(item)
+    parts.append('<div class="card">')
+    parts.append(f'<h3 style="margin-top:0">{rd.name}</h3>')
+    # Plots (thumbnail linking to the full-size figure)
+    if 'curve' in plan:
+        parts.append(media_html(plan['curve'], 'return curve', out_dir))
+    # Metrics bullets (top few)
+    parts.append('<ul>')
+    for k in ['episodes','return_mean','return_std','length_mean']:
+        if k in agg:
+            parts.append(f'<li><b>{k}</b>: {agg[k]}</li>')
+    # Pick a few app-specific metrics
+    for k in APP_PREFIX_METRICS.get(app_of(rd), [])[:3]:
+        km = f'{k}_mean'
+        if km in agg:
+            parts.append(f'<li><b>{km}</b>: {agg[km]}</li>')
+    parts.append('</ul>')
+    # Preview
+    if 'preview' in plan:
+        parts.append(media_html(plan['preview'], 'preview', out_dir))
+    parts.append('</div>')
+    return '\n'.join(parts)
+
+
+HEAD = ('<style>body{font-family:Segoe UI,Arial,sans-serif;margin:24px;color:#222} h1,h2{margin:0.4em 0} .grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(320px,1fr));gap:16px} .card{border:1px solid #ddd;border-radius:8px;padding:12px} img{max-width:100%;height:auto;border:1px solid #eee;border-radius:6px} code{background:#f5f5f5;padding:2px 4px;border-radius:4px} .muted{color:#666} .nav{margin:8px 0}</style>')
+
+
+def overview(out_html, apps, by_app, runs):
+    parts = []
+    parts.append('<p>This report is auto-generated from artifacts under <code>runs/</code>. It includes per-run aggregates, plots, and preview frames/GIFs when available. Images are thumbnails; click one to open the full-size file.</p>')
+    parts.append(nav_html(out_html, apps))
+    parts.append('<ul>')
     for app, items in by_app.items():
-        parts.append(f'<h2>{app.title()}</h2>')
-        parts.append('<div class="grid">')
-        for it in items:
-            rd = it['dir']
-            agg = it['agg']
-            parts.append('<div class="card">')
-            parts.append(f'<h3 style="margin-top:0">{rd.name}</h3>')
-            # Plots
-            rc = rd / 'return_curve.png'
-            if rc.exists():
-                parts.append(f'<div><img src="{rc.as_posix()}" alt="return curve"></div>')
-            # Metrics bullets (top few)
-            parts.append('<ul>')
-            for k in ['episodes','return_mean','return_std','length_mean']:
-                if k in agg:
-                    parts.append(f'<li><b>{k}</b>: {agg[k]}</li>')
-            # Pick a few app-specific metrics
-            prefix = rd.name.split('-')[0]
-            for k in APP_PREFIX_METRICS.get(prefix, [])[:3]:
-                km = f'{k}_mean'
-                if km in agg:
-                    parts.append(f'<li><b>{km}</b>: {agg[km]}</li>')
-            parts.append('</ul>')
-            # Preview
-            pv = find_preview(rd / 'eval')
-            if pv is not None:
-                parts.append(f'<div><img src="{pv.as_posix()}" alt="preview"></div>')
-            parts.append('</div>')
-        parts.append('</div>')
-    out_html.write_text('\n'.join(parts), encoding='utf-8')
+        parts.append(f'<li><a href="{page_path(out_html, app).name}">{app.title()}</a>: {len(items)} run(s)</li>')
+    parts.append('</ul>')
+    return parts
 
 
 def append_report_md(report_md: Path, runs):
@@ -132,24 +72,26 @@ def append_report_md(report_md: Path, runs):
 
 def main():
     ap = argparse.ArgumentParser(description='Build plots and a consolidated report from runs/')
-    ap.add_argument('--runs_dir', default='runs')
-    ap.add_argument('--html_out', default='AMAZING_REPORT.html')
+    add_report_args(ap)
     ap.add_argument('--append_report_md', action='store_true')
     args = ap.parse_args()
+    if not Path(args.runs_dir).is_dir():
+        ap.error(f'runs directory not found: {args.runs_dir}')
 
     runs_dir = Path(args.runs_dir)
     runs = collect_runs(runs_dir)
-    # Generate plots where missing
-    for it in runs:
-        generate_plots(it['dir'])
+    # Generate plots where missing (in-process, spread over a process pool)
+    plot_runs(plot_jobs([it['dir'] for it in runs], APP_PREFIX_METRICS), workers=args.workers)
     # Write HTML
-    write_html(Path(args.html_out), runs)
+    pages = write_html(Path(args.html_out), runs, render_card, HEAD, overview,
+                       budget_mb=args.budget_mb, page_size=args.page_size,
+                       media_opts={'stride': args.gif_stride, 'colors': args.gif_colors})
     # Optionally append summary to REPORT.md if present
     if args.append_report_md:
         report_md = Path('REPORT.md')
         if report_md.exists():
             append_report_md(report_md, runs)
-    print(f'Wrote HTML report to {args.html_out}.')
+    print(f'Wrote HTML report to {args.html_out} ({len(pages)} page(s)).')
 
 
 if __name__ == '__main__':
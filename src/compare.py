@@ -0,0 +1,276 @@
+"""
+Cross-run, cross-seed statistical comparison of (app, algo, persona) configs.
+
+Per-episode data is streamed from each run's episodes.csv in chunks and
+reduced to one per-seed mean immediately, so memory stays bounded by the
+number of runs rather than the number of episodes. Statistics are computed
+on seed-level means with NumPy:
+  - bootstrap CIs over seeds for each config
+  - paired (same-seed) differences between algos and between personas
+  - ranking tables with bootstrap probability of being best
+
+A bootstrap over a handful of seeds understates the spread, so CIs, P(best)
+and significance stars are only reported for configs (or seed pairs) with at
+least MIN_SEEDS seeds; smaller groups show their mean and "insufficient seeds".
+
+Usage:
+    python -m src.compare --app blackjack --metrics return win --last_frac 0.2 --out COMPARE.md
+"""
+
+import argparse
+import itertools
+import numpy as np
+from pathlib import Path
+from src.registry import open_registry
+
+DEFAULT_METRICS = {
+    'blackjack': ['return', 'win', 'lose', 'draw'],
+    'formflow': ['return', 'success', 'distinct_pages', 'validation_errors'],
+}
+
+# Metrics where a smaller value ranks first
+LOWER_IS_BETTER = {'lose', 'softlock'}
+
+# Fewest seeds (or same-seed pairs) a bootstrap CI / P(best) / star is reported for
+MIN_SEEDS = 5
+INSUFFICIENT = 'insufficient seeds'
+
+
+def seed_means(csv_path, metrics, last_frac=None, chunksize=200_000):
+    """Stream one episodes.csv and return {metric: mean} (optionally over the last fraction of episodes)."""
+    import pandas as pd
+    cols = set(metrics)
+    skip = 0
+    if last_frac:
+        with open(csv_path, 'rb') as f:
+            n = sum(1 for _ in f) - 1
+        skip = int(n * (1.0 - float(last_frac)))
+    sums = {m: 0.0 for m in metrics}
+    counts = {m: 0 for m in metrics}
+    reader = pd.read_csv(csv_path, usecols=lambda c: c in cols, chunksize=chunksize,
+                         skiprows=range(1, skip + 1) if skip else None)
+    for chunk in reader:
+        for m in metrics:
+            if m in chunk.columns:
+                v = pd.to_numeric(chunk[m], errors='coerce').to_numpy(dtype=np.float64)
+                v = v[np.isfinite(v)]
+                sums[m] += float(v.sum())
+                counts[m] += int(v.size)
+    return {m: sums[m] / counts[m] for m in metrics if counts[m]}
+
+
+def load_seed_table(runs_dir, app=None, algo=None, persona=None, metrics=None, scope='train', last_frac=None):
+    """Return {(app, algo, persona): {seed: {metric: mean}}} using the latest run per (config, seed)."""
+    table = {}
+    with open_registry(str(runs_dir)) as reg:
+        rows = reg.query(app=app, algo=algo, persona=persona)
+    latest = {}
+    for r in rows:  # ordered by ts; later runs replace earlier ones
+        latest[(r['app'], r['algo'], r['persona'], r['seed'])] = r
+    for (a, al, p, seed), r in sorted(latest.items()):
+        csv = Path(r['run_dir']) / ('eval' if scope == 'eval' else '') / 'episodes.csv'
+        if not csv.exists():
+            continue
+        ms = metrics or DEFAULT_METRICS.get(a, ['return'])
+        try:
+            means = seed_means(csv, ms, last_frac)
+        except Exception as e:
+            print(f"[WARN] cannot read {csv}: {e}")
+            continue
+        table.setdefault((a, al, p), {})[seed] = means
+    return table
+
+
+def bootstrap_means(values, n_boot=2000, rng=None):
+    """Bootstrap distribution (n_boot,) of the mean of `values` resampled with replacement."""
+    rng = rng or np.random.default_rng(0)
+    v = np.asarray(values, dtype=np.float64)
+    if v.size == 0:
+        return np.full(n_boot, np.nan)
+    idx = rng.integers(0, v.size, size=(n_boot, v.size))
+    return v[idx].mean(axis=1)
+
+
+def ci(boot, level=0.95):
+    lo, hi = np.nanpercentile(boot, [100 * (1 - level) / 2, 100 * (1 + level) / 2])
+    return float(lo), float(hi)
+
+
+def config_stats(table, metric, n_boot=2000, level=0.95, seed=0, min_seeds=MIN_SEEDS):
+    """Per-config seed stats; 'ci' and 'boot' are None for configs with fewer than `min_seeds` seeds."""
+    rng = np.random.default_rng(seed)
+    out = {}
+    for key, seeds in table.items():
+        vals = np.array([s[metric] for s in seeds.values() if metric in s], dtype=np.float64)
+        if vals.size == 0:
+            continue
+        boot = bootstrap_means(vals, n_boot, rng) if vals.size >= min_seeds else None
+        out[key] = {'n_seeds': int(vals.size), 'mean': float(vals.mean()),
+                    'std': float(vals.std(ddof=1)) if vals.size > 1 else 0.0,
+                    'ci': ci(boot, level) if boot is not None else None, 'boot': boot}
+    return out
+
+
+def paired_diffs(table, metric, vary='algo', n_boot=2000, level=0.95, seed=0, min_pairs=MIN_SEEDS):
+    """
+    Same-seed differences between configs that differ only in `vary` ('algo' or 'persona').
+
+    Pairs of configs sharing fewer than `min_pairs` seeds get no CI, P(A>B) or significance.
+    """
+    rng = np.random.default_rng(seed)
+    pos = {'algo': 1, 'persona': 2}[vary]
+    groups = {}
+    for key in table:
+        fixed = tuple(k for i, k in enumerate(key) if i != pos)
+        groups.setdefault(fixed, []).append(key)
+    rows = []
+    for fixed, keys in sorted(groups.items()):
+        for a, b in itertools.combinations(sorted(keys), 2):
+            common = sorted(set(table[a]) & set(table[b]))
+            d = np.array([table[a][s][metric] - table[b][s][metric] for s in common
+                          if metric in table[a][s] and metric in table[b][s]], dtype=np.float64)
+            if d.size == 0:
+                continue
+            if d.size < min_pairs:
+                rows.append({'a': a, 'b': b, 'n_pairs': int(d.size), 'diff': float(d.mean()), 'ci': None,
+                             'p_a_better': None, 'significant': False})
+                continue
+            boot = bootstrap_means(d, n_boot, rng)
+            lo, hi = ci(boot, level)
+            rows.append({'a': a, 'b': b, 'n_pairs': int(d.size), 'diff': float(d.mean()), 'ci': (lo, hi),
+                         'p_a_better': float(np.mean(boot > 0)), 'significant': bool(lo > 0 or hi < 0)})
+    return rows
+
+
+def ranking(stats, higher_is_better=True):
+    """
+    Rank configs by mean; P(best) from the joint bootstrap draws.
+
+    P(best) is taken over the configs that have a bootstrap (enough seeds) and is None for the rest.
+    """
+    keys = list(stats)
+    if not keys:
+        return []
+    p_best = {}
+    boot_keys = [k for k in keys if stats[k]['boot'] is not None]
+    if boot_keys:
+        boots = np.stack([stats[k]['boot'] for k in boot_keys])  # (configs, n_boot)
+        best = np.nanargmax(boots, axis=0) if higher_is_better else np.nanargmin(boots, axis=0)
+        counts = np.bincount(best, minlength=len(boot_keys)) / boots.shape[1]
+        p_best = {k: float(c) for k, c in zip(boot_keys, counts)}
+    order = sorted(range(len(keys)), key=lambda i: stats[keys[i]]['mean'], reverse=higher_is_better)
+    return [(rank + 1, keys[i], stats[keys[i]], p_best.get(keys[i])) for rank, i in enumerate(order)]
+
+
+def _fmt_key(k):
+    return f"{k[1]}/{k[2]}"
+
+
+def _fmt_ci(c):
+    return f"[{c[0]:.4f}, {c[1]:.4f}]" if c is not None else INSUFFICIENT
+
+
+def _fmt_p(p):
+    return f"{p:.2f}" if p is not None else INSUFFICIENT
+
+
+def build_tables(table, metrics, n_boot=2000, level=0.95, min_seeds=MIN_SEEDS):
+    """Return {app: [(metric, ranking_rows, algo_diffs, persona_diffs)]}."""
+    by_app = {}
+    for key in table:
+        by_app.setdefault(key[0], {})[key] = table[key]
+    out = {}
+    for app, sub in sorted(by_app.items()):
+        ms = metrics or DEFAULT_METRICS.get(app, ['return'])
+        blocks = []
+        for m in ms:
+            stats = config_stats(sub, m, n_boot, level, min_seeds=min_seeds)
+            if not stats:
+                continue
+            blocks.append((m, ranking(stats, m not in LOWER_IS_BETTER),
+                           paired_diffs(sub, m, 'algo', n_boot, level, min_pairs=min_seeds),
+                           paired_diffs(sub, m, 'persona', n_boot, level, min_pairs=min_seeds)))
+        out[app] = blocks
+    return out
+
+
+def to_markdown(tables, level=0.95, min_seeds=MIN_SEEDS):
+    pct = int(level * 100)
+    lines = ['# Cross-seed comparison', '',
+             f'Seed-level means with {pct}% bootstrap CIs. Paired differences use runs with matching seeds. '
+             f'CIs, P(best) and significance need at least {min_seeds} seeds (pairs).', '']
+    for app, blocks in tables.items():
+        lines.append(f'## {app.title()}')
+        for m, rank_rows, algo_d, persona_d in blocks:
+            lines += ['', f'### {m}', '', f'| rank | config | seeds | mean | std | {pct}% CI | P(best) |', '|---|---|---|---|---|---|---|']
+            for r, k, st, pb in rank_rows:
+                lines.append(f"| {r} | {_fmt_key(k)} | {st['n_seeds']} | {st['mean']:.4f} | {st['std']:.4f} | "
+                             f"{_fmt_ci(st['ci'])} | {_fmt_p(pb)} |")
+            for title, rows in (('Algo differences (same persona)', algo_d), ('Persona differences (same algo)', persona_d)):
+                if not rows:
+                    continue
+                lines += ['', f'{title}:', '', f'| A | B | pairs | mean(A-B) | {pct}% CI | P(A>B) | sig |', '|---|---|---|---|---|---|---|']
+                for d in rows:
+                    lines.append(f"| {_fmt_key(d['a'])} | {_fmt_key(d['b'])} | {d['n_pairs']} | {d['diff']:.4f} | "
+                                 f"{_fmt_ci(d['ci'])} | {_fmt_p(d['p_a_better'])} | {'*' if d['significant'] else ''} |")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def to_html(tables, level=0.95, min_seeds=MIN_SEEDS):
+    pct = int(level * 100)
+    parts = ['<!doctype html><meta charset="utf-8"><title>Cross-seed comparison</title>',
+             '<style>body{font-family:Segoe UI,Arial,sans-serif;margin:24px;color:#222} table{border-collapse:collapse;margin:8px 0 16px} th,td{text-align:left;padding:4px 8px;border-bottom:1px solid #eee} .sig{color:#0a7a2f;font-weight:bold}</style>',
+             '<h1>Cross-seed comparison</h1>',
+             f'<p>Seed-level means with {pct}% bootstrap CIs. Paired differences use runs with matching seeds. '
+             f'CIs, P(best) and significance need at least {min_seeds} seeds (pairs).</p>']
+    for app, blocks in tables.items():
+        parts.append(f'<h2>{app.title()}</h2>')
+        for m, rank_rows, algo_d, persona_d in blocks:
+            parts.append(f'<h3>{m}</h3><table><tr><th>rank</th><th>config</th><th>seeds</th><th>mean</th><th>std</th><th>{pct}% CI</th><th>P(best)</th></tr>')
+            for r, k, st, pb in rank_rows:
+                parts.append(f"<tr><td>{r}</td><td>{_fmt_key(k)}</td><td>{st['n_seeds']}</td><td>{st['mean']:.4f}</td><td>{st['std']:.4f}</td>"
+                             f"<td>{_fmt_ci(st['ci'])}</td><td>{_fmt_p(pb)}</td></tr>")
+            parts.append('</table>')
+            for title, rows in (('Algo differences (same persona)', algo_d), ('Persona differences (same algo)', persona_d)):
+                if not rows:
+                    continue
+                parts.append(f'<div>{title}</div><table><tr><th>A</th><th>B</th><th>pairs</th><th>mean(A-B)</th><th>{pct}% CI</th><th>P(A&gt;B)</th></tr>')
+                for d in rows:
+                    cls = ' class="sig"' if d['significant'] else ''
+                    parts.append(f"<tr{cls}><td>{_fmt_key(d['a'])}</td><td>{_fmt_key(d['b'])}</td><td>{d['n_pairs']}</td><td>{d['diff']:.4f}</td>"
+                                 f"<td>{_fmt_ci(d['ci'])}</td><td>{_fmt_p(d['p_a_better'])}</td></tr>")
+                parts.append('</table>')
+    return '\n'.join(parts)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Cross-seed bootstrap comparison of algos/personas')
+    ap.add_argument('--runs_dir', default='runs')
+    ap.add_argument('--app', default=None)
+    ap.add_argument('--algo', default=None)
+    ap.add_argument('--persona', default=None)
+    ap.add_argument('--metrics', nargs='+', default=None, help='Episode columns to compare (default per app)')
+    ap.add_argument('--scope', default='train', choices=['train', 'eval'], help='Use training or eval episodes')
+    ap.add_argument('--last_frac', type=float, default=None, help='Only use the last fraction of episodes per run')
+    ap.add_argument('--boot', type=int, default=2000)
+    ap.add_argument('--level', type=float, default=0.95)
+    ap.add_argument('--min_seeds', type=int, default=MIN_SEEDS,
+                    help='Fewest seeds (same-seed pairs) to report a CI, P(best) or significance for')
+    ap.add_argument('--format', default='md', choices=['md', 'html'])
+    ap.add_argument('--out', default=None, help='Output file (default COMPARE.md / COMPARE.html)')
+    args = ap.parse_args()
+    if not Path(args.runs_dir).is_dir():
+        ap.error(f'runs directory not found: {args.runs_dir}')
+
+    table = load_seed_table(args.runs_dir, args.app, args.algo, args.persona, args.metrics, args.scope, args.last_frac)
+    tables = build_tables(table, args.metrics, args.boot, args.level, args.min_seeds)
+    text = (to_markdown(tables, args.level, args.min_seeds) if args.format == 'md'
+            else to_html(tables, args.level, args.min_seeds))
+    out = args.out or ('COMPARE.md' if args.format == 'md' else 'COMPARE.html')
+    Path(out).write_text(text, encoding='utf-8')
+    print(f'Wrote comparison for {len(table)} config(s) to {out}')
+
+
+if __name__ == '__main__':
+    main()
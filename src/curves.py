@@ -0,0 +1,136 @@
+"""
+Multi-resolution summaries of per-episode series for constant-time plotting.
+
+For each series (return, length and app metrics) and each resolution level we
+keep windowed mean/min/max bands plus LTTB-downsampled points. Summaries are
+cached per run in curves.npz and rebuilt only when episodes.csv changes, so
+learning curves for million-episode runs draw from a few thousand points.
+"""
+
+import numpy as np
+from pathlib import Path
+from src.build_cache import BuildCache
+
+CURVES_FILE = 'curves.npz'
+LEVELS = (256, 1024, 4096)
+# Bump when the summary layout changes so cached curves are rebuilt
+CURVES_VERSION = 1
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling; returns indices of kept points."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i] + 1, edges[i + 1])
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], max(edges[i + 1] + 1, edges[i + 2]))
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        xs, ys = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+def window_bands(y, n_windows):
+    """Mean/min/max of y over n_windows contiguous windows; returns (x_center, mean, min, max)."""
+    n = len(y)
+    if n == 0:
+        e = np.zeros(0)
+        return e, e, e, e
+    edges = np.unique(np.linspace(0, n, min(n, n_windows) + 1).astype(np.int64))
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    mean = np.add.reduceat(y, starts) / counts
+    lo = np.minimum.reduceat(y, starts)
+    hi = np.maximum.reduceat(y, starts)
+    x = (starts + edges[1:] - 1) / 2.0
+    return x, mean, lo, hi
+
+
+def summarize_series(y, levels=LEVELS):
+    y = np.asarray(y, dtype=np.float64)
+    y = np.where(np.isfinite(y), y, np.nan)
+    if np.isnan(y).any():
+        y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+    x = np.arange(len(y), dtype=np.float64)
+    out = {}
+    for lv in levels:
+        bx, bm, blo, bhi = window_bands(y, lv)
+        idx = lttb(x, y, lv)
+        out[lv] = {'x': bx, 'mean': bm, 'min': blo, 'max': bhi, 'lttb_x': x[idx], 'lttb_y': y[idx]}
+    return out
+
+
+def build_curves(run_dir, columns=('return', 'length'), levels=LEVELS):
+    """Compute summaries from episodes.csv and write curves.npz; returns {column: {level: arrays}}."""
+    import pandas as pd
+    run_dir = Path(run_dir)
+    csv = run_dir / 'episodes.csv'
+    cols = set(columns)
+    df = pd.read_csv(csv, usecols=lambda c: c in cols)
+    arrays = {'n': np.array([len(df)])}
+    out = {}
+    for c in columns:
+        if c not in df.columns or not pd.api.types.is_numeric_dtype(df[c]):
+            continue
+        out[c] = summarize_series(df[c].to_numpy(), levels)
+        for lv, d in out[c].items():
+            for k, v in d.items():
+                arrays[f'{c}__{lv}__{k}'] = v.astype(np.float32)
+    np.savez_compressed(run_dir / CURVES_FILE, **arrays)
+    return out
+
+
+def load_curves(run_dir):
+    """Load curves.npz into {column: {level: {field: array}}} (None if missing)."""
+    path = Path(run_dir) / CURVES_FILE
+    if not path.exists():
+        return None
+    out = {}
+    with np.load(path) as z:
+        for key in z.files:
+            if key.count('__') != 2:
+                continue
+            c, lv, k = key.split('__')
+            out.setdefault(c, {}).setdefault(int(lv), {})[k] = z[key]
+    return out
+
+
+def ensure_curves(run_dir, columns=('return', 'length'), levels=LEVELS, cache=None):
+    """Return cached curve summaries, rebuilding when episodes.csv changed or new columns are requested."""
+    run_dir = Path(run_dir)
+    csv = run_dir / 'episodes.csv'
+    if not csv.exists():
+        return None
+    cache = cache or BuildCache(run_dir)
+    key = f"{CURVES_VERSION}:{','.join(map(str, levels))}"
+    have = cache.data(CURVES_FILE) or []
+    fresh = cache.is_fresh(CURVES_FILE, [csv], key=key, output=run_dir / CURVES_FILE)
+    if fresh and set(columns) <= set(have):
+        cache.save()
+        return load_curves(run_dir)
+    # Keep previously requested columns so callers with different metric lists do not thrash
+    cols = list(dict.fromkeys(list(columns) + (list(have) if fresh else [])))
+    build_curves(run_dir, cols, levels)
+    cache.record(CURVES_FILE, [csv], key=key, data=cols)
+    cache.save()
+    return load_curves(run_dir)
+
+
+def pick_level(summary, target_points=1024):
+    """Choose the smallest level with at least target_points windows (or the largest available)."""
+    levels = sorted(summary)
+    for lv in levels:
+        if lv >= target_points:
+            return summary[lv]
+    return summary[levels[-1]]
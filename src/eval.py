@@ -1,19 +1,25 @@
 import os, argparse
-try:
-    import imageio  # optional; if missing we fall back to PNG frames
-    HAS_IMAGEIO = True
-except Exception:
-    imageio = None
-    HAS_IMAGEIO = False
 from stable_baselines3 import PPO, A2C
 from stable_baselines3.common.vec_env import DummyVecEnv
 from stable_baselines3.common.monitor import Monitor
 from src.utils import load_configs, set_global_seeds
 from src.make_env import make_env
 from src.metrics import EpisodeLogger, aggregate_csv
+from src.profiling import add_profile_args, profiler_from_args
+from src.registry import find_latest_run, register
+from src.recorder import FrameRecorder, FORMATS
+from src.hand_history import HandHistoryWriter
+from src.masking import masked_predict, maskable_ppo, trained_with_masks, vec_action_masks
 
 ALGOS = {"ppo": PPO, "a2c": A2C}
 
+def grab_frame(venv, app):
+    if app == "minigrid":
+        return venv.envs[0].base_env.render()
+    # try to get render from wrapped env
+    inner = getattr(venv.envs[0], "env", venv.envs[0])
+    return getattr(inner, "render", lambda: None)()
+
 def parse():
     p = argparse.ArgumentParser()
     p.add_argument("--algo", required=True, choices=["ppo","a2c"])
@@ -24,7 +30,17 @@ def parse():
     p.add_argument("--episodes", type=int, default=50)
     p.add_argument("--runs_dir", default="runs")
     p.add_argument("--run_subdir", default=None)
-    p.add_argument("--record_gif", action="store_true", help="Record per-episode GIFs (MiniGrid only)")
+    p.add_argument("--record_gif", action="store_true", help="Record per-episode clips (streamed to disk)")
+    p.add_argument("--record_format", default="gif", choices=FORMATS, help="Clip format (mp4 needs imageio-ffmpeg; png writes frame files)")
+    p.add_argument("--record_fps", type=int, default=10)
+    p.add_argument("--record_stride", type=int, default=1, help="Keep every Nth rendered frame")
+    p.add_argument("--record_max_seconds", type=float, default=None, help="Stop recording an episode after this much clip time")
+    p.add_argument("--record_background", action="store_true", help="Encode frames on a background thread")
+    p.add_argument("--hand_history", action="store_true", help="Blackjack: write eval/hands.jsonl for the viewer's --replay")
+    p.add_argument("--record_transitions", action="store_true", help="Write every transition to uint8-quantized shards (see src/trajectories.py)")
+    p.add_argument("--record_components", action="store_true", help="Also store per-step reward components for src.relabel (implies --record_transitions)")
+    p.add_argument("--mask_actions", action="store_true", help="Only let the policy pick valid actions (always on for runs trained with --mask_actions)")
+    add_profile_args(p)
     return p.parse_args()
 
 def main():
@@ -32,12 +48,9 @@ def main():
     cfg = load_configs(app=args.app, algo=args.algo, persona=args.persona)
     set_global_seeds(args.seed)
     if args.run_subdir is None:
-        prefix = f"{args.app}-{args.algo}-{args.persona}-seed{args.seed}"
-        candidates = [d for d in os.listdir(args.runs_dir) if d.startswith(prefix)]
-        if not candidates:
+        run_dir = find_latest_run(args.runs_dir, args.app, args.algo, args.persona, args.seed)
+        if run_dir is None:
             raise FileNotFoundError("No matching runs found.")
-        candidates.sort()
-        run_dir = os.path.join(args.runs_dir, candidates[-1])
     else:
         run_dir = os.path.join(args.runs_dir, args.run_subdir)
     model_path = os.path.join(run_dir, "model.zip")
@@ -46,55 +59,61 @@ def main():
         cfg["app"]["render_mode"] = "rgb_array"
     env = make_env(cfg["app"], cfg["persona"])
     env = Monitor(env)
+    traj = None
+    if args.record_transitions or args.record_components:
+        from src.trajectories import TrajectoryRecorder, DEFAULT_INFO_KEYS
+        env = traj = TrajectoryRecorder(env, os.path.join(run_dir, "eval", "traj"), DEFAULT_INFO_KEYS.get(args.app, ()),
+                                        components=args.record_components)
     venv = DummyVecEnv([lambda: env])
     Algo = ALGOS[args.algo]
+    mask = args.mask_actions
+    if args.algo == "ppo" and trained_with_masks(run_dir):
+        Algo = maskable_ppo()
+        mask = True
     model = Algo.load(model_path, env=venv)
     logger = EpisodeLogger(os.path.join(run_dir, "eval"))
     eval_dir = os.path.join(run_dir, "eval")
     os.makedirs(eval_dir, exist_ok=True)
+    prof = profiler_from_args(args, eval_dir)
+    hands = HandHistoryWriter(os.path.join(eval_dir, "hands.jsonl")) if args.hand_history and args.app == "blackjack" else None
+    total_steps = 0
+    prof.step(total_steps)
     for ep in range(args.episodes):
         obs = venv.reset()
         done = False
-        frames = []
+        rec = None
         if args.record_gif:
-            if args.app == "minigrid":
-                frame = venv.envs[0].base_env.render()
-            else:
-                # try to get render from wrapped env
-                inner = getattr(venv.envs[0], "env", venv.envs[0])
-                frame = getattr(inner, "render", lambda: None)()
-            if frame is not None:
-                frames.append(frame)
+            rec = FrameRecorder(os.path.join(eval_dir, f"episode_{ep+1}"), args.record_format, args.record_fps,
+                                args.record_stride, args.record_max_seconds, background=args.record_background)
+            rec.capture(lambda: grab_frame(venv, args.app))
         while not done:
-            action, _ = model.predict(obs, deterministic=True)
+            if mask:
+                action, _ = masked_predict(model, obs, vec_action_masks(venv), deterministic=True)
+            else:
+                action, _ = model.predict(obs, deterministic=True)
             obs, reward, dones, infos = venv.step(action)
+            total_steps += 1
+            prof.step(total_steps)
             logger.locals = {"infos": infos, "rewards": reward, "dones": dones}
             logger._on_step()
-            if args.record_gif:
-                if args.app == "minigrid":
-                    frame = venv.envs[0].base_env.render()
-                else:
-                    inner = getattr(venv.envs[0], "env", venv.envs[0])
-                    frame = getattr(inner, "render", lambda: None)()
-                if frame is not None:
-                    frames.append(frame)
             done = bool(dones[0])
-        if args.record_gif and frames:
-            if HAS_IMAGEIO:
-                out_gif = os.path.join(eval_dir, f"episode_{ep+1}.gif")
-                imageio.mimsave(out_gif, frames, fps=10)
-            else:
-                # Fallback: save PNG frames
-                for i, fr in enumerate(frames, start=1):
-                    out_png = os.path.join(eval_dir, f"episode_{ep+1}_frame_{i:03d}.png")
-                    try:
-                        from matplotlib import pyplot as plt
-                        plt.imsave(out_png, fr)
-                    except Exception:
-                        pass
+            if hands is not None:
+                hands.observe(venv.envs[0], done)
+            # Renders only frames the recorder keeps (stride, length limit, final frame)
+            if rec is not None:
+                rec.capture(lambda: grab_frame(venv, args.app), last=done)
+        if rec is not None:
+            rec.close()
     ep_csv = os.path.join(run_dir, "eval", "episodes.csv")
     if os.path.exists(ep_csv):
         aggregate_csv(ep_csv, os.path.join(run_dir, "eval", "aggregate.json"))
+    if traj is not None:
+        traj.flush()
+    if hands is not None:
+        hands.close()
+        print(f"Hand history: {hands.hands} hands -> {hands.path}")
+    prof.stop()
+    register(run_dir, args.runs_dir)
     print("Evaluated:", run_dir)
 
 if __name__ == "__main__":
@@ -1,37 +1,35 @@
 import os
 import argparse
-import subprocess
+from src.plotting import plot_runs
+
+
+# Heuristic metric plots by run-dir prefix
+PREFIX_METRICS = {
+    'blackjack': ['win', 'lose', 'draw'],
+    'formflow': ['distinct_pages', 'distinct_selectors', 'validation_errors'],
+}
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--runs_dir', default='runs')
+    ap.add_argument('--workers', type=int, default=None, help='Plotting processes (default: CPU count)')
+    ap.add_argument('--force', action='store_true', help='Redraw plots even if episodes.csv is unchanged')
     args = ap.parse_args()
 
-    py = 'python'
+    jobs = []
     for root, dirs, files in os.walk(args.runs_dir):
         if 'episodes.csv' in files:
-            csv_path = os.path.join(root, 'episodes.csv')
-            out_png = os.path.join(root, 'return_curve.png')
-            try:
-                subprocess.run([py, 'notebooks/plots.py', '--csv', csv_path, '--out', out_png], check=True)
-            except Exception:
-                pass
-            # Heuristic metric plots
-            # Blackjack
-            if os.path.basename(root).startswith('blackjack'):
-                for metric in ['win','lose','draw']:
-                    out = os.path.join(root, f'{metric}_hist.png')
-                    subprocess.run([py, 'notebooks/plots.py', '--csv', csv_path, '--out', out, '--metric', metric])
-            # FormFlow
-            if os.path.basename(root).startswith('formflow'):
-                for metric in ['distinct_pages','distinct_selectors','validation_errors']:
-                    out = os.path.join(root, f'{metric}_hist.png')
-                    subprocess.run([py, 'notebooks/plots.py', '--csv', csv_path, '--out', out, '--metric', metric])
-
-    print('Plots generated where CSVs were found.')
+            base = os.path.basename(root)
+            metrics = []
+            for prefix, ms in PREFIX_METRICS.items():
+                if base.startswith(prefix):
+                    metrics = ms
+            jobs.append((root, metrics))
+    plot_runs(jobs, workers=args.workers, overwrite=args.force)
+
+    print('Plots generated where CSVs changed.')
 
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,148 @@
+"""
+Compact Blackjack hand histories for replay without a model.
+
+A history is a JSON-lines file with one resolved hand per line:
+  {"i": 0, "ep": 3, "p": [10, 6, 5], "d": [9, 7], "a": "HS", "o": "W",
+   "ps": 21, "ds": 16, "bet": 0.0, "pnl": 0.0, "bank": 0.0}
+(p/d: player/dealer card values, a: actions H/S/D, o: outcome W/L/D).
+
+Next to it, `<file>.idx` holds one fixed-size HAND_DTYPE record per hand
+(byte offset plus the filterable fields). Readers memory-map the index, so
+opening a multi-GB history, filtering it and jumping to hand N never parse
+more than the hands that are actually shown. Writers append to both files
+as hands resolve; a missing or stale index is rebuilt with one pass.
+"""
+
+import json
+import os
+import numpy as np
+
+HAND_DTYPE = np.dtype([("offset", "<u8"), ("episode", "<u4"), ("outcome", "i1"),
+                       ("player", "u1"), ("dealer", "u1"), ("n_actions", "u1")])
+OUTCOME_CODES = {"W": 1, "L": -1, "D": 0}
+
+
+def index_path(path):
+    return str(path) + ".idx"
+
+
+def _record(offset, hand):
+    rec = np.zeros(1, dtype=HAND_DTYPE)
+    rec["offset"] = offset
+    rec["episode"] = hand.get("ep", 0)
+    rec["outcome"] = OUTCOME_CODES.get(hand.get("o"), 0)
+    rec["player"] = min(255, hand.get("ps", 0))
+    rec["dealer"] = min(255, hand.get("ds", 0))
+    rec["n_actions"] = min(255, len(hand.get("a", "")))
+    return rec
+
+
+class HandHistoryWriter:
+    """Appends hands from a BlackjackEnv; call observe(env) after every env.step()."""
+
+    def __init__(self, path, append=False):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        mode = "ab" if append else "wb"
+        if append and os.path.exists(self.path):
+            HandHistory(self.path).close()  # makes sure the index matches before appending
+        self._f = open(self.path, mode)
+        self._idx = open(index_path(self.path), mode)
+        self.hands = 0
+        self.episode = 0
+        self._seen = {}
+
+    def write(self, hand):
+        line = (json.dumps(hand, separators=(",", ":")) + "\n").encode("utf-8")
+        self._idx.write(_record(self._f.tell(), hand).tobytes())
+        self._f.write(line)
+        self.hands += 1
+
+    def observe(self, env, done=False):
+        """Write the env's last resolved hand if it is new; `done` marks the end of an episode."""
+        env = getattr(env, "unwrapped", env)
+        n = getattr(env, "hands_played", 0)
+        if n and self._seen.get(id(env)) != n and env.last_hand is not None:
+            self._seen[id(env)] = n
+            self.write(dict(env.last_hand, i=self.hands, ep=self.episode))
+        if done:
+            self.episode += 1
+
+    def close(self):
+        for f in (self._f, self._idx):
+            if not f.closed:
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_index(path):
+    """Rebuild `<path>.idx` with one streaming pass over the history."""
+    tmp = index_path(path) + ".part"
+    with open(path, "rb") as f, open(tmp, "wb") as out:
+        offset = 0
+        for line in f:
+            if line.strip():
+                out.write(_record(offset, json.loads(line)).tobytes())
+            offset += len(line)
+    os.replace(tmp, index_path(path))
+
+
+class HandHistory:
+    """Random access to a hand history through its memory-mapped index."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        idx = index_path(self.path)
+        if not os.path.exists(idx) or os.path.getmtime(idx) < os.path.getmtime(self.path) - 1:
+            build_index(self.path)
+        if os.path.getsize(idx) % HAND_DTYPE.itemsize:
+            build_index(self.path)  # torn write from an interrupted run
+        self.index = np.memmap(idx, dtype=HAND_DTYPE, mode="r") if os.path.getsize(idx) else np.zeros(0, HAND_DTYPE)
+        self._f = open(self.path, "rb")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        self._f.seek(int(self.index[i]["offset"]))
+        return json.loads(self._f.readline())
+
+    def select(self, outcome=None, player=None, dealer=None, episode=None):
+        """
+        Hand numbers matching all filters (vectorised over the index).
+
+        outcome: any of "W", "L", "D" (e.g. "L" or "WD"); player/dealer/episode: (lo, hi) inclusive.
+        """
+        ix = self.index
+        mask = np.ones(len(ix), dtype=bool)
+        if outcome:
+            mask &= np.isin(ix["outcome"], [OUTCOME_CODES[c] for c in outcome.upper()])
+        for field, rng in (("player", player), ("dealer", dealer), ("episode", episode)):
+            if rng is not None:
+                mask &= (ix[field] >= rng[0]) & (ix[field] <= rng[1])
+        return np.flatnonzero(mask)
+
+    def close(self):
+        self._f.close()
+        self.index = None
+
+
+def parse_filter(spec):
+    """"outcome=L,player=12-16" -> keyword arguments for HandHistory.select()."""
+    out = {}
+    for part in filter(None, (spec or "").split(",")):
+        key, _, val = part.partition("=")
+        key = key.strip()
+        if key == "outcome":
+            out["outcome"] = val.strip().upper()
+        elif key in ("player", "dealer", "episode"):
+            lo, _, hi = val.partition("-")
+            out[key] = (int(lo), int(hi or lo))
+        else:
+            raise ValueError(f"unknown hand filter {key!r} (use outcome, player, dealer, episode)")
+    return out
@@ -0,0 +1,239 @@
+"""
+Live training metrics exported over a localhost HTTP endpoint (Prometheus text format).
+
+LiveMetricsCallback keeps an immutable snapshot dict that is rebuilt by the
+training loop and swapped in with a single reference assignment; the HTTP
+server thread only reads that reference, so it never takes a lock the learner
+waits on. Each run advertises its endpoint in <run_dir>/live.json.
+
+CLI: poll all active runs under runs/ and print one table
+    python -m src.live_metrics --runs_dir runs [--watch 2]
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from stable_baselines3.common.callbacks import BaseCallback
+except Exception:  # CLI polling does not need SB3
+    BaseCallback = object
+
+LIVE_FILE = "live.json"
+LOSS_KEYS = ["train/loss", "train/value_loss", "train/policy_gradient_loss", "train/entropy_loss",
+             "train/policy_loss", "train/approx_kl", "train/explained_variance"]
+
+
+def to_prometheus(snapshot, prefix="drl"):
+    run = snapshot.get("run", "")
+    lines = []
+    for k, v in snapshot.items():
+        if not isinstance(v, (int, float)) or isinstance(v, bool):
+            continue
+        name = f"{prefix}_{k.replace('/', '_')}"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f'{name}{{run="{run}"}} {float(v)}')
+    return "\n".join(lines) + "\n"
+
+
+def parse_prometheus(text, prefix="drl"):
+    out = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        try:
+            name, val = line.rsplit(" ", 1)
+            name = name.split("{", 1)[0]
+            if name.startswith(prefix + "_"):
+                name = name[len(prefix) + 1:]
+            out[name] = float(val)
+        except ValueError:
+            continue
+    return out
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        cb = self.server.callback
+        snap = cb.snapshot  # single reference read; never blocks the learner
+        if self.path.startswith("/metrics"):
+            body = to_prometheus(snap).encode("utf-8")
+            ctype = "text/plain; version=0.0.4"
+        elif self.path.startswith("/json"):
+            body = json.dumps(snap).encode("utf-8")
+            ctype = "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LiveMetricsCallback(BaseCallback):
+    """
+    Serve throughput, rolling win/success rates and latest losses on
+    http://127.0.0.1:<port>/metrics while training. port=0 picks a free port.
+    The snapshot is refreshed every `update_every` steps and at rollout end.
+    """
+
+    def __init__(self, run_dir, port=0, host="127.0.0.1", window=100, update_every=256, verbose=0):
+        super().__init__(verbose)
+        self.run_dir = run_dir
+        self.port = int(port)
+        self.host = host
+        self.update_every = max(1, int(update_every))
+        self.wins = deque(maxlen=window)
+        self.successes = deque(maxlen=window)
+        self.returns = deque(maxlen=window)
+        self.losses = {}
+        self.snapshot = {"run": os.path.basename(os.path.normpath(run_dir))}
+        self._episodes = 0
+        self._ep_return = 0.0
+        self._t0 = None
+        self._last_t = None
+        self._last_steps = 0
+        self._last_eps = 0
+        self._server = None
+
+    def _on_training_start(self):
+        self._t0 = self._last_t = time.perf_counter()
+        self._last_steps = self.num_timesteps
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.callback = self
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        os.makedirs(self.run_dir, exist_ok=True)
+        with open(os.path.join(self.run_dir, LIVE_FILE), "w", encoding="utf-8") as f:
+            json.dump({"host": self.host, "port": self.port, "pid": os.getpid(), "started": time.time()}, f)
+        if self.verbose:
+            print(f"Live metrics on http://{self.host}:{self.port}/metrics")
+        self._publish()
+
+    def _on_step(self) -> bool:
+        rewards = self.locals.get("rewards", None)
+        dones = self.locals.get("dones", None)
+        infos = self.locals.get("infos", [])
+        if rewards is not None:
+            self._ep_return += float(rewards[0])
+        if dones is not None and bool(dones[0]):
+            info = infos[0] if infos else {}
+            self._episodes += 1
+            self.returns.append(self._ep_return)
+            self._ep_return = 0.0
+            if "win" in info:
+                self.wins.append(float(info["win"]))
+            if "success" in info:
+                self.successes.append(float(info["success"]))
+        if self.n_calls % self.update_every == 0:
+            self._publish()
+        return True
+
+    def _on_rollout_end(self):
+        # SB3 records train/* values in the logger after each update; grab them before dump clears them
+        logger = getattr(self.model, "logger", None)
+        values = getattr(logger, "name_to_value", {}) if logger is not None else {}
+        for k in LOSS_KEYS:
+            if k in values:
+                self.losses[k] = float(values[k])
+        self._publish()
+
+    def _publish(self):
+        now = time.perf_counter()
+        dt = max(1e-9, now - self._last_t)
+        elapsed = max(1e-9, now - self._t0)
+        snap = {
+            "run": self.snapshot.get("run", ""),
+            "timesteps": int(self.num_timesteps),
+            "episodes": int(self._episodes),
+            "elapsed_sec": elapsed,
+            "steps_per_sec": (self.num_timesteps - self._last_steps) / dt,
+            "episodes_per_sec": (self._episodes - self._last_eps) / dt,
+            "steps_per_sec_avg": self.num_timesteps / elapsed,
+        }
+        if self.returns:
+            snap["return_rolling"] = sum(self.returns) / len(self.returns)
+        if self.wins:
+            snap["win_rate_rolling"] = sum(self.wins) / len(self.wins)
+        if self.successes:
+            snap["success_rate_rolling"] = sum(self.successes) / len(self.successes)
+        snap.update(self.losses)
+        self._last_t, self._last_steps, self._last_eps = now, self.num_timesteps, self._episodes
+        self.snapshot = snap  # atomic reference swap
+
+    def _on_training_end(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        try:
+            os.remove(os.path.join(self.run_dir, LIVE_FILE))
+        except OSError:
+            pass
+
+
+def poll_runs(runs_dir, timeout=0.5):
+    rows = []
+    if not os.path.isdir(runs_dir):
+        return rows
+    for d in sorted(os.listdir(runs_dir)):
+        live = os.path.join(runs_dir, d, LIVE_FILE)
+        if not os.path.isfile(live):
+            continue
+        try:
+            with open(live, "r", encoding="utf-8") as f:
+                ep = json.load(f)
+            url = f"http://{ep.get('host', '127.0.0.1')}:{ep['port']}/metrics"
+            with urllib.request.urlopen(url, timeout=timeout) as r:
+                rows.append((d, parse_prometheus(r.read().decode("utf-8"))))
+        except Exception:
+            rows.append((d, None))
+    return rows
+
+
+def format_table(rows):
+    cols = [("timesteps", "steps", "{:.0f}"), ("steps_per_sec", "steps/s", "{:.0f}"),
+            ("episodes_per_sec", "eps/s", "{:.1f}"), ("return_rolling", "return", "{:.3f}"),
+            ("win_rate_rolling", "win", "{:.3f}"), ("success_rate_rolling", "success", "{:.3f}"),
+            ("train_loss", "loss", "{:.4f}")]
+    name_w = max([len("run")] + [len(n) for n, _ in rows])
+    header = "run".ljust(name_w) + "".join(h.rjust(10) for _, h, _ in cols)
+    lines = [header, "-" * len(header)]
+    for name, m in rows:
+        if m is None:
+            lines.append(name.ljust(name_w) + "unreachable".rjust(10))
+            continue
+        cells = [(fmt.format(m[k]) if k in m else "-").rjust(10) for k, _, fmt in cols]
+        lines.append(name.ljust(name_w) + "".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Poll live metrics of active training runs")
+    ap.add_argument("--runs_dir", default="runs")
+    ap.add_argument("--watch", type=float, default=0.0, help="Refresh every N seconds (0=print once)")
+    args = ap.parse_args()
+    while True:
+        rows = poll_runs(args.runs_dir)
+        if args.watch > 0:
+            print("\033[2J\033[H", end="")
+        print(format_table(rows) if rows else f"No active runs under {args.runs_dir}/")
+        if args.watch <= 0:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,8 @@ don’t break unrelated apps. Only import the specific env when used.
 from envs.formflow_env import FormFlowEnv
 from envs.blackjack_env import BlackjackEnv
 
-def make_env(app_cfg, persona_cfg):
+def make_env(app_cfg, persona_cfg, kernel=None):
+    # kernel: a RewardKernel to share with other envs of the same persona (FormFlow/Blackjack)
     weights = persona_cfg["weights"]
     app_id = app_cfg["id"]
     if app_id == "minigrid":
@@ -27,8 +28,11 @@ def make_env(app_cfg, persona_cfg):
             seed=app_cfg.get("seed", 7),
             reward_weights=weights,
             reward_scale=app_cfg.get("reward_scale", 1.0),
+            reward_kernel=kernel,
             invalid_prob=app_cfg.get("invalid_prob", 0.2),
             latency_spike_prob=app_cfg.get("latency_spike_prob", 0.05),
+            reward_components=app_cfg.get("reward_components", False),
+            instrument_counters=app_cfg.get("instrument_counters", None),
         )
     elif app_id == "tetris":
         # Lazy import to avoid hard dependency when not using Tetris
@@ -46,6 +50,7 @@ def make_env(app_cfg, persona_cfg):
             seed=app_cfg.get("seed", 7),
             reward_weights=weights,
             reward_scale=app_cfg.get("reward_scale", 1.0),
+            reward_kernel=kernel,
             num_decks=app_cfg.get("num_decks", 1),
             penetration=app_cfg.get("penetration", 0.75),
             rounds_per_episode=app_cfg.get("rounds_per_episode", 1),
@@ -58,6 +63,8 @@ def make_env(app_cfg, persona_cfg):
             dealer_hits_soft17=app_cfg.get("dealer_hits_soft17", False),
             allow_double=app_cfg.get("allow_double", True),
             bet_scaled_reward=app_cfg.get("bet_scaled_reward", False),
+            reward_components=app_cfg.get("reward_components", False),
+            instrument_counters=app_cfg.get("instrument_counters", None),
         )
     else:
         raise ValueError(f"Unknown app id: {app_id}")
@@ -1,6 +1,11 @@
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from src.build_cache import BuildCache
+
+# Bump when GIF encoding changes so existing GIFs are rebuilt
+GIF_VERSION = 1
 
 def find_eval_dirs(runs_dir: Path):
     for run in runs_dir.glob('*'):
@@ -21,49 +26,85 @@ def group_frames(eval_dir: Path, pattern: str):
     return buckets
 
 def save_gif(frames, out_path: Path, fps: int):
+    # Frames are decoded and appended one at a time; only the current frame is in memory
+    from PIL import Image
+    from src.recorder import GifStreamWriter
+    out_path = Path(out_path)
+    tmp = out_path.with_name(out_path.name + '.part')
+    writer = GifStreamWriter(str(tmp), fps=fps)
     try:
-        import imageio
-    except Exception as e:
-        print(f"[WARN] imageio not available; cannot write GIF: {out_path}")
-        print("       Install via: pip install imageio")
-        return False
-    images = []
-    for f in frames:
-        try:
-            images.append(imageio.v2.imread(f))
-        except Exception as e:
-            print(f"[WARN] cannot read frame {f}: {e}")
-    if not images:
+        for f in frames:
+            try:
+                with Image.open(f) as im:
+                    writer.append(im.convert('RGB'))
+            except Exception as e:
+                print(f"[WARN] cannot read frame {f}: {e}")
+    finally:
+        writer.close()
+    if not writer.frames:
         print(f"[WARN] no readable frames for {out_path}")
+        tmp.unlink(missing_ok=True)
         return False
-    imageio.mimsave(out_path, images, fps=fps)
+    # Atomic swap so an interrupted run never leaves a truncated GIF that looks up to date
+    os.replace(tmp, out_path)
     return True
 
+def _gif_job(job):
+    files, out_gif, fps = job
+    try:
+        return out_gif, save_gif(files, out_gif, fps)
+    except Exception as e:
+        print(f"[WARN] GIF failed for {out_gif}: {e}")
+        return out_gif, False
+
+def stale_episodes(eval_dir: Path, pattern: str, fps: int, force=False):
+    """(cache, [(frames, out_gif, fps)]) for episodes whose frames changed since their GIF was written."""
+    cache = BuildCache(eval_dir.parent)
+    key = f"{GIF_VERSION}:{fps}"
+    jobs = []
+    for name, files in group_frames(eval_dir, pattern).items():
+        out_gif = eval_dir / f"{name}.gif"
+        if force or not cache.is_fresh(f"eval/{out_gif.name}", files, key=key, output=out_gif):
+            jobs.append((files, out_gif, fps))
+    return cache, jobs
+
 def main():
     ap = argparse.ArgumentParser(description='Batch convert eval PNG frames to GIFs under runs/*/eval')
     ap.add_argument('--runs_dir', default='runs')
     ap.add_argument('--pattern', default='episode_*_frame_*.png')
     ap.add_argument('--fps', type=int, default=10)
-    ap.add_argument('--overwrite', action='store_true')
+    ap.add_argument('--workers', type=int, default=None, help='Encoding processes (default: CPU count)')
+    ap.add_argument('--force', action='store_true', help='Rebuild GIFs even if their frames are unchanged')
     args = ap.parse_args()
 
     runs_dir = Path(args.runs_dir)
     if not runs_dir.exists():
         raise SystemExit(f"Runs dir not found: {runs_dir}")
 
-    converted = 0
+    # Up-to-date checks (frame hashes memoized on size/mtime) stay in this process;
+    # only stale episodes reach the pool, and the cache is written back here
+    caches, jobs = {}, []
     for ed in find_eval_dirs(runs_dir):
-        buckets = group_frames(ed, args.pattern)
-        for key, files in buckets.items():
-            out_gif = ed / f"{key}.gif"
-            if out_gif.exists() and not args.overwrite:
-                continue
-            ok = save_gif(files, out_gif, args.fps)
-            if ok:
-                converted += 1
-                print(f"[OK] {out_gif}")
-    print(f"Converted {converted} episode(s) to GIFs.")
+        cache, stale = stale_episodes(ed, args.pattern, args.fps, args.force)
+        caches[ed] = cache
+        jobs += stale
+    workers = args.workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        results = [_gif_job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            results = list(ex.map(_gif_job, jobs))
+
+    converted = 0
+    key = f"{GIF_VERSION}:{args.fps}"
+    for (files, _, _), (out_gif, ok) in zip(jobs, results):
+        if ok:
+            caches[out_gif.parent].record(f"eval/{out_gif.name}", files, key=key)
+            converted += 1
+            print(f"[OK] {out_gif}")
+    for cache in caches.values():
+        cache.save()
+    print(f"Converted {converted} episode(s) to GIFs ({len(jobs) - converted} failed, others up to date).")
 
 if __name__ == '__main__':
     main()
-
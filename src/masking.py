@@ -0,0 +1,75 @@
+"""
+Masked policy path for training and evaluation.
+
+BlackjackEnv and FormFlowEnv report which actions do something in the current
+state through env.action_masks() (also info["action_mask"]). Training with
+--mask_actions uses sb3-contrib's MaskablePPO behind an ActionMasker, so
+rollouts never sample a masked action and no timesteps go to no-ops.
+Evaluation applies the same masks to any saved discrete policy (PPO, A2C or
+MaskablePPO) through masked_predict(), as does the viewer's PolicyWorker.
+sb3-contrib is only imported when masking is requested.
+"""
+
+import json
+import os
+import numpy as np
+
+
+def maskable_ppo():
+    try:
+        from sb3_contrib import MaskablePPO
+    except ImportError as e:
+        raise ImportError("--mask_actions needs sb3-contrib (pip install sb3-contrib)") from e
+    return MaskablePPO
+
+
+def _env_masks(env):
+    return env.unwrapped.action_masks()
+
+
+def with_action_masker(env):
+    """Wrap a single env so MaskablePPO can query its valid-action mask."""
+    from sb3_contrib.common.wrappers import ActionMasker
+    return ActionMasker(env, _env_masks)
+
+
+def vec_action_masks(venv):
+    """(n_envs, n_actions) masks of a DummyVecEnv's sub-envs."""
+    return np.stack([_env_masks(e) for e in venv.envs])
+
+
+def is_maskable(model):
+    try:
+        from sb3_contrib import MaskablePPO
+    except ImportError:
+        return False
+    return isinstance(model, MaskablePPO)
+
+
+def masked_predict(model, obs, masks, deterministic=True):
+    """model.predict() restricted to actions where `masks` is True; same return shape as predict()."""
+    if is_maskable(model):
+        return model.predict(obs, deterministic=deterministic, action_masks=masks)
+    import torch
+    policy = model.policy
+    policy.set_training_mode(False)
+    obs_t, vectorized = policy.obs_to_tensor(obs)
+    with torch.no_grad():
+        logits = policy.get_distribution(obs_t).distribution.logits
+        valid = torch.as_tensor(np.asarray(masks, dtype=bool), device=logits.device).reshape(logits.shape)
+        logits = logits.masked_fill(~valid, float("-inf"))
+        if deterministic:
+            actions = logits.argmax(dim=-1)
+        else:
+            actions = torch.distributions.Categorical(logits=logits).sample()
+    actions = actions.cpu().numpy()
+    return (actions if vectorized else actions[0]), None
+
+
+def trained_with_masks(run_dir):
+    """True if the run's config.json records a --mask_actions training run."""
+    path = os.path.join(run_dir, "config.json")
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        return bool(json.load(f).get("mask_actions", False))
@@ -2,6 +2,9 @@ import os, csv, json
 from stable_baselines3.common.callbacks import BaseCallback
 from collections import defaultdict
 
+# Per-step arrays in info (reward components, valid-action mask); not aggregated into episodes.csv
+VECTOR_INFO_KEYS = {"reward_components", "action_mask"}
+
 class EpisodeLogger(BaseCallback):
     def __init__(self, out_dir, verbose=0):
         super().__init__(verbose)
@@ -24,6 +27,8 @@ class EpisodeLogger(BaseCallback):
         if infos:
             last_info = infos[0]
             for k,v in last_info.items():
+                if k in VECTOR_INFO_KEYS:
+                    continue
                 self.buffer_infos[k].append(v)
         if dones is not None and bool(dones):
             agg = {}
@@ -53,7 +58,9 @@ class EpisodeLogger(BaseCallback):
             self.buffer_infos.clear()
         return True
 
-def aggregate_csv(csv_path, out_json):
+SKETCH_COLUMNS = ["return", "length", "bankroll"]
+
+def aggregate_csv(csv_path, out_json, window=1000, last_n=100):
     import pandas as pd
     df = pd.read_csv(csv_path)
     agg = {
@@ -67,4 +74,65 @@ def aggregate_csv(csv_path, out_json):
             agg[col+"_mean"] = float(df[col].mean())
     with open(out_json, "w", encoding="utf-8") as f:
         json.dump(agg, f, indent=2)
+    # Per-window summaries (rolling means + mergeable sketches) next to aggregate.json
+    summarize_windows(df, os.path.join(os.path.dirname(out_json), "windows.json"), window=window, last_n=last_n)
     return agg
+
+def summarize_windows(df, out_json, window=1000, last_n=100, alpha=0.01):
+    """
+    Write per-window episode summaries: means of numeric columns for each
+    consecutive block of `window` episodes, the last-`last_n` rolling means,
+    and QuantileSketch dicts for return/length/bankroll per window. Window
+    sketches can be merged across windows, seeds and runs (see merge_windows).
+    """
+    import pandas as pd
+    from src.sketches import QuantileSketch
+    num_cols = [c for c in df.columns if c != "episode" and pd.api.types.is_numeric_dtype(df[c])]
+    sk_cols = [c for c in SKETCH_COLUMNS if c in num_cols]
+    window = max(1, int(window))
+    windows = []
+    for start in range(0, len(df), window):
+        chunk = df.iloc[start:start + window]
+        sketches = {c: QuantileSketch(alpha=alpha).add_many(chunk[c].to_numpy()).to_dict() for c in sk_cols}
+        windows.append({
+            "start": int(start),
+            "end": int(start + len(chunk)),
+            "means": {c: float(chunk[c].mean()) for c in num_cols},
+            "sketches": sketches,
+        })
+    tail = df.tail(max(1, int(last_n)))
+    out = {
+        "episodes": int(len(df)),
+        "window": window,
+        "last_n": int(last_n),
+        "last_means": {c: float(tail[c].mean()) for c in num_cols} if len(df) else {},
+        "windows": windows,
+    }
+    with open(out_json, "w", encoding="utf-8") as f:
+        json.dump(out, f)
+    return out
+
+def merge_windows(paths, columns=None, last_windows=None, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """
+    Merge window sketches from one or more windows.json files (e.g. all seeds
+    of a config) and return {column: {"count", "mean", "p5", ...}}.
+    If last_windows is set, only the trailing windows of each file are used.
+    """
+    from src.sketches import merge_sketches
+    per_col = defaultdict(list)
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        wins = data.get("windows", [])
+        if last_windows:
+            wins = wins[-int(last_windows):]
+        for w in wins:
+            for c, sk in w.get("sketches", {}).items():
+                if columns is None or c in columns:
+                    per_col[c].append(sk)
+    out = {}
+    for c, sks in per_col.items():
+        m = merge_sketches(sks)
+        out[c] = {"count": m.count, "mean": m.mean}
+        out[c].update(m.quantiles(qs))
+    return out
@@ -0,0 +1,216 @@
+"""
+Per-phase wall-time instrumentation for training runs.
+
+Phases (collected into one PhaseTimer and written to <run_dir>/perf.json):
+  - env_step:   BlackjackEnv/FormFlowEnv step+reset time (TimedEnv wrapper)
+  - inference:  rest of each rollout step (policy forward, buffer add, SB3 bookkeeping)
+  - callbacks:  time spent in wrapped callbacks such as EpisodeLogger (TimedCallback)
+  - update:     gradient update epochs + log dump between rollouts
+"""
+
+import os
+import json
+import time
+import gymnasium as gym
+from stable_baselines3.common.callbacks import BaseCallback
+from src.sketches import QuantileSketch
+
+_now = time.perf_counter
+
+
+class PhaseTimer:
+    """Accumulate durations per phase; percentiles come from a QuantileSketch fed in batches."""
+
+    def __init__(self, flush_every=4096, alpha=0.01):
+        self.flush_every = int(flush_every)
+        self.alpha = alpha
+        self.totals = {}
+        self.counts = {}
+        self._pending = {}
+        self._sketches = {}
+
+    def add(self, phase, dt):
+        self.totals[phase] = self.totals.get(phase, 0.0) + dt
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        buf = self._pending.get(phase)
+        if buf is None:
+            buf = self._pending[phase] = []
+        buf.append(dt)
+        if len(buf) >= self.flush_every:
+            self._flush(phase)
+
+    def _flush(self, phase):
+        buf = self._pending.get(phase)
+        if not buf:
+            return
+        sk = self._sketches.get(phase)
+        if sk is None:
+            sk = self._sketches[phase] = QuantileSketch(alpha=self.alpha)
+        sk.add_many(buf)
+        buf.clear()
+
+    def summary(self):
+        out = {}
+        for phase in self.totals:
+            self._flush(phase)
+            sk = self._sketches.get(phase)
+            n = self.counts[phase]
+            row = {
+                "total_sec": self.totals[phase],
+                "count": n,
+                "mean_ms": 1000.0 * self.totals[phase] / max(1, n),
+            }
+            if sk is not None:
+                for q in (0.5, 0.9, 0.99):
+                    v = sk.quantile(q)
+                    row[f"p{int(q * 100)}_ms"] = None if v is None else 1000.0 * v
+            out[phase] = row
+        return out
+
+
+class TimedEnv(gym.Wrapper):
+    """Time every env.step/env.reset into `timer` under `phase`."""
+
+    def __init__(self, env, timer, phase="env_step"):
+        super().__init__(env)
+        self.timer = timer
+        self.phase = phase
+
+    def step(self, action):
+        t0 = _now()
+        out = self.env.step(action)
+        self.timer.add(self.phase, _now() - t0)
+        return out
+
+    def reset(self, **kwargs):
+        t0 = _now()
+        out = self.env.reset(**kwargs)
+        self.timer.add(self.phase, _now() - t0)
+        return out
+
+
+class TimedCallback(BaseCallback):
+    """Wrap another callback and time its on_step into `timer` under `phase`."""
+
+    def __init__(self, callback, timer, phase="callbacks"):
+        super().__init__(callback.verbose)
+        self.callback = callback
+        self.timer = timer
+        self.phase = phase
+
+    def init_callback(self, model):
+        super().init_callback(model)
+        self.callback.init_callback(model)
+
+    def _on_training_start(self):
+        self.callback.on_training_start(self.locals, self.globals)
+
+    def _on_rollout_start(self):
+        self.callback.on_rollout_start()
+
+    def _on_step(self) -> bool:
+        t0 = _now()
+        ok = self.callback.on_step()
+        self.timer.add(self.phase, _now() - t0)
+        return ok
+
+    def _on_rollout_end(self):
+        self.callback.on_rollout_end()
+
+    def _on_training_end(self):
+        self.callback.on_training_end()
+
+    def update_child_locals(self, locals_):
+        self.callback.update_locals(locals_)
+
+
+class PerfCallback(BaseCallback):
+    """
+    Attribute rollout/update wall time to phases and write perf.json at the end.
+    Must come after any TimedCallback in the callback list so that per-step
+    inference time can be derived as (step interval - env time - callback time).
+    """
+
+    def __init__(self, run_dir, timer, env_phase="env_step", callback_phase="callbacks", verbose=0):
+        super().__init__(verbose)
+        self.run_dir = run_dir
+        self.timer = timer
+        self.env_phase = env_phase
+        self.callback_phase = callback_phase
+        self.throughput = []
+        self._t0 = None
+        self._update_t0 = None
+        self._step_t = None
+        self._marks = (0.0, 0.0)
+        self._rollout_t0 = None
+        self._rollout_steps0 = 0
+
+    def _phase_totals(self):
+        return (self.timer.totals.get(self.env_phase, 0.0), self.timer.totals.get(self.callback_phase, 0.0))
+
+    def _on_training_start(self):
+        self._t0 = _now()
+
+    def _on_rollout_start(self):
+        now = _now()
+        if self._update_t0 is not None:
+            self.timer.add("update", now - self._update_t0)
+            self._update_t0 = None
+        self._rollout_t0 = now
+        self._rollout_steps0 = self.num_timesteps
+        self._step_t = now
+        self._marks = self._phase_totals()
+
+    def _on_step(self) -> bool:
+        now = _now()
+        env_t, cb_t = self._phase_totals()
+        other = (env_t - self._marks[0]) + (cb_t - self._marks[1])
+        self.timer.add("inference", max(0.0, (now - self._step_t) - other))
+        # Our own bookkeeping is charged to the next interval; keep it tiny
+        self._step_t = _now()
+        self._marks = (env_t, cb_t)
+        return True
+
+    def _on_rollout_end(self):
+        now = _now()
+        dt = max(1e-9, now - self._rollout_t0)
+        self.timer.add("rollout", dt)
+        self.throughput.append({
+            "elapsed_sec": now - self._t0,
+            "timesteps": int(self.num_timesteps),
+            "steps_per_sec": (self.num_timesteps - self._rollout_steps0) / dt,
+        })
+        self._update_t0 = now
+
+    def _on_training_end(self):
+        now = _now()
+        if self._update_t0 is not None:
+            self.timer.add("update", now - self._update_t0)
+            self._update_t0 = None
+        self.write(now - self._t0, extra=self._env_counters())
+
+    def _env_counters(self):
+        # Lifetime hot-path counters from instrumented envs (envs/instrumentation.py)
+        from envs.instrumentation import sum_counters
+        try:
+            counters = sum_counters(self.training_env.get_attr("counters"))
+        except Exception:
+            return None
+        return {"env_counters": counters} if counters else None
+
+    def write(self, wall_sec, extra=None):
+        out = {
+            "wall_sec": wall_sec,
+            "timesteps": int(self.num_timesteps),
+            "steps_per_sec": self.num_timesteps / max(1e-9, wall_sec),
+            "phases": self.timer.summary(),
+            "throughput": self.throughput,
+        }
+        if extra:
+            out.update(extra)
+        os.makedirs(self.run_dir, exist_ok=True)
+        with open(os.path.join(self.run_dir, "perf.json"), "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+        if self.verbose:
+            print("Perf summary written to", os.path.join(self.run_dir, "perf.json"))
+        return out
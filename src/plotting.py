@@ -0,0 +1,133 @@
+"""
+In-process plotting engine shared by the report builders.
+
+Each run's episodes.csv is read once and all of its figures (return curve +
+metric histograms) are drawn with the Agg backend. Return curves are drawn
+from the cached multi-resolution summaries in curves.npz (src/curves.py), so
+their cost does not grow with the number of episodes. Runs are spread across a
+process pool so pandas/matplotlib are imported once per worker instead of
+once per plot. Plots are rebuilt only when the content hash of their
+input episodes.csv changes (see src/build_cache.py).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from src.build_cache import BuildCache
+from src.curves import ensure_curves, pick_level
+
+# Bump when figure styling changes so cached plots are redrawn
+PLOT_VERSION = 2
+# Windows per curve; roughly one per horizontal pixel of a 150 dpi figure
+CURVE_POINTS = 1024
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def draw_learning(summary, out_png, plt=None, points=CURVE_POINTS):
+    """Draw a return curve from a curves.npz summary: min/max band, windowed mean and LTTB points."""
+    plt = plt or _pyplot()
+    lv = pick_level(summary, points)
+    fig, ax = plt.subplots()
+    ax.fill_between(lv['x'], lv['min'], lv['max'], color='tab:blue', alpha=0.15, linewidth=0, label='min/max')
+    ax.plot(lv['lttb_x'], lv['lttb_y'], color='tab:blue', alpha=0.35, linewidth=0.6, label='episodes (LTTB)')
+    ax.plot(lv['x'], lv['mean'], color='tab:blue', linewidth=1.4, label='window mean')
+    ax.set_title('Episode Returns')
+    ax.legend(loc='lower right', fontsize='small')
+    ax.set_xlabel('Episode')
+    ax.set_ylabel('Return')
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=150)
+    plt.close(fig)
+
+
+def draw_metric_hist(df, metric, out_png, plt=None):
+    plt = plt or _pyplot()
+    fig, ax = plt.subplots()
+    df[metric].plot(kind='hist', bins=30, title=f'{metric} distribution', ax=ax)
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=150)
+    plt.close(fig)
+
+
+def stale_targets(run_dir, metrics=(), overwrite=False, cache=None):
+    """List (metric, out_png) whose episodes.csv hash differs from the one they were drawn from."""
+    run_dir = Path(run_dir)
+    csv = run_dir / 'episodes.csv'
+    if not csv.exists():
+        return []
+    cache = cache or BuildCache(run_dir)
+    targets = [('return', run_dir / 'return_curve.png')]
+    targets += [(m, run_dir / f'{m}_hist.png') for m in metrics]
+    todo = []
+    for m, out in targets:
+        # Metrics missing from the CSV are recorded as 'skipped' so they are not re-checked every build
+        skipped = cache.data(out.name) == 'skipped'
+        if overwrite or not cache.is_fresh(out.name, [csv], key=PLOT_VERSION, output=None if skipped else out):
+            todo.append((m, out))
+    cache.save()
+    return todo
+
+
+def plot_run(run_dir, metrics=(), overwrite=False):
+    """Draw return_curve.png and <metric>_hist.png for one run dir. Returns the paths written."""
+    import pandas as pd
+    run_dir = Path(run_dir)
+    csv = run_dir / 'episodes.csv'
+    cache = BuildCache(run_dir)
+    todo = stale_targets(run_dir, metrics, overwrite, cache)
+    if not todo:
+        return []
+    # Summaries cover every series so metric curves are cached for other consumers too
+    curves = ensure_curves(run_dir, ['return', 'length'] + list(metrics), cache=cache) or {}
+    wanted = {m for m, _ in todo if m != 'return'}
+    df = pd.read_csv(csv, usecols=lambda c: c in wanted) if wanted else pd.DataFrame()
+    plt = _pyplot()
+    written = []
+    for m, out in todo:
+        if (m == 'return' and m not in curves) or (m != 'return' and m not in df.columns):
+            cache.record(out.name, [csv], key=PLOT_VERSION, data='skipped')
+            continue
+        try:
+            if m == 'return':
+                draw_learning(curves['return'], out, plt)
+            else:
+                draw_metric_hist(df, m, out, plt)
+            cache.record(out.name, [csv], key=PLOT_VERSION)
+            written.append(str(out))
+        except Exception as e:
+            print(f"[WARN] plot failed for {out}: {e}")
+    cache.save()
+    return written
+
+
+def _plot_job(job):
+    run_dir, metrics, overwrite = job
+    try:
+        return plot_run(run_dir, metrics, overwrite)
+    except Exception as e:
+        print(f"[WARN] plotting failed for {run_dir}: {e}")
+        return []
+
+
+def plot_runs(jobs, workers=None, overwrite=False):
+    """
+    Plot many runs. jobs: iterable of (run_dir, metrics). workers=None uses
+    os.cpu_count(); workers<=1 plots serially in this process.
+    """
+    # Cheap stat-based freshness check here so up-to-date runs never reach the pool
+    jobs = [(str(rd), list(ms), overwrite) for rd, ms in jobs if stale_targets(rd, ms, overwrite)]
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) == 1:
+        results = [_plot_job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            results = list(ex.map(_plot_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    return [p for r in results for p in r]
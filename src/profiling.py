@@ -0,0 +1,211 @@
+"""
+Optional profiling for the train/eval/viewer entry points.
+
+Modes:
+  - cprofile: deterministic cProfile; writes profile.pstats + profile_top.txt
+  - sample:   low-overhead stack sampler (SIGPROF timer on POSIX, watcher thread
+              elsewhere); writes profile.collapsed (flamegraph.pl / speedscope
+              ready) + profile_top.txt
+
+Profiling covers the whole run, or only a timestep window when started and
+stopped through ProfileCallback / Profiler.step().
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+from collections import Counter
+
+PROFILE_MODES = ["off", "cprofile", "sample"]
+
+
+def add_profile_args(p):
+    p.add_argument("--profile", default="off", choices=PROFILE_MODES, help="Profile the run (cprofile or stack sampling)")
+    p.add_argument("--profile_window", default=None, help="Only profile timesteps START:END (e.g. 50000:60000)")
+    p.add_argument("--profile_interval_ms", type=float, default=5.0, help="Sampling interval for --profile sample")
+    p.add_argument("--profile_top", type=int, default=30, help="Number of hot functions in profile_top.txt")
+
+
+def parse_window(text):
+    if not text:
+        return None
+    start, _, end = text.partition(":")
+    return (int(start) if start else 0, int(end) if end else None)
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Collect collapsed stacks of the main thread every `interval` seconds."""
+
+    def __init__(self, interval=0.005):
+        self.interval = float(interval)
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._main_id = threading.main_thread().ident
+        self._use_signal = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+        self._prev_handler = None
+
+    def _record(self, frame):
+        parts = []
+        while frame is not None:
+            parts.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        if parts:
+            parts.reverse()
+            self.stacks[";".join(parts)] += 1
+            self.samples += 1
+
+    def _on_signal(self, signum, frame):
+        self._record(frame)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._main_id)
+            self._record(frame)
+
+    def start(self):
+        if self._use_signal:
+            self._prev_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._use_signal:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._prev_handler or signal.SIG_DFL)
+        elif self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def top(self, n=30):
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, c in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += c
+            for f in set(frames):
+                total_counts[f] += c
+        return self_counts.most_common(n), total_counts.most_common(n)
+
+
+class Profiler:
+    """Start/stop a profiler and write its output into out_dir."""
+
+    def __init__(self, mode, out_dir, window=None, interval_ms=5.0, top_n=30):
+        self.mode = mode
+        self.out_dir = out_dir
+        self.window = window
+        self.interval = interval_ms / 1000.0
+        self.top_n = int(top_n)
+        self.active = False
+        self.finished = False
+        self._impl = None
+        self._t0 = None
+        self.wall_sec = 0.0
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def start(self):
+        if not self.enabled or self.active or self.finished:
+            return
+        if self.mode == "cprofile":
+            import cProfile
+            self._impl = cProfile.Profile()
+            self._impl.enable()
+        else:
+            self._impl = StackSampler(self.interval)
+            self._impl.start()
+        self._t0 = time.perf_counter()
+        self.active = True
+
+    def stop(self):
+        if not self.active:
+            return
+        if self.mode == "cprofile":
+            self._impl.disable()
+        else:
+            self._impl.stop()
+        self.wall_sec += time.perf_counter() - self._t0
+        self.active = False
+        self.finished = True
+        self.write()
+
+    def step(self, t):
+        """Drive the timestep window: call with the current timestep count."""
+        if not self.enabled or self.finished:
+            return
+        start, end = self.window or (0, None)
+        if not self.active and t >= start:
+            self.start()
+        elif self.active and end is not None and t >= end:
+            self.stop()
+
+    def write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        top_path = os.path.join(self.out_dir, "profile_top.txt")
+        header = f"mode={self.mode} window={self.window} wall_sec={self.wall_sec:.2f}\n"
+        if self.mode == "cprofile":
+            import io
+            import pstats
+            self._impl.dump_stats(os.path.join(self.out_dir, "profile.pstats"))
+            buf = io.StringIO()
+            st = pstats.Stats(self._impl, stream=buf)
+            st.sort_stats("tottime").print_stats(self.top_n)
+            st.sort_stats("cumulative").print_stats(self.top_n)
+            with open(top_path, "w", encoding="utf-8") as f:
+                f.write(header + buf.getvalue())
+        else:
+            s = self._impl
+            with open(os.path.join(self.out_dir, "profile.collapsed"), "w", encoding="utf-8") as f:
+                for stack, c in s.stacks.most_common():
+                    f.write(f"{stack} {c}\n")
+            self_top, total_top = s.top(self.top_n)
+            n = max(1, s.samples)
+            lines = [header.rstrip("\n") + f" samples={s.samples} interval_ms={s.interval * 1000:.1f}", "", "Self time:"]
+            lines += [f"{100.0 * c / n:6.2f}%  {c:8d}  {fn}" for fn, c in self_top]
+            lines += ["", "Inclusive time:"]
+            lines += [f"{100.0 * c / n:6.2f}%  {c:8d}  {fn}" for fn, c in total_top]
+            with open(top_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        print("Profile written to", self.out_dir)
+
+
+def profiler_from_args(args, out_dir):
+    return Profiler(args.profile, out_dir, window=parse_window(args.profile_window),
+                    interval_ms=args.profile_interval_ms, top_n=args.profile_top)
+
+
+try:
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class ProfileCallback(BaseCallback):
+        """Start/stop a Profiler over a timestep window during model.learn()."""
+
+        def __init__(self, profiler, verbose=0):
+            super().__init__(verbose)
+            self.profiler = profiler
+
+        def _on_training_start(self):
+            self.profiler.step(self.num_timesteps)
+
+        def _on_step(self) -> bool:
+            self.profiler.step(self.num_timesteps)
+            return True
+
+        def _on_training_end(self):
+            self.profiler.stop()
+except Exception:  # viewer profiling does not need SB3
+    ProfileCallback = None
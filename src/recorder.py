@@ -0,0 +1,250 @@
+"""
+Streaming episode recorders for eval/viewer captures.
+
+Frames are encoded as they arrive instead of being collected in a list:
+  - GifStreamWriter appends one GIF image block per frame (each frame is
+    quantized by Pillow and written with its own local palette), so memory
+    stays at one frame regardless of episode length.
+  - MP4 goes through imageio's ffmpeg writer (requires imageio-ffmpeg).
+  - PNG writes one numbered file per frame (for src/make_gifs.py workflows).
+
+FrameRecorder adds frame stride, max-duration/max-frames limits and an
+optional background encoder thread on top of any writer.
+"""
+
+import io
+import queue
+import struct
+import threading
+import numpy as np
+
+FORMATS = ("gif", "mp4", "png")
+
+
+class GifStreamWriter:
+    """Incremental animated-GIF writer; frames are HxWx3 (or HxW) uint8 arrays."""
+
+    def __init__(self, path, fps=10, loop=0, colors=256):
+        self.path = path
+        self.delay = max(1, int(round(100.0 / max(fps, 1e-6))))  # centiseconds
+        self.loop = loop
+        self.colors = colors
+        self.frames = 0
+        self._f = open(path, "wb")
+
+    def _header(self, w, h):
+        # Logical screen without a global palette; every frame carries a local one
+        self._f.write(b"GIF89a" + struct.pack("<HHBBB", w, h, 0x70, 0, 0))
+        if self.loop is not None:
+            self._f.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+
+    def append(self, frame):
+        from PIL import Image
+        arr = np.asarray(frame)
+        if arr.dtype != np.uint8:
+            arr = np.clip(arr, 0, 255).astype(np.uint8)
+        im = Image.fromarray(arr)
+        if im.mode != "P":
+            # Fast octree keeps per-frame quantization in the low milliseconds
+            im = im.convert("RGB").quantize(colors=self.colors, method=Image.Quantize.FASTOCTREE)
+        buf = io.BytesIO()
+        im.save(buf, format="GIF")
+        data = buf.getvalue()
+        w, h, flags = struct.unpack("<HHB", data[6:11])
+        pos = 13
+        gct = b""
+        if flags & 0x80:
+            n = 3 * (2 ** ((flags & 0x07) + 1))
+            gct, pos = data[pos:pos + n], pos + n
+        if self.frames == 0:
+            self._header(w, h)
+        out = self._f
+        while pos < len(data):
+            block = data[pos]
+            if block == 0x21:  # extension: drop Pillow's, we write our own graphic control block
+                pos += 2
+                while data[pos]:
+                    pos += data[pos] + 1
+                pos += 1
+            elif block == 0x2C:  # image descriptor (+ optional local palette) + LZW data
+                desc = bytearray(data[pos:pos + 10])
+                packed = desc[9]
+                start = pos + 10
+                if packed & 0x80:
+                    start += 3 * (2 ** ((packed & 0x07) + 1))
+                    table = data[pos + 10:start]
+                else:
+                    desc[9] = 0x80 | (packed & 0x40) | (flags & 0x07)
+                    table = gct
+                end = start + 1
+                while data[end]:
+                    end += data[end] + 1
+                end += 1
+                out.write(b"\x21\xF9\x04\x04" + struct.pack("<H", self.delay) + b"\x00\x00")
+                out.write(bytes(desc) + table + data[start:end])
+                pos = end
+            else:  # 0x3B trailer
+                break
+        self.frames += 1
+
+    def close(self):
+        if self._f.closed:
+            return
+        if self.frames:
+            self._f.write(b"\x3B")
+        self._f.close()
+
+
+class PngFramesWriter:
+    """Writes <prefix>_frame_001.png, ... one file per frame."""
+
+    def __init__(self, prefix, fps=None):
+        self.prefix = prefix
+        self.frames = 0
+
+    def append(self, frame):
+        from PIL import Image
+        self.frames += 1
+        Image.fromarray(np.asarray(frame, dtype=np.uint8)).save(f"{self.prefix}_frame_{self.frames:03d}.png")
+
+    def close(self):
+        pass
+
+
+class _ImageioWriter:
+    def __init__(self, path, fps=10):
+        import imageio.v2 as iio
+        self._w = iio.get_writer(path, fps=fps, macro_block_size=1)
+        self.frames = 0
+
+    def append(self, frame):
+        self._w.append_data(np.asarray(frame))
+        self.frames += 1
+
+    def close(self):
+        self._w.close()
+
+
+def open_writer(base, fmt="gif", fps=10):
+    """Open a streaming writer for `base` (path without extension). Falls back to GIF if MP4 is unavailable."""
+    if fmt == "png":
+        return PngFramesWriter(base, fps), f"{base}_frame_*.png"
+    if fmt == "mp4":
+        try:
+            return _ImageioWriter(base + ".mp4", fps), base + ".mp4"
+        except Exception as e:  # imageio-ffmpeg missing
+            print(f"[WARN] MP4 writer unavailable ({e}); recording GIF instead")
+    return GifStreamWriter(base + ".gif", fps), base + ".gif"
+
+
+class FrameRecorder:
+    """
+    Streams frames into a writer with stride and duration limits.
+
+    stride: keep every Nth frame (the final frame of an episode is always kept)
+    max_seconds / max_frames: stop recording once the clip reaches this length
+    background: encode on a worker thread fed by a bounded queue
+    block: when the queue is full, wait for the encoder (True) or drop the frame (False)
+    """
+
+    def __init__(self, base, fmt="gif", fps=10, stride=1, max_seconds=None, max_frames=None,
+                 background=False, queue_size=32, block=True):
+        self.base = base
+        self.fmt = fmt
+        self.fps = fps
+        self.stride = max(1, int(stride))
+        limits = [n for n in (max_frames, int(max_seconds * fps) if max_seconds else None) if n]
+        self.max_frames = min(limits) if limits else None
+        self.seen = 0
+        self.kept = 0
+        self.dropped = 0
+        self.block = block
+        self.path = None
+        self._writer = None
+        self._pending = None  # last skipped frame, flushed on close
+        self._error = None
+        self._queue = queue.Queue(maxsize=queue_size) if background else None
+        self._thread = None
+
+    @property
+    def full(self):
+        return self.max_frames is not None and self.kept >= self.max_frames
+
+    def _write(self, frame):
+        if self._writer is None:
+            self._writer, self.path = open_writer(self.base, self.fmt, self.fps)
+        self._writer.append(frame)
+
+    def _worker(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            if self._error is None:
+                try:
+                    self._write(frame)
+                except Exception as e:
+                    self._error = e
+
+    def _submit(self, frame):
+        if self._queue is None:
+            self.kept += 1
+            self._write(frame)
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="frame-encoder", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put(frame, block=self.block)  # blocks when the encoder falls behind
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.kept += 1
+
+    def add(self, frame):
+        """Offer one rendered frame; returns True if it was queued for encoding."""
+        if frame is None or self.full:
+            return False
+        i = self.seen
+        self.seen += 1
+        if i % self.stride:
+            self._pending = frame
+            return False
+        self._pending = None
+        self._submit(frame)
+        return True
+
+    def capture(self, render, last=False):
+        """Call render() only when the frame will be kept (stride/limits); `last` forces the episode's final frame."""
+        if self.full:
+            return False
+        i = self.seen
+        self.seen += 1
+        if i % self.stride and not last:
+            return False
+        frame = render()
+        if frame is None:
+            return False
+        self._submit(frame)
+        return True
+
+    def close(self):
+        """Flush and finalize the file; returns its path (None if nothing was recorded)."""
+        if self._pending is not None and not self.full:
+            self._submit(self._pending)
+            self._pending = None
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._writer is not None:
+            self._writer.close()
+        if self._error is not None:
+            raise self._error
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
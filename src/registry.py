@@ -0,0 +1,263 @@
+"""
+SQLite run registry (runs/registry.sqlite) replacing directory scans and run-name parsing.
+
+train.py and eval.py register runs transactionally with metadata, config hash,
+artifact paths and aggregate metrics. Readers query the index instead of
+listing runs/ and opening every aggregate.json/config.json. Before answering
+queries, open_registry() lists runs/*/ (one directory listing) and indexes any
+run dir the registry does not know yet, so runs copied in, synced from another
+machine or left unregistered by a crashed run still show up.
+
+CLI:
+    python -m src.registry rebuild                      # index existing run dirs
+    python -m src.registry latest --app blackjack --algo ppo --persona survivor --seed 7
+    python -m src.registry query --app blackjack --where "win_mean>0.42"
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+DB_NAME = "registry.sqlite"
+RUN_RE = re.compile(r"^(?P<app>[^-]+)-(?P<algo>[^-]+)-(?P<persona>[^-]+)-seed(?P<seed>\d+)-(?P<ts>\d+)$")
+ARTIFACTS = ["model.zip", "episodes.csv", "aggregate.json", "windows.json", "config.json", "perf.json", "curves.npz",
+             "return_curve.png", "eval/episodes.csv", "eval/aggregate.json", "eval/hands.jsonl",
+             "traj/meta.json", "eval/traj/meta.json"]
+FLOAT_RE = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+OPS = {">": ">", ">=": ">=", "<": "<", "<=": "<=", "=": "=", "==": "=", "!=": "!="}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    app TEXT, algo TEXT, persona TEXT, seed INTEGER, ts INTEGER,
+    run_dir TEXT, config_hash TEXT,
+    config TEXT, aggregate TEXT, eval_aggregate TEXT, artifacts TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (app, algo, persona, seed, ts);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT, scope TEXT, key TEXT, value REAL,
+    PRIMARY KEY (run_id, scope, key)
+);
+CREATE INDEX IF NOT EXISTS metrics_kv ON metrics (scope, key, value);
+"""
+
+
+def config_hash(cfg):
+    return hashlib.sha256(json.dumps(cfg, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Registry:
+    def __init__(self, runs_dir="runs", create=False):
+        # Only writers create runs_dir; a mistyped --runs_dir on a reader should fail, not yield an empty index
+        self.runs_dir = runs_dir
+        if create:
+            os.makedirs(runs_dir, exist_ok=True)
+        elif not os.path.isdir(runs_dir):
+            raise FileNotFoundError(f"Runs directory not found: {runs_dir}")
+        self.path = os.path.join(runs_dir, DB_NAME)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Writes ---
+    def register_run(self, run_dir, meta=None):
+        """Insert or refresh one run from its directory contents (single transaction)."""
+        run_id = os.path.basename(os.path.normpath(run_dir))
+        meta = dict(meta or {})
+        m = RUN_RE.match(run_id)
+        if m:
+            for k in ("app", "algo", "persona"):
+                meta.setdefault(k, m.group(k))
+            meta.setdefault("seed", int(m.group("seed")))
+            meta.setdefault("ts", int(m.group("ts")))
+        cfg = _read_json(os.path.join(run_dir, "config.json"))
+        if cfg:
+            meta.setdefault("app", cfg.get("app", {}).get("id"))
+            meta.setdefault("algo", cfg.get("algo", {}).get("name"))
+            meta.setdefault("persona", cfg.get("persona", {}).get("id"))
+        agg = _read_json(os.path.join(run_dir, "aggregate.json"))
+        eval_agg = _read_json(os.path.join(run_dir, "eval", "aggregate.json"))
+        artifacts = {a: os.path.join(run_dir, a) for a in ARTIFACTS if os.path.exists(os.path.join(run_dir, a))}
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                (run_id, meta.get("app"), meta.get("algo"), meta.get("persona"), meta.get("seed"), meta.get("ts"),
+                 run_dir, config_hash(cfg) if cfg is not None else None,
+                 json.dumps(cfg, default=str) if cfg is not None else None,
+                 json.dumps(agg) if agg is not None else None,
+                 json.dumps(eval_agg) if eval_agg is not None else None,
+                 json.dumps(artifacts), time.time()))
+            self.conn.execute("DELETE FROM metrics WHERE run_id=?", (run_id,))
+            rows = []
+            for scope, d in (("train", agg), ("eval", eval_agg)):
+                for k, v in (d or {}).items():
+                    if isinstance(v, (int, float)) and not isinstance(v, bool):
+                        rows.append((run_id, scope, k, float(v)))
+            self.conn.executemany("INSERT INTO metrics VALUES (?,?,?,?)", rows)
+        return run_id
+
+    def remove_missing(self):
+        gone = [r["run_id"] for r in self.conn.execute("SELECT run_id FROM runs")
+                if not os.path.isdir(os.path.join(self.runs_dir, r["run_id"]))]
+        with self.conn:
+            for rid in gone:
+                self.conn.execute("DELETE FROM runs WHERE run_id=?", (rid,))
+                self.conn.execute("DELETE FROM metrics WHERE run_id=?", (rid,))
+        return gone
+
+    def _run_dirs(self):
+        for d in sorted(os.listdir(self.runs_dir)):
+            rd = os.path.join(self.runs_dir, d)
+            if os.path.isdir(rd) and (RUN_RE.match(d) or os.path.exists(os.path.join(rd, "config.json"))):
+                yield d, rd
+
+    def rebuild(self):
+        """Re-index every run dir under runs_dir."""
+        n = 0
+        for _, rd in self._run_dirs():
+            self.register_run(rd)
+            n += 1
+        self.remove_missing()
+        return n
+
+    def sync(self):
+        """Index run dirs that are not registered yet and drop rows whose dir is gone; returns the new run ids."""
+        known = {r["run_id"] for r in self.conn.execute("SELECT run_id FROM runs")}
+        added = [self.register_run(rd) for d, rd in self._run_dirs() if d not in known]
+        self.remove_missing()
+        return added
+
+    # --- Queries ---
+    def query(self, app=None, algo=None, persona=None, seed=None, where=(), scope="train", latest_only=False):
+        """
+        Return run rows (dicts) filtered by key fields and metric conditions,
+        e.g. where=[("win_mean", ">", 0.42)]. Ordered by ts ascending.
+        """
+        sql = ["SELECT * FROM runs r WHERE 1=1"]
+        args = []
+        for col, val in (("app", app), ("algo", algo), ("persona", persona), ("seed", seed)):
+            if val is not None:
+                sql.append(f"AND r.{col}=?")
+                args.append(val)
+        for key, op, val in where:
+            if op not in OPS:
+                raise ValueError(f"Unsupported operator: {op}")
+            sql.append(f"AND EXISTS (SELECT 1 FROM metrics m WHERE m.run_id=r.run_id AND m.scope=? AND m.key=? AND m.value {OPS[op]} ?)")
+            args += [scope, key, float(val)]
+        sql.append("ORDER BY r.ts, r.run_id")
+        rows = [self._row(r) for r in self.conn.execute(" ".join(sql), args)]
+        if latest_only:
+            by_key = {}
+            for r in rows:
+                by_key[(r["app"], r["algo"], r["persona"])] = r
+            rows = list(by_key.values())
+        return rows
+
+    def latest(self, app, algo, persona, seed=None):
+        sql = "SELECT * FROM runs WHERE app=? AND algo=? AND persona=?"
+        args = [app, algo, persona]
+        if seed is not None:
+            sql += " AND seed=?"
+            args.append(seed)
+        r = self.conn.execute(sql + " ORDER BY ts DESC, run_id DESC LIMIT 1", args).fetchone()
+        return self._row(r) if r else None
+
+    def _row(self, r):
+        d = dict(r)
+        # Runs live next to the registry file; resolve against runs_dir so relocated trees still work
+        d["run_dir"] = os.path.join(self.runs_dir, d["run_id"])
+        for k in ("config", "aggregate", "eval_aggregate", "artifacts"):
+            d[k] = json.loads(d[k]) if d.get(k) is not None else None
+        return d
+
+
+def open_registry(runs_dir="runs", create=False):
+    """Open the registry with every run dir under runs_dir indexed (new dirs are registered first)."""
+    reg = Registry(runs_dir, create=create)
+    try:
+        reg.sync()
+    except Exception:
+        reg.close()
+        raise
+    return reg
+
+
+def find_latest_run(runs_dir, app, algo, persona, seed=None):
+    """Latest run dir for (app, algo, persona[, seed]), or None (also when runs_dir does not exist)."""
+    if not os.path.isdir(runs_dir):
+        return None
+    with open_registry(runs_dir) as reg:
+        row = reg.latest(app, algo, persona, seed)
+    return row["run_dir"] if row else None
+
+
+def register(run_dir, runs_dir=None, meta=None):
+    runs_dir = runs_dir or os.path.dirname(os.path.normpath(run_dir))
+    with open_registry(runs_dir, create=True) as reg:
+        return reg.register_run(run_dir, meta)
+
+
+def _parse_where(text):
+    m = re.match(r"^\s*([\w.]+)\s*(>=|<=|==|!=|>|<|=)\s*(" + FLOAT_RE + r")\s*$", text)
+    if not m:
+        raise argparse.ArgumentTypeError(f"Bad condition: {text!r} (expected e.g. win_mean>0.42)")
+    try:
+        return m.group(1), m.group(2), float(m.group(3))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Bad number in condition: {text!r}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Query or rebuild the run registry")
+    ap.add_argument("command", choices=["rebuild", "latest", "query"])
+    ap.add_argument("--runs_dir", default="runs")
+    ap.add_argument("--app")
+    ap.add_argument("--algo")
+    ap.add_argument("--persona")
+    ap.add_argument("--seed", type=int)
+    ap.add_argument("--where", type=_parse_where, action="append", default=[], help="Metric condition, e.g. win_mean>0.42")
+    ap.add_argument("--scope", default="train", choices=["train", "eval"])
+    args = ap.parse_args()
+    try:
+        reg = Registry(args.runs_dir, create=True) if args.command == "rebuild" else open_registry(args.runs_dir)
+    except FileNotFoundError as e:
+        ap.error(str(e))
+    with reg:
+        if args.command == "rebuild":
+            print(f"Indexed {reg.rebuild()} run(s) into {reg.path}")
+        elif args.command == "latest":
+            row = reg.latest(args.app, args.algo, args.persona, args.seed)
+            print(row["run_dir"] if row else "No matching run.")
+        else:
+            for row in reg.query(args.app, args.algo, args.persona, args.seed, args.where, args.scope):
+                agg = row["aggregate"] if args.scope == "train" else row["eval_aggregate"]
+                keys = [k for k, _, _ in args.where] or ["return_mean"]
+                vals = ", ".join(f"{k}={agg.get(k):.3f}" for k in keys if agg and isinstance(agg.get(k), (int, float)))
+                print(f"{row['run_id']}  {vals}")
+
+
+if __name__ == "__main__":
+    main()
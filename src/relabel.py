@@ -0,0 +1,163 @@
+"""
+Recompute rewards of recorded transitions under other reward weights, without re-simulating.
+
+Envs keep each step's unweighted reward components (env.reward_components, in
+REWARD_COMPONENTS order) and the shaped reward is reward_scale * (components . weights).
+With the components of a run recorded (TrajectoryRecorder(components=True), or
+--record_components in src.train / src.eval), the rewards under P weight sets are
+one matrix multiply, C (steps x K) @ W (K x P), and per-episode returns one
+np.add.reduceat over the episode boundaries. Weight keys a persona does not set
+fall back to the env defaults, exactly as in the env.
+
+Usage:
+    python -m src.relabel --traj runs/<run>/eval/traj --app blackjack
+    python -m src.relabel --traj runs/<run>/traj --app formflow --personas survivor --sweep page_progress=0:0.05:6 --out sweep.csv
+"""
+
+import argparse
+import csv
+import glob
+import itertools
+import os
+import time
+import numpy as np
+from envs.reward_kernel import RewardKernel
+from src.utils import load_yaml
+
+
+def reward_defaults(app):
+    """Component name -> default weight for an app's env (same order as its REWARD_COMPONENTS)."""
+    if app == "blackjack":
+        from envs.blackjack_env import REWARD_DEFAULTS
+    elif app == "formflow":
+        from envs.formflow_env import REWARD_DEFAULTS
+    else:
+        raise ValueError(f"No reward components for app: {app}")
+    return REWARD_DEFAULTS
+
+
+def weight_matrix(components, defaults, weight_sets):
+    """K x P matrix: column j is weight set j (a persona weights dict) compiled as the env compiles it."""
+    W = np.empty((len(components), len(weight_sets)), dtype=np.float64)
+    for j, ws in enumerate(weight_sets):
+        W[:, j] = RewardKernel(components, defaults, ws).as_array()
+    return W
+
+
+def relabel(C, W, scale=1.0):
+    """Per-step rewards (steps x P) for components C (steps x K) under every column of W."""
+    return (np.asarray(C, dtype=np.float64) @ W) * scale
+
+
+def episode_returns(R, done, carry=None):
+    """
+    Sum per-step rewards R (steps x P) over episodes ending where `done` is set.
+
+    `carry` is the partial return of an episode continued from a previous chunk; returns
+    (episodes x P returns, partial return of the unfinished tail or None).
+    """
+    R = np.array(R, dtype=np.float64, ndmin=2)
+    if not len(R):
+        return np.zeros((0, R.shape[1])), carry
+    if carry is not None:
+        R[0] += carry
+    ends = np.flatnonzero(done)
+    if len(ends):
+        starts = np.r_[0, ends[:-1] + 1]
+        out = np.add.reduceat(R[:ends[-1] + 1], starts, axis=0)
+        tail = R[ends[-1] + 1:]
+    else:
+        out = np.zeros((0, R.shape[1]))
+        tail = R
+    return out, (tail.sum(axis=0) if len(tail) else None)
+
+
+def trajectory_returns(path, weight_sets, defaults, batch=1 << 16):
+    """
+    Episode returns of a recorded run under each weight set, streamed batch by batch.
+
+    Returns an episodes x (P + 1) array; the last column is the recorded return.
+    """
+    from src.trajectories import TrajectoryReader
+    reader = TrajectoryReader(path)
+    if not reader.components:
+        raise ValueError(f"{path} has no reward components (record with --record_components)")
+    W = weight_matrix(reader.components, defaults, weight_sets)
+    scale = float(reader.meta.get("reward_scale", 1.0))
+    chunks, carry = [], None
+    for b in reader.batches(batch, fields=["rc", "reward", "done"]):
+        R = np.concatenate([relabel(b["rc"], W, scale), b["reward"][:, None]], axis=1)
+        out, carry = episode_returns(R, b["done"], carry)
+        chunks.append(out)
+    return np.concatenate(chunks) if chunks else np.zeros((0, len(weight_sets) + 1))
+
+
+def persona_weights(names=None, persona_dir="configs/persona"):
+    """[(persona id, weights)] for the given persona names (default: every persona config)."""
+    paths = [os.path.join(persona_dir, f"{n}.yaml") for n in names] if names else \
+        sorted(glob.glob(os.path.join(persona_dir, "*.yaml")))
+    out = []
+    for p in paths:
+        cfg = load_yaml(p)
+        out.append((cfg.get("id", os.path.splitext(os.path.basename(p))[0]), dict(cfg.get("weights") or {})))
+    return out
+
+
+def parse_sweep(spec):
+    """"win_reward=0:4:5" -> ("win_reward", [0.0, 1.0, 2.0, 3.0, 4.0])."""
+    key, _, rng = spec.partition("=")
+    parts = rng.split(":")
+    if not key or len(parts) != 3:
+        raise ValueError(f"bad sweep {spec!r} (use key=lo:hi:n)")
+    return key.strip(), list(np.linspace(float(parts[0]), float(parts[1]), int(parts[2])))
+
+
+def expand_sweeps(bases, sweeps):
+    """Cross every (label, weights) base with the grid of swept values."""
+    if not sweeps:
+        return bases
+    keys = [k for k, _ in sweeps]
+    out = []
+    for label, ws in bases:
+        for vals in itertools.product(*[v for _, v in sweeps]):
+            tag = " ".join(f"{k}={v:g}" for k, v in zip(keys, vals))
+            out.append((f"{label} {tag}", dict(ws, **dict(zip(keys, vals)))))
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser(description="Episode returns of a recorded run under other reward weights")
+    p.add_argument("--traj", required=True, help="Trajectory directory recorded with --record_components")
+    p.add_argument("--app", required=True, choices=["formflow", "blackjack"])
+    p.add_argument("--personas", nargs="*", default=None, help="Persona configs to relabel with (default: all)")
+    p.add_argument("--sweep", action="append", default=[], help="key=lo:hi:n; repeat for a grid over several keys")
+    p.add_argument("--out", default=None, help="Write the per-weight-set summary as CSV")
+    args = p.parse_args()
+
+    sets = expand_sweeps(persona_weights(args.personas), [parse_sweep(s) for s in args.sweep])
+    t0 = time.perf_counter()
+    rets = trajectory_returns(args.traj, [ws for _, ws in sets], reward_defaults(args.app))
+    dt = time.perf_counter() - t0
+    labels = [label for label, _ in sets] + ["(recorded)"]
+    rows = []
+    for j, label in enumerate(labels):
+        col = rets[:, j]
+        rows.append({"weights": label, "episodes": len(col),
+                     "mean": float(col.mean()) if len(col) else float("nan"),
+                     "std": float(col.std()) if len(col) else float("nan"),
+                     "min": float(col.min()) if len(col) else float("nan"),
+                     "max": float(col.max()) if len(col) else float("nan")})
+    width = max(len(r["weights"]) for r in rows)
+    print(f"{'weights':<{width}}  {'mean':>10} {'std':>10} {'min':>10} {'max':>10}")
+    for r in rows:
+        print(f"{r['weights']:<{width}}  {r['mean']:>10.4f} {r['std']:>10.4f} {r['min']:>10.4f} {r['max']:>10.4f}")
+    print(f"{len(rets)} episodes x {len(sets)} weight sets relabeled in {dt:.3f}s")
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Lightweight media for the HTML reports.
+
+Each run gets small derived assets under <run>/thumbs/: a palette-reduced
+return-curve thumbnail and, for the eval preview, an optimized GIF (reduced
+palette, frame stride, capped length) plus a still first-frame thumbnail.
+Cards embed the thumbnails with loading="lazy" and link to the full-size
+originals. MediaBudget caps the total bytes embedded in a report: curve
+thumbnails are admitted first, then previews, falling back to the still
+frame and finally to a plain link. Derived assets are rebuilt only when
+their source changes (see src/build_cache.py).
+"""
+
+import os
+from pathlib import Path
+from src.build_cache import BuildCache
+
+THUMB_DIR = 'thumbs'
+THUMB_WIDTH = 480
+THUMB_COLORS = 64
+PREVIEW_WIDTH = 320
+PREVIEW_COLORS = 48
+PREVIEW_STRIDE = 2
+PREVIEW_MAX_FRAMES = 60
+# Bump when thumbnail settings change so derived assets are rebuilt
+MEDIA_VERSION = 1
+
+
+def _resize(im, width):
+    from PIL import Image
+    if im.width <= width:
+        return im
+    return im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+
+
+def make_thumbnail(src, dst, width=THUMB_WIDTH, colors=THUMB_COLORS):
+    """Downscale an image (first frame for GIFs) to `width` and save as a palette PNG. Returns (w, h)."""
+    from PIL import Image
+    with Image.open(src) as im:
+        im = _resize(im.convert('RGB'), width)
+        im = im.quantize(colors=colors)
+        im.save(dst, format='PNG', optimize=True)
+        return im.size
+
+
+def optimize_gif(src, dst, width=PREVIEW_WIDTH, colors=PREVIEW_COLORS, stride=PREVIEW_STRIDE,
+                 max_frames=PREVIEW_MAX_FRAMES):
+    """Re-encode a GIF with every `stride`-th frame, a shared reduced palette and at most `max_frames` frames."""
+    from PIL import Image, ImageSequence
+    stride = max(1, int(stride))
+    frames, durations = [], []
+    palette = None
+    with Image.open(src) as im:
+        for i, fr in enumerate(ImageSequence.Iterator(im)):
+            if i % stride:
+                continue
+            dur = fr.info.get('duration', im.info.get('duration', 100))
+            fr = _resize(fr.convert('RGB'), width)
+            # One palette for the whole clip avoids per-frame palettes and flicker
+            if palette is None:
+                palette = fr.quantize(colors=colors)
+            frames.append(fr.quantize(palette=palette, dither=Image.Dither.NONE))
+            durations.append(int(dur) * stride)
+            if len(frames) >= max_frames:
+                break
+    if not frames:
+        raise ValueError(f'No frames in {src}')
+    frames[0].save(dst, format='GIF', save_all=True, append_images=frames[1:], duration=durations,
+                   loop=0, optimize=True, disposal=1)
+    return frames[0].size
+
+
+def _derive(cache, src, dst, build, key):
+    """Build dst from src unless cached; returns {'path', 'w', 'h', 'bytes'} or None on failure."""
+    rel = Path(dst).relative_to(cache.run_dir).as_posix()
+    if cache.is_fresh(rel, [src], key=key, output=dst):
+        info = cache.data(rel)
+        if info:
+            return dict(info, path=Path(dst))
+    try:
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        w, h = build(src, dst)
+    except Exception as e:
+        print(f"[WARN] cannot derive {dst} from {src}: {e}")
+        return None
+    info = {'w': int(w), 'h': int(h), 'bytes': os.path.getsize(dst)}
+    cache.record(rel, [src], key=key, data=info)
+    return dict(info, path=Path(dst))
+
+
+def run_media(run_dir, preview=None, thumb_width=THUMB_WIDTH, preview_width=PREVIEW_WIDTH,
+              colors=PREVIEW_COLORS, stride=PREVIEW_STRIDE, max_frames=PREVIEW_MAX_FRAMES):
+    """
+    Derive report assets for one run. Returns {kind: {'full', 'thumb', ...}} for kinds
+    'curve' and 'preview'; preview entries may also carry a 'still' thumbnail.
+    """
+    run_dir = Path(run_dir)
+    cache = BuildCache(run_dir)
+    tdir = run_dir / THUMB_DIR
+    media = {}
+    key = f"{MEDIA_VERSION}:{thumb_width}:{THUMB_COLORS}"
+    rc = run_dir / 'return_curve.png'
+    if rc.exists():
+        thumb = _derive(cache, rc, tdir / 'return_curve.png',
+                        lambda s, d: make_thumbnail(s, d, thumb_width), key)
+        media['curve'] = {'full': rc, 'thumb': thumb}
+    if preview is not None and Path(preview).exists():
+        preview = Path(preview)
+        skey = f"{MEDIA_VERSION}:{preview_width}:{colors}"
+        still = _derive(cache, preview, tdir / 'preview_still.png',
+                        lambda s, d: make_thumbnail(s, d, preview_width, colors), skey)
+        anim = None
+        if preview.suffix.lower() == '.gif':
+            gkey = f"{MEDIA_VERSION}:{preview_width}:{colors}:{stride}:{max_frames}"
+            anim = _derive(cache, preview, tdir / 'preview.gif',
+                           lambda s, d: optimize_gif(s, d, preview_width, colors, stride, max_frames), gkey)
+        media['preview'] = {'full': preview, 'thumb': anim or still, 'still': still}
+    cache.save()
+    return media
+
+
+class MediaBudget:
+    """Admit embedded assets until `limit_bytes` is spent (None or <= 0 means unlimited)."""
+
+    def __init__(self, limit_bytes=None):
+        self.limit = limit_bytes if limit_bytes and limit_bytes > 0 else None
+        self.used = 0
+
+    def take(self, asset):
+        if asset is None:
+            return False
+        if self.limit is not None and self.used + asset['bytes'] > self.limit:
+            return False
+        self.used += asset['bytes']
+        return True
+
+
+def plan_media(media_by_run, budget):
+    """
+    Decide which thumbnails to embed under `budget`. media_by_run: list of
+    run_media() dicts in report order. Returns a parallel list of
+    {kind: (embedded_asset_or_None, full_path)}.
+    """
+    plans = [{} for _ in media_by_run]
+    # Curves first: they are the most informative bytes per card
+    for plan, media in zip(plans, media_by_run):
+        if 'curve' in media:
+            m = media['curve']
+            plan['curve'] = (m['thumb'] if budget.take(m['thumb']) else None, m['full'])
+    for plan, media in zip(plans, media_by_run):
+        if 'preview' in media:
+            m = media['preview']
+            emb = m['thumb'] if budget.take(m['thumb']) else None
+            if emb is None and m['still'] is not m['thumb'] and budget.take(m['still']):
+                emb = m['still']
+            plan['preview'] = (emb, m['full'])
+    return plans
+
+
+def href(path, out_dir):
+    return Path(os.path.relpath(Path(path).resolve(), Path(out_dir).resolve())).as_posix()
+
+
+def media_html(entry, alt, out_dir):
+    """Lazy-loaded thumbnail linking to the full-size asset, or just a link when over budget."""
+    asset, full = entry
+    full_href = href(full, out_dir)
+    if asset is None:
+        return f'<div><a href="{full_href}">{alt} (full size)</a></div>'
+    return (f'<div><a href="{full_href}" title="Open full size">'
+            f'<img src="{href(asset["path"], out_dir)}" alt="{alt}" width="{asset["w"]}" height="{asset["h"]}" '
+            f'loading="lazy" decoding="async"></a></div>')
+
+
+def plan_key(plan):
+    """Stable string describing a card's media choices (for card cache keys)."""
+    return ';'.join(f"{k}={(a['path'].as_posix() + ':' + str(a['bytes'])) if a else ''}>{Path(f).as_posix()}"
+                    for k, (a, f) in sorted(plan.items()))
+
+
+def page_path(out_html, app, page=1):
+    out_html = Path(out_html)
+    suffix = f'-{page}' if page > 1 else ''
+    return out_html.with_name(f'{out_html.stem}-{app}{suffix}{out_html.suffix}')
+
+
+def paginate(items, page_size):
+    if not page_size or page_size <= 0:
+        return [items]
+    return [items[i:i + page_size] for i in range(0, len(items), page_size)] or [[]]
+
+
+def remove_stale_pages(out_html, apps, written):
+    """Delete numbered app pages left over from an earlier build with more pages."""
+    out_html = Path(out_html)
+    keep = {Path(p).resolve() for p in written}
+    for app in apps:
+        for p in out_html.parent.glob(f'{out_html.stem}-{app}-*{out_html.suffix}'):
+            if p.stem.rsplit('-', 1)[-1].isdigit() and p.resolve() not in keep:
+                p.unlink()
+
+
+def nav_html(out_html, apps, current=None, page=1, n_pages=1):
+    """Links to the index and per-app pages, plus page links within the current app."""
+    out_html = Path(out_html)
+    links = [f'<a href="{out_html.name}">Overview</a>']
+    for app in apps:
+        name = page_path(out_html, app).name
+        label = f'<b>{app.title()}</b>' if app == current else app.title()
+        links.append(f'<a href="{name}">{label}</a>')
+    parts = ['<nav class="nav">' + ' | '.join(links) + '</nav>']
+    if current is not None and n_pages > 1:
+        pages = [(f'<b>{p}</b>' if p == page else f'<a href="{page_path(out_html, current, p).name}">{p}</a>')
+                 for p in range(1, n_pages + 1)]
+        parts.append('<nav class="nav">Page: ' + ' '.join(pages) + '</nav>')
+    return '\n'.join(parts)
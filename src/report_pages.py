@@ -0,0 +1,128 @@
+"""
+Page assembly shared by the HTML report builders.
+
+src/build_report.py and src/build_report_explained.py differ only in their run
+cards, stylesheet and overview section. Collecting runs through the registry,
+plot jobs, preview discovery, card caching and the budgeted, paginated
+per-app pages live here; a builder passes its card renderer and stylesheet
+(plus its overview and optional per-app intro) to write_html().
+"""
+
+from pathlib import Path
+from src.build_cache import cached_fragment
+from src.registry import open_registry
+from src.report_media import (MediaBudget, run_media, plan_media, plan_key, href,
+                              page_path, paginate, nav_html, remove_stale_pages, PREVIEW_STRIDE, PREVIEW_COLORS)
+
+# Bump when card markup changes so cached cards are rebuilt
+CARD_VERSION = 2
+# Default cap on embedded thumbnails/previews across all report pages
+DEFAULT_BUDGET_MB = 20.0
+DEFAULT_PAGE_SIZE = 60
+
+TITLE = 'DRL for Automated Testing'
+
+
+def add_report_args(ap):
+    """Arguments common to the report builders."""
+    ap.add_argument('--runs_dir', default='runs')
+    ap.add_argument('--html_out', default='AMAZING_REPORT.html')
+    ap.add_argument('--workers', type=int, default=None, help='Plotting processes (default: CPU count)')
+    ap.add_argument('--budget_mb', type=float, default=DEFAULT_BUDGET_MB, help='Total size of embedded thumbnails/previews (0 = unlimited)')
+    ap.add_argument('--page_size', type=int, default=DEFAULT_PAGE_SIZE, help='Run cards per app page (0 = one page per app)')
+    ap.add_argument('--gif_stride', type=int, default=PREVIEW_STRIDE, help='Keep every Nth frame in optimized preview GIFs')
+    ap.add_argument('--gif_colors', type=int, default=PREVIEW_COLORS, help='Palette size for optimized preview GIFs')
+
+
+def app_of(run_dir):
+    return Path(run_dir).name.split('-')[0]
+
+
+def plot_jobs(run_dirs, app_metrics):
+    # Metric hists based on app prefix
+    return [(rd, app_metrics.get(app_of(rd), [])) for rd in run_dirs]
+
+
+def collect_runs(runs_dir: Path):
+    # Indexed lookup via the run registry instead of reading every config/aggregate file
+    items = []
+    with open_registry(str(runs_dir)) as reg:
+        for row in sorted(reg.query(), key=lambda r: r['run_id']):
+            d = Path(row['run_dir'])
+            if row['config'] is not None and row['aggregate'] is not None and d.is_dir():
+                items.append({'dir': d, 'config': row['config'], 'agg': row['aggregate']})
+    return items
+
+
+def find_preview(eval_dir: Path):
+    if not eval_dir.exists():
+        return None
+    gifs = sorted(eval_dir.glob('episode_*.gif'))
+    if gifs:
+        return gifs[0]
+    pngs = sorted(eval_dir.glob('episode_*_frame_*.png'))
+    if pngs:
+        return pngs[0]
+    return None
+
+
+def card_html(it, plan, out_dir, render_card):
+    # Rebuilt only when aggregate/config or the embedded media change; cached per builder module
+    rd = it['dir']
+    inputs = [rd / 'aggregate.json', rd / 'config.json']
+    key = f"{CARD_VERSION}:{href(rd, out_dir)}:{plan_key(plan)}"
+    name = f"card:{render_card.__module__.rsplit('.', 1)[-1]}"
+    return cached_fragment(rd, name, inputs, lambda: render_card(it, plan, out_dir), key=key)
+
+
+def write_html(out_html: Path, runs, render_card, head, overview, page_intro=None,
+               budget_mb=DEFAULT_BUDGET_MB, page_size=DEFAULT_PAGE_SIZE, media_opts=None):
+    """
+    Write an overview page plus paginated per-app pages; returns the paths written.
+
+    render_card(it, plan, out_dir) -> card HTML; head is the <style> block of every page;
+    overview(out_html, apps, by_app, runs) -> overview body parts between the title and the
+    media line; page_intro(app) -> optional HTML above an app page's cards.
+    """
+    out_html = Path(out_html)
+    out_dir = out_html.parent
+    # Group by app
+    by_app = {}
+    for item in runs:
+        by_app.setdefault(app_of(item['dir']), []).append(item)
+    # Thumbnails/optimized previews, admitted under the total size budget
+    media = [run_media(it['dir'], find_preview(it['dir'] / 'eval'), **(media_opts or {})) for it in runs]
+    budget = MediaBudget(int(budget_mb * 1024 * 1024) if budget_mb else None)
+    plans = {it['dir']: p for it, p in zip(runs, plan_media(media, budget))}
+    apps = list(by_app)
+    written = []
+    # Overview page
+    parts = []
+    parts.append(f'<!doctype html><meta charset="utf-8"><title>{TITLE} — Results</title>')
+    parts.append(head)
+    parts.append(f'<h1>{TITLE} — Results</h1>')
+    parts += overview(out_html, apps, by_app, runs)
+    parts.append(f'<p class="muted">Embedded media: {budget.used / 1024:.0f} KiB' + (f' of {budget.limit / 1024:.0f} KiB budget' if budget.limit else '') + '.</p>')
+    out_html.write_text('\n'.join(parts), encoding='utf-8')
+    written.append(out_html)
+    # One page (or several) per app
+    for app, items in by_app.items():
+        pages = paginate(items, page_size)
+        intro = page_intro(app) if page_intro else None
+        for i, chunk in enumerate(pages, start=1):
+            parts = []
+            parts.append(f'<!doctype html><meta charset="utf-8"><title>{TITLE} — {app.title()}</title>')
+            parts.append(head)
+            parts.append(f'<h1>{app.title()}</h1>')
+            parts.append(nav_html(out_html, apps, app, i, len(pages)))
+            if intro:
+                parts.append(intro)
+            parts.append('<div class="grid">')
+            for it in chunk:
+                parts.append(card_html(it, plans[it['dir']], out_dir, render_card))
+            parts.append('</div>')
+            path = page_path(out_html, app, i)
+            path.write_text('\n'.join(parts), encoding='utf-8')
+            written.append(path)
+    remove_stale_pages(out_html, apps, written)
+    return written
@@ -0,0 +1,143 @@
+"""
+Mergeable quantile sketch (DDSketch-style log buckets) used for per-window
+episode summaries. Sketches from different windows, seeds or runs can be
+merged and queried without the raw episode data.
+"""
+
+import math
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch.
+
+    Values are mapped to logarithmic buckets index=ceil(log_gamma(|x|)) with
+    gamma=(1+alpha)/(1-alpha), so any quantile estimate is within `alpha`
+    relative error of the true value. Positive and negative values keep
+    separate bucket stores; values with |x| < min_value count as zero.
+    Two sketches merge exactly when they share the same alpha.
+    """
+
+    def __init__(self, alpha=0.01, min_value=1e-9):
+        self.alpha = float(alpha)
+        self.min_value = float(min_value)
+        self.gamma = (1.0 + self.alpha) / (1.0 - self.alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.pos = {}
+        self.neg = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # --- Updates ---
+    def add(self, x):
+        self.add_many([x])
+
+    def add_many(self, values):
+        v = np.asarray(values, dtype=np.float64).reshape(-1)
+        v = v[np.isfinite(v)]
+        if v.size == 0:
+            return self
+        self.count += int(v.size)
+        self.sum += float(v.sum())
+        self.min = min(self.min, float(v.min()))
+        self.max = max(self.max, float(v.max()))
+        mag = np.abs(v)
+        small = mag < self.min_value
+        self.zero += int(small.sum())
+        for store, mask in ((self.pos, (v > 0) & ~small), (self.neg, (v < 0) & ~small)):
+            if not mask.any():
+                continue
+            idx = np.ceil(np.log(mag[mask]) / self._log_gamma).astype(np.int64)
+            keys, counts = np.unique(idx, return_counts=True)
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                store[k] = store.get(k, 0) + c
+        return self
+
+    def merge(self, other):
+        if not math.isclose(self.alpha, other.alpha):
+            raise ValueError(f"Cannot merge sketches with different alpha: {self.alpha} vs {other.alpha}")
+        for store, src in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, c in src.items():
+                store[k] = store.get(k, 0) + c
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    # --- Queries ---
+    def _value(self, idx):
+        return 2.0 * self.gamma ** idx / (self.gamma + 1.0)
+
+    def _clamp(self, x):
+        return min(self.max, max(self.min, x))
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        q = min(1.0, max(0.0, float(q)))
+        rank = q * (self.count - 1)
+        seen = 0
+        # Ascending order: most negative first, then zeros, then positives
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return self._clamp(-self._value(k))
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return self._clamp(self._value(k))
+        return self.max
+
+    def quantiles(self, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        return {f"p{int(round(q * 100))}": self.quantile(q) for q in qs}
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    # --- Serialization ---
+    def to_dict(self):
+        return {
+            "alpha": self.alpha,
+            "min_value": self.min_value,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero": self.zero,
+            "pos": sorted([k, c] for k, c in self.pos.items()),
+            "neg": sorted([k, c] for k, c in self.neg.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(alpha=d.get("alpha", 0.01), min_value=d.get("min_value", 1e-9))
+        s.count = int(d.get("count", 0))
+        s.sum = float(d.get("sum", 0.0))
+        s.min = math.inf if d.get("min") is None else float(d["min"])
+        s.max = -math.inf if d.get("max") is None else float(d["max"])
+        s.zero = int(d.get("zero", 0))
+        s.pos = {int(k): int(c) for k, c in d.get("pos", [])}
+        s.neg = {int(k): int(c) for k, c in d.get("neg", [])}
+        return s
+
+
+def merge_sketches(sketches):
+    """Merge an iterable of QuantileSketch (or their dicts) into a new sketch."""
+    out = None
+    for s in sketches:
+        if isinstance(s, dict):
+            s = QuantileSketch.from_dict(s)
+        if out is None:
+            out = QuantileSketch(alpha=s.alpha, min_value=s.min_value)
+        out.merge(s)
+    return out
@@ -1,6 +1,6 @@
 import argparse
-import json
 from pathlib import Path
+from src.registry import open_registry
 
 
 KEYS_BY_APP = {
@@ -10,27 +10,17 @@ KEYS_BY_APP = {
 
 
 def load_runs(runs_dir: Path):
+    # Indexed lookup via the run registry (no directory scan / per-run JSON reads)
     items = []
-    for d in sorted(runs_dir.iterdir()):
-        if not d.is_dir():
-            continue
-        name = d.name
-        parts = name.split('-')
-        if len(parts) < 4:
-            continue
-        app, algo, persona = parts[0], parts[1], parts[2]
-        agg = d / 'aggregate.json'
-        if agg.exists():
-            try:
-                with open(agg, 'r', encoding='utf-8') as f:
-                    items.append((app, algo, persona, name, json.load(f)))
-            except Exception:
-                pass
+    with open_registry(str(runs_dir)) as reg:
+        for row in reg.query():
+            if row['aggregate'] is not None:
+                items.append((row['app'], row['algo'], row['persona'], row['run_id'], row['aggregate']))
     return items
 
 
 def choose_latest(items):
-    # items already sorted by dir name; last timestamp suffix is latest
+    # items are ordered by run timestamp; last one per key is latest
     by_key = {}
     for app, algo, persona, name, agg in items:
         by_key[(app, algo, persona)] = (name, agg)
@@ -69,6 +59,8 @@ def main():
     ap.add_argument('--runs_dir', default='runs')
     ap.add_argument('--report_md', default='REPORT.md')
     args = ap.parse_args()
+    if not Path(args.runs_dir).is_dir():
+        ap.error(f'runs directory not found: {args.runs_dir}')
 
     runs = load_runs(Path(args.runs_dir))
     latest = choose_latest(runs)
@@ -5,6 +5,8 @@ from stable_baselines3.common.monitor import Monitor
 from src.utils import load_configs, set_global_seeds
 from src.make_env import make_env
 from src.metrics import EpisodeLogger, aggregate_csv
+from src.profiling import add_profile_args, profiler_from_args
+from src.registry import register
 
 ALGOS = {"ppo": PPO, "a2c": A2C}
 
@@ -17,32 +19,75 @@ def parse():
     p.add_argument("--seed", type=int, default=7)
     p.add_argument("--out", default="runs")
     p.add_argument("--timesteps", type=int, default=None, help="Override timesteps from config for quick runs")
-    return p.parse_args()
+    p.add_argument("--live_metrics", action="store_true", help="Serve live metrics on localhost (Prometheus text format)")
+    p.add_argument("--live_port", type=int, default=0, help="Port for --live_metrics (0=pick a free port)")
+    p.add_argument("--perf", action="store_true", help="Time env/inference/update/logging phases and write perf.json")
+    p.add_argument("--record_transitions", action="store_true", help="Write every transition to uint8-quantized shards (see src/trajectories.py)")
+    p.add_argument("--record_components", action="store_true", help="Also store per-step reward components for src.relabel (implies --record_transitions)")
+    p.add_argument("--mask_actions", action="store_true", help="Train MaskablePPO (sb3-contrib) so invalid/no-op actions are never sampled")
+    add_profile_args(p)
+    args = p.parse_args()
+    if args.mask_actions and args.algo != "ppo":
+        p.error("--mask_actions trains MaskablePPO; use --algo ppo")
+    return args
 
 def main():
     args = parse()
     cfg = load_configs(app=args.app, algo=args.algo, persona=args.persona)
     set_global_seeds(args.seed)
-    run_id = f"{args.app}-{args.algo}-{args.persona}-seed{args.seed}-{int(time.time())}"
+    ts = int(time.time())
+    run_id = f"{args.app}-{args.algo}-{args.persona}-seed{args.seed}-{ts}"
     out_dir = os.path.join(args.out, run_id)
     os.makedirs(out_dir, exist_ok=True)
+    prof = profiler_from_args(args, out_dir)
+    if prof.window is None:
+        prof.start()
     env = make_env(cfg["app"], cfg["persona"])
     env = Monitor(env)
-    env = DummyVecEnv([lambda: env])
+    traj = None
+    if args.record_transitions or args.record_components:
+        from src.trajectories import TrajectoryRecorder, DEFAULT_INFO_KEYS
+        env = traj = TrajectoryRecorder(env, os.path.join(out_dir, "traj"), DEFAULT_INFO_KEYS.get(args.app, ()),
+                                        components=args.record_components)
+    timer = None
+    if args.perf:
+        from src.perf import PhaseTimer, TimedEnv
+        timer = PhaseTimer()
+        env = TimedEnv(env, timer)
     Algo = ALGOS[args.algo]
+    if args.mask_actions:
+        from src.masking import maskable_ppo, with_action_masker
+        Algo = maskable_ppo()
+        env = with_action_masker(env)
+    env = DummyVecEnv([lambda: env])
     policy = cfg["algo"].get("policy","MlpPolicy")
     kwargs = {k:v for k,v in cfg["algo"].items() if k not in ["name","timesteps","policy"]}
     model = Algo(policy, env, seed=args.seed, verbose=1, **kwargs)
-    cb = EpisodeLogger(out_dir)
+    cb = [EpisodeLogger(out_dir)]
+    if args.live_metrics:
+        from src.live_metrics import LiveMetricsCallback
+        cb.append(LiveMetricsCallback(out_dir, port=args.live_port, verbose=1))
+    if args.perf:
+        # PerfCallback goes last so per-step callback time can be subtracted from inference
+        from src.perf import TimedCallback, PerfCallback
+        cb = [TimedCallback(c, timer) for c in cb] + [PerfCallback(out_dir, timer, verbose=1)]
+    if prof.enabled and prof.window is not None:
+        from src.profiling import ProfileCallback
+        cb.append(ProfileCallback(prof))
     total_ts = int(cfg["algo"]["timesteps"]) if args.timesteps is None else int(args.timesteps)
     model.learn(total_timesteps=total_ts, callback=cb, progress_bar=True)
     model.save(os.path.join(out_dir, "model"))
+    if traj is not None:
+        traj.flush()
+    cfg["mask_actions"] = bool(args.mask_actions)  # eval reloads the run with MaskablePPO
     # Write a JSON snapshot of merged configs; coerce non-serializable values to strings
     with open(os.path.join(out_dir, "config.json"), "w", encoding="utf-8") as f:
         json.dump(cfg, f, indent=2, default=str)
     ep_csv = os.path.join(out_dir, "episodes.csv")
     if os.path.exists(ep_csv):
         aggregate_csv(ep_csv, os.path.join(out_dir, "aggregate.json"))
+    prof.stop()
+    register(out_dir, args.out, meta={"app": args.app, "algo": args.algo, "persona": args.persona, "seed": args.seed, "ts": ts})
     print("Saved to", out_dir)
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""
+Compact per-step transition recording for offline analysis.
+
+TrajectoryRecorder is a gym.Wrapper that appends (obs, action, reward,
+terminated/truncated, selected info fields) for every step to preallocated
+column buffers and flushes them as fixed-size shards:
+
+  <dir>/shard_00000.npy   structured array, one row per step (np.load(mmap_mode="r"))
+  <dir>/meta.json         obs layout, quantization, info keys, rows per shard
+
+`obs` is the observation the action was taken in. Observations from Box
+spaces within [0, 1] (BlackjackEnv, FormFlowEnv) are quantized to uint8
+(x * 255, rounded) in bulk once per chunk, so the per-step cost is a few
+array stores; other spaces are kept as float32. A Blackjack row with the
+default info keys is 30 bytes (~3 GB per 10^8 steps). With components=True
+each row also stores the env's unweighted reward components ("rc", float32
+per component, names in meta.json) so src/relabel.py can recompute rewards
+for other weight sets. TrajectoryReader streams shards lazily.
+"""
+
+import json
+import os
+import gymnasium as gym
+import numpy as np
+
+DEFAULT_INFO_KEYS = {
+    "blackjack": ("win", "lose", "draw", "bankroll"),
+    "formflow": ("success", "validation_errors", "softlock", "page_id"),
+}
+FLAG_TERMINATED = 1
+FLAG_TRUNCATED = 2
+META_FILE = "meta.json"
+
+
+def _obs_quantized(space):
+    low, high = getattr(space, "low", None), getattr(space, "high", None)
+    return low is not None and np.all(low >= 0.0) and np.all(high <= 1.0)
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Record every transition of `env` into shards under `out_dir`; call close() to flush the tail."""
+
+    def __init__(self, env, out_dir, info_keys=(), shard_size=1 << 20, chunk=1 << 16, components=False):
+        super().__init__(env)
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self.info_keys = tuple(info_keys)
+        self.chunk = min(int(chunk), int(shard_size))
+        # Whole chunks per shard, so a chunk never straddles two shards
+        self.shard_size = int(shard_size) // self.chunk * self.chunk
+        space = env.observation_space
+        self.obs_dim = int(np.prod(space.shape))
+        self.quantized = _obs_quantized(space)
+        n_act = getattr(env.action_space, "n", None)
+        act_dtype = "u1" if n_act is not None and n_act <= 256 else "<i4"
+        fields = [("obs", "u1" if self.quantized else "<f4", (self.obs_dim,)), ("action", act_dtype),
+                  ("reward", "<f4"), ("flags", "u1")]
+        self._base = env.unwrapped
+        self.components = tuple(self._base.REWARD_COMPONENTS) if components else ()
+        if self.components:
+            fields.append(("rc", "<f4", (len(self.components),)))
+        self.dtype = np.dtype(fields + [(k, "<f4") for k in self.info_keys])
+        self._scalars = np.dtype([f for f in self.dtype.descr if f[0] != "obs"])
+        # Per step: one obs row copy plus one tuple (action, reward, flags, *info) appended to a list;
+        # both are packed into the shard dtype once per chunk
+        self._obs = np.zeros((self.chunk, self.obs_dim), dtype=np.float32)
+        self._flat = len(space.shape) == 1
+        self._rows = []
+        self._nan = (float("nan"),) * len(self.info_keys)
+        self._n = 0
+        self._shard = None  # rows of the shard being filled
+        self._shard_rows = 0
+        self.shards = []
+        self.rows = 0
+        self._last_obs = None
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._last_obs = obs
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        i = self._n
+        self._obs[i] = self._last_obs if self._flat else np.ravel(self._last_obs)
+        flags = (FLAG_TERMINATED if terminated else 0) | (FLAG_TRUNCATED if truncated else 0)
+        row = (action, reward, flags)
+        if self.components:
+            row += (self._base.reward_components,)
+        self._rows.append(row + tuple(map(info.get, self.info_keys, self._nan)))
+        self._last_obs = obs
+        self._n = i + 1
+        if self._n == self.chunk:
+            self._pack()
+        return obs, reward, terminated, truncated, info
+
+    def _pack(self):
+        n = self._n
+        if not n:
+            return
+        if self._shard is None:
+            self._shard = np.zeros(self.shard_size, dtype=self.dtype)
+            self._shard_rows = 0
+        rows = self._shard[self._shard_rows:self._shard_rows + n]
+        if self.quantized:
+            rows["obs"] = np.rint(np.clip(self._obs[:n], 0.0, 1.0) * 255.0)
+        else:
+            rows["obs"] = self._obs[:n]
+        cols = np.array(self._rows, dtype=self._scalars)
+        for name in self._scalars.names:
+            rows[name] = cols[name]
+        self._rows.clear()
+        self._shard_rows += n
+        self._n = 0
+        if self._shard_rows == self.shard_size:
+            self._write_shard()
+
+    def _write_shard(self):
+        if self._shard is None or not self._shard_rows:
+            return
+        name = f"shard_{len(self.shards):05d}.npy"
+        path = os.path.join(self.out_dir, name)
+        with open(path + ".part", "wb") as f:
+            np.save(f, self._shard[:self._shard_rows])
+        os.replace(path + ".part", path)
+        self.shards.append({"file": name, "rows": int(self._shard_rows)})
+        self.rows += self._shard_rows
+        self._shard = None
+        self._shard_rows = 0
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "version": 1,
+            "rows": self.rows,
+            "obs_dim": self.obs_dim,
+            "obs_scale": 255.0 if self.quantized else None,
+            "info_keys": list(self.info_keys),
+            "components": list(self.components),
+            "reward_scale": float(getattr(self._base, "reward_scale", 1.0)),
+            "dtype": self.dtype.descr,
+            "shards": self.shards,
+        }
+        with open(os.path.join(self.out_dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def flush(self):
+        """Write everything recorded so far (the last shard may be short)."""
+        self._pack()
+        self._write_shard()
+
+    def close(self):
+        self.flush()
+        return super().close()
+
+
+class TrajectoryReader:
+    """Lazy access to recorded shards; nothing is read until a shard is iterated."""
+
+    def __init__(self, path):
+        self.dir = path
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.info_keys = self.meta["info_keys"]
+        self.obs_scale = self.meta["obs_scale"]
+        self.components = self.meta.get("components", [])
+
+    def __len__(self):
+        return int(self.meta["rows"])
+
+    def shards(self):
+        """Yield each shard as a read-only memory-mapped structured array."""
+        for s in self.meta["shards"]:
+            yield np.load(os.path.join(self.dir, s["file"]), mmap_mode="r")
+
+    def batches(self, size=1 << 16, fields=None):
+        """
+        Yield dicts of column arrays, `size` rows at a time.
+
+        obs is dequantized to float32; `done` (terminated or truncated) is derived from flags;
+        `rc` (rows x components) is present when the run recorded reward components.
+        """
+        fields = fields or ["obs", "action", "reward", "done"] + (["rc"] if self.components else []) + self.info_keys
+        for shard in self.shards():
+            for lo in range(0, len(shard), size):
+                rows = shard[lo:lo + size]
+                out = {}
+                for name in fields:
+                    if name == "obs":
+                        obs = np.asarray(rows["obs"], dtype=np.float32)
+                        out[name] = obs / self.obs_scale if self.obs_scale else obs
+                    elif name == "done":
+                        out[name] = rows["flags"] != 0
+                    else:
+                        out[name] = np.asarray(rows[name])
+                yield out
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from src.recorder import GifStreamWriter
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _read_gif(path):
+    frames, delays = [], []
+    with Image.open(path) as im:
+        loop = im.info.get("loop")
+        for i in range(im.n_frames):
+            im.seek(i)
+            frames.append(np.asarray(im.convert("RGB")))
+            delays.append(im.info.get("duration"))
+    return frames, delays, loop
+
+
+def _write(path, frames, fps):
+    w = GifStreamWriter(str(path), fps=fps)
+    for f in frames:
+        w.append(f)
+    w.close()
+    return w
+
+
+def test_rgb_frames_round_trip(tmp_path):
+    # A handful of flat colors per frame, so the per-frame palette is exact
+    colors = np.array([[255, 0, 0], [0, 128, 255], [20, 200, 40], [250, 250, 250]], dtype=np.uint8)
+    frames = []
+    for i in range(4):
+        idx = (np.arange(12)[:, None] // 3 + np.arange(16)[None, :] // 4 + i) % len(colors)
+        frames.append(colors[idx])
+    path = tmp_path / "rgb.gif"
+    w = _write(path, frames, fps=20)
+    assert w.frames == 4
+
+    got, delays, loop = _read_gif(path)
+    assert len(got) == 4
+    assert delays == [50] * 4
+    assert loop == 0
+    for src, out in zip(frames, got):
+        assert out.shape == (12, 16, 3)
+        np.testing.assert_array_equal(out, src)
+
+
+def test_grayscale_frames_round_trip(tmp_path):
+    levels = np.array([0, 64, 128, 255], dtype=np.uint8)
+    frames = [levels[(np.arange(10)[:, None] + np.arange(8)[None, :] + i) % 4] for i in range(3)]
+    path = tmp_path / "gray.gif"
+    _write(path, frames, fps=10)
+
+    got, delays, _ = _read_gif(path)
+    assert len(got) == 3
+    assert delays == [100] * 3
+    for src, out in zip(frames, got):
+        assert out.shape == (10, 8, 3)
+        for c in range(3):
+            np.testing.assert_array_equal(out[..., c], src)
+
+
+def test_float_frames_are_clipped(tmp_path):
+    frame = np.full((4, 4, 3), 300.0)
+    frame[0] = -5.0
+    path = tmp_path / "clip.gif"
+    _write(path, [frame], fps=10)
+
+    (out,), _, _ = _read_gif(path)
+    assert (out[0] == 0).all()
+    assert (out[1:] == 255).all()
+
+
+def test_close_without_frames_writes_nothing(tmp_path):
+    path = tmp_path / "empty.gif"
+    w = GifStreamWriter(str(path))
+    w.close()
+    w.close()
+    assert path.stat().st_size == 0
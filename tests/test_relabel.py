@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from src.relabel import episode_returns
+
+
+def _episodes(seed=0, steps=200, p=3):
+    rng = np.random.default_rng(seed)
+    R = rng.normal(size=(steps, p))
+    done = rng.random(steps) < 0.1
+    done[-1] = False  # leave an unfinished episode at the end
+    return R, done
+
+
+def _expected(R, done):
+    out, start = [], 0
+    for i in np.flatnonzero(done):
+        out.append(R[start:i + 1].sum(axis=0))
+        start = i + 1
+    return np.array(out), R[start:].sum(axis=0)
+
+
+def _stream(R, done, cuts):
+    chunks, carry = [], None
+    for lo, hi in zip([0] + cuts, cuts + [len(R)]):
+        out, carry = episode_returns(R[lo:hi], done[lo:hi], carry)
+        chunks.append(out)
+    return np.concatenate(chunks), carry
+
+
+def test_single_batch():
+    R, done = _episodes()
+    want, tail = _expected(R, done)
+    got, carry = episode_returns(R, done)
+    np.testing.assert_allclose(got, want)
+    np.testing.assert_allclose(carry, tail)
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 33, 64])
+def test_carry_across_batches(size):
+    R, done = _episodes(seed=size)
+    want, tail = _expected(R, done)
+    got, carry = _stream(R, done, list(range(size, len(R), size)))
+    np.testing.assert_allclose(got, want)
+    np.testing.assert_allclose(carry, tail)
+
+
+def test_episode_spanning_batches_without_done():
+    R = np.arange(12, dtype=float).reshape(6, 2)
+    done = np.array([False, False, False, False, True, False])
+    # The middle batch has no episode end: everything rolls into the carry
+    got, carry = _stream(R, done, [1, 3])
+    np.testing.assert_allclose(got, [R[:5].sum(axis=0)])
+    np.testing.assert_allclose(carry, R[5])
+
+
+def test_batch_ending_on_done_leaves_no_carry():
+    R = np.ones((4, 1))
+    done = np.array([False, True, False, True])
+    got, carry = _stream(R, done, [2])
+    np.testing.assert_allclose(got, [[2.0], [2.0]])
+    assert carry is None
+
+
+def test_empty_batch_keeps_carry():
+    carry = np.array([1.5, -2.0])
+    got, out_carry = episode_returns(np.zeros((0, 2)), np.zeros(0, dtype=bool), carry)
+    assert got.shape == (0, 2)
+    assert out_carry is carry
+
+
+def test_input_is_not_modified():
+    R = np.ones((3, 2))
+    episode_returns(R, np.array([False, True, False]), carry=np.array([5.0, 5.0]))
+    np.testing.assert_array_equal(R, np.ones((3, 2)))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from src.sketches import QuantileSketch, merge_sketches
+
+QS = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+def _data(seed=0):
+    rng = np.random.default_rng(seed)
+    # Heavy-tailed positives, some negatives and exact zeros, like episode returns
+    return np.concatenate([rng.lognormal(0.0, 1.5, 4000), -rng.lognormal(1.0, 0.5, 1500), np.zeros(300)])
+
+
+def _chunks(v, n, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.array_split(rng.permutation(v), n)
+
+
+def test_merged_sketch_equals_sketch_of_all_data():
+    v = _data()
+    whole = QuantileSketch().add_many(v)
+    merged = merge_sketches(QuantileSketch().add_many(c) for c in _chunks(v, 7))
+    assert merged.count == whole.count
+    assert merged.zero == whole.zero
+    assert merged.pos == whole.pos and merged.neg == whole.neg
+    assert merged.min == whole.min and merged.max == whole.max
+    assert merged.sum == pytest.approx(whole.sum)
+    for q in QS:
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+@pytest.mark.parametrize("alpha", [0.01, 0.05])
+def test_merged_quantiles_within_relative_error(alpha):
+    v = _data(seed=3)
+    parts = [QuantileSketch(alpha=alpha).add_many(c) for c in _chunks(v, 5)]
+    merged = merge_sketches(p.to_dict() for p in parts)  # as stored in windows.json
+    for q in QS:
+        true = np.quantile(v, q, method="lower")
+        assert abs(merged.quantile(q) - true) <= alpha * abs(true) + 1e-12
+    assert merged.mean == pytest.approx(v.mean())
+
+
+def test_merge_is_order_independent():
+    v = _data(seed=5)
+    parts = [QuantileSketch().add_many(c) for c in _chunks(v, 4)]
+    a = merge_sketches(parts).to_dict()
+    b = merge_sketches(parts[::-1]).to_dict()
+    a["sum"] = pytest.approx(a["sum"])
+    assert a == b
+
+
+def test_merge_rejects_different_alpha():
+    a = QuantileSketch(alpha=0.01).add_many([1.0, 2.0])
+    b = QuantileSketch(alpha=0.02).add_many([3.0])
+    with pytest.raises(ValueError):
+        a.merge(b)